@@ -0,0 +1,131 @@
+#accounts.py do not change filename do not remove line
+"""
+accounts.py - Per-account configs for running several Pocket/Evernote pairs in one process.
+
+A pipeline config with an "accounts" list runs every account side by side
+(see pipeline_runner.run_accounts_once). Each entry has a "name" and
+overrides any part of the shared config, usually the Pocket token and the
+Evernote token and notebook:
+
+    "accounts": [
+        {"name": "alice", "pocket": {"access_token": "..."}, "evernote": {"auth_token": "..."}},
+        {"name": "bob", "pocket": {"access_token": "..."},
+         "evernote": {"auth_token": "...", "notebook_name": "Bob's Pocket"}}
+    ]
+
+Sections are merged key by key, so whatever an account does not set comes
+from the top level. The state that must never mix between accounts gets a
+per-account default unless the account sets it explicitly: the Evernote
+dedup index and outbox, the run ledger, the article store, the output and
+spool folders and the backfill checkpoint.
+
+The top-level http, scrape_pool, scrape_schedule, metrics and daemon
+sections, and the Evernote url_cache, service_url and backend settings,
+apply to the process and are shared by every account.
+"""
+import copy
+import logging
+import os
+import re
+
+from article_store import DEFAULT_STORE_PATH
+from run_ledger import DEFAULT_LEDGER_PATH
+from sync_index import DEFAULT_INDEX_PATH
+
+logger = logging.getLogger("accounts")
+
+# Account names end up in file names
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# Per-account state: (section, key, default, is_folder); a None default is only isolated when set
+STATE_PATHS = [
+    ("evernote", "index_path", DEFAULT_INDEX_PATH, False),
+    ("ledger", "path", DEFAULT_LEDGER_PATH, False),
+    ("output", "article_store", DEFAULT_STORE_PATH, False),
+    ("output", "json_folder", "pocket_articles", True),
+    ("output", "content_spool", None, True),
+    ("backfill", "folder", None, True),
+]
+
+
+def merge_config(base, overrides):
+    """Return a copy of base with overrides merged in, nested dictionaries key by key."""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def account_path(path, name, is_folder=False):
+    """Return the per-account variant of a state path: a subfolder, or a suffixed file name."""
+    if is_folder:
+        return os.path.join(path, name)
+    root, ext = os.path.splitext(path)
+    return f"{root}_{name}{ext}"
+
+
+def account_config(config, account):
+    """Build the full config of one account entry.
+
+    Args:
+        config: The pipeline config holding the "accounts" list
+        account: One entry of that list
+
+    Returns:
+        Configuration dictionary for the account alone
+    """
+    name = account["name"]
+    base = {key: value for key, value in config.items() if key != "accounts"}
+    overrides = {key: value for key, value in account.items() if key != "name"}
+    merged = merge_config(base, overrides)
+
+    for section, key, default, is_folder in STATE_PATHS:
+        if key in account.get(section, {}):
+            continue
+        if section == "backfill" and default is None:
+            from backfill import DEFAULT_FOLDER
+            default = DEFAULT_FOLDER
+        path = base.get(section, {}).get(key, default)
+        if path is not None:
+            merged.setdefault(section, {})[key] = account_path(path, name, is_folder)
+    return merged
+
+
+def account_configs(config, names=None):
+    """Return the (name, config) pairs of the accounts in a pipeline config.
+
+    Args:
+        config: Pipeline configuration
+        names: Optional list of account names to keep
+
+    Returns:
+        List of (name, config) tuples (empty when the config has no "accounts"
+        list), or None if the list is invalid or a requested name is missing
+    """
+    accounts = config.get("accounts") or []
+    if not isinstance(accounts, list):
+        logger.error("The accounts setting must be a list of account entries")
+        return None
+
+    configs = []
+    seen = set()
+    for account in accounts:
+        name = account.get("name") if isinstance(account, dict) else None
+        if not name or not _NAME_PATTERN.match(str(name)):
+            logger.error(f"Invalid account name {name!r}: use letters, digits, '.', '_' or '-'")
+            return None
+        if name in seen:
+            logger.error(f"Duplicate account name: {name}")
+            return None
+        seen.add(name)
+        if names is None or name in names:
+            configs.append((name, account_config(config, account)))
+
+    missing = set(names or []) - seen
+    if missing:
+        logger.error(f"Unknown account(s): {', '.join(sorted(missing))}")
+        return None
+    return configs
@@ -0,0 +1,261 @@
+#article.py do not change filename do not remove line
+"""
+article.py - Compact Article record shared by get_pocket, pipeline_runner and evernote_poster.
+
+Articles keep epoch integers and format timestamps only when asked. The
+(potentially large) scraped body can be spooled to disk through a
+ContentStore and is then loaded only when a note is rendered. Articles
+round-trip to the existing pocket_articles_*.json schema via to_dict and
+from_dict, and support dict-style get() so existing callers keep working.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+
+logger = logging.getLogger("article")
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(ts):
+    """Format an epoch timestamp the way the JSON dumps store it."""
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(int(ts)).strftime(TIME_FORMAT)
+
+
+def parse_timestamp(value):
+    """Parse a stored timestamp (epoch int/str or formatted string) back to epoch seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = str(value)
+    if value.isdigit():
+        return int(value)
+    return int(datetime.strptime(value, TIME_FORMAT).timestamp())
+
+
+class ContentRef:
+    """Reference to an article body stored on disk."""
+
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def __repr__(self):
+        return f"ContentRef({self.path!r})"
+
+
+class ContentStore:
+    """Spools article bodies to a directory so they are not all held in memory.
+
+    Args:
+        directory: Folder where bodies are written (created if missing)
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, key, text):
+        """Write text under key and return a ContentRef to it."""
+        name = hashlib.sha1(str(key).encode('utf-8')).hexdigest() + ".txt"
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return ContentRef(path)
+
+    def clear(self):
+        """Remove every spooled body."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+
+class Article:
+    """A single Pocket article.
+
+    Timestamps are stored as epoch integers; the formatted strings used by
+    the JSON schema are produced lazily by the time_added/time_updated
+    properties. The body is either an inline string or a ContentRef.
+    """
+
+    __slots__ = (
+        "item_id", "title", "url", "excerpt", "time_added_ts", "time_updated_ts",
+        "word_count", "tags", "content_type", "content_meta", "_body",
+    )
+
+    def __init__(self, item_id=None, title="Untitled", url=None, excerpt="",
+                 time_added_ts=None, time_updated_ts=None, word_count=None, tags=None):
+        self.item_id = item_id
+        self.title = title
+        self.url = url
+        self.excerpt = excerpt
+        self.time_added_ts = time_added_ts
+        self.time_updated_ts = time_updated_ts
+        self.word_count = word_count
+        self.tags = tags if tags is not None else []
+        self.content_type = None
+        self.content_meta = None
+        self._body = None
+
+    @classmethod
+    def from_pocket_item(cls, item_id, item):
+        """Build an Article (without content) from a raw Pocket API item."""
+        return cls(
+            item_id=item_id,
+            title=item.get("resolved_title") or item.get("given_title") or "Untitled",
+            url=item.get("resolved_url") or item.get("given_url"),
+            excerpt=item.get("excerpt", ""),
+            time_added_ts=int(item.get("time_added", 0)),
+            time_updated_ts=int(item.get("time_updated", 0)),
+            word_count=item.get("word_count", 0),
+            tags=list(item.get("tags", {}).keys()),
+        )
+
+    @classmethod
+    def from_dict(cls, data, store=None):
+        """Build an Article from the JSON schema written by save_articles_to_json.
+
+        Args:
+            data: Article dictionary
+            store: Optional ContentStore to spool the body into
+        """
+        article = cls(
+            item_id=data.get("item_id"),
+            title=data.get("title", "Untitled"),
+            url=data.get("url"),
+            excerpt=data.get("excerpt", ""),
+            time_added_ts=parse_timestamp(data.get("time_added")),
+            time_updated_ts=parse_timestamp(data.get("time_updated")),
+            word_count=data.get("word_count"),
+            tags=list(data.get("tags") or []),
+        )
+        content = dict(data.get("content") or {})
+        if content:
+            body = content.pop("content", None)
+            content_type = content.pop("type", None)
+            article.set_content(content_type, body, store=store, **content)
+        return article
+
+    def set_content(self, content_type, body=None, store=None, **meta):
+        """Set the article content.
+
+        Args:
+            content_type: "article", "youtube", "image", ...
+            body: Body text, if any
+            store: Optional ContentStore; when given the body is spooled to disk
+            **meta: Extra content fields (video_id, image_url, scraped, ...)
+        """
+        self.content_type = content_type
+        self.content_meta = meta or None
+        if body is not None and store is not None:
+            body = store.put(self.item_id or self.url or id(self), body)
+        self._body = body
+
+    @property
+    def body(self):
+        """Return the content body, loading it from disk if it was spooled."""
+        if isinstance(self._body, ContentRef):
+            return self._body.load()
+        return self._body
+
+    @property
+    def body_is_spooled(self):
+        return isinstance(self._body, ContentRef)
+
+    @property
+    def time_added(self):
+        return format_timestamp(self.time_added_ts)
+
+    @property
+    def time_updated(self):
+        return format_timestamp(self.time_updated_ts)
+
+    @property
+    def content(self):
+        """Content dictionary in the JSON schema (loads a spooled body)."""
+        if self.content_type is None and not self.content_meta and self._body is None:
+            return {}
+        content = {"type": self.content_type}
+        if self._body is not None:
+            content["content"] = self.body
+        if self.content_meta:
+            content.update(self.content_meta)
+        return content
+
+    def to_dict(self):
+        """Return the article in the existing JSON schema."""
+        data = {}
+        for key in ("item_id", "title", "url", "excerpt", "time_added", "time_updated", "word_count", "tags", "content"):
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        return data
+
+    # Dict-style access so code written against article dicts keeps working
+    def get(self, key, default=None):
+        if key not in _DICT_KEYS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in _DICT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in _DICT_KEYS and getattr(self, key) is not None
+
+    def __repr__(self):
+        return f"Article(item_id={self.item_id!r}, title={self.title!r})"
+
+
+_DICT_KEYS = frozenset(("item_id", "title", "url", "excerpt", "time_added", "time_updated", "word_count", "tags", "content"))
+
+
+def as_article(obj, store=None):
+    """Return obj as an Article, converting dictionaries from the JSON schema."""
+    if isinstance(obj, Article):
+        return obj
+    return Article.from_dict(obj, store=store)
+
+
+def dump_articles(articles, f):
+    """Write articles as a JSON array, one article at a time.
+
+    Spooled bodies are loaded only while their own article is being written,
+    so memory stays flat regardless of the number of articles.
+    """
+    f.write("[")
+    count = 0
+    for article in articles:
+        data = article.to_dict() if isinstance(article, Article) else article
+        f.write(",\n" if count else "\n")
+        # Indent one level to match json.dump(articles, f, indent=2)
+        # (split on "\n" only: bodies may contain U+2028 which splitlines() would break on)
+        f.write("\n".join("  " + line for line in json.dumps(data, ensure_ascii=False, indent=2).split("\n")))
+        count += 1
+    f.write("\n]" if count else "]")
+    return count
+
+
+def load_articles(path, store=None):
+    """Load a JSON article file into a list of Articles.
+
+    Args:
+        path: Path to a pocket_articles_*.json file
+        store: Optional ContentStore to spool bodies into
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [Article.from_dict(d, store=store) for d in data]
@@ -0,0 +1,218 @@
+#article_archive.py do not change filename do not remove line
+"""
+article_archive.py - Compressed, line-delimited article archives with random access.
+
+An archive (*.jsonl.gz) holds one compact JSON article per line, and every
+article is written as its own gzip member. The file is still a plain gzip
+stream (zcat / gzip.open read it whole), so readers can stream articles one
+at a time in constant memory. Because members are independent, a sidecar
+index (<archive>.idx, one "item_id<TAB>url_hash<TAB>offset<TAB>length" line
+per article) lets a reader seek straight to a single article and decompress
+only that one. The index is appended as articles are written, so an
+interrupted writer leaves a consistent prefix.
+
+Legacy pocket_articles_*.json arrays are still read by iter_articles_file.
+
+Usage:
+    python article_archive.py --convert archive/pocket_articles_20250326_183807.json
+    python article_archive.py --get 12345 pocket_articles/backfill/chunk_00000000.jsonl.gz
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import zlib
+
+from article import Article, load_articles
+from sync_index import url_hash
+
+logger = logging.getLogger("article_archive")
+
+ARCHIVE_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".idx"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Per-member compression level: bodies are text, 6 is the gzip default trade-off
+COMPRESS_LEVEL = 6
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def is_archive(path):
+    """Return True if the file is a gzip archive rather than a legacy JSON dump."""
+    with open(path, 'rb') as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+class ArchiveWriter:
+    """Writes articles to an archive, one gzip member and index line each.
+
+    Use as a context manager, or call close() when done.
+
+    Args:
+        path: Archive path (conventionally ending in .jsonl.gz)
+        append: Add to an existing archive instead of replacing it
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        mode = 'ab' if append else 'wb'
+        self._file = open(path, mode)
+        self._index = open(index_path(path), 'a' if append else 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, article):
+        """Append one article (Article record or dictionary)."""
+        data = article.to_dict() if isinstance(article, Article) else article
+        line = json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+        member = gzip.compress(line.encode("utf-8"), compresslevel=COMPRESS_LEVEL, mtime=0)
+        offset = self._file.tell()
+        self._file.write(member)
+        self._index.write(
+            f"{data.get('item_id') or ''}\t{url_hash(data.get('url') or '')}\t{offset}\t{len(member)}\n"
+        )
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_archive(articles, path):
+    """Write articles to a new archive.
+
+    Spooled bodies are loaded one article at a time, so memory stays flat.
+
+    Returns:
+        Number of articles written
+    """
+    with ArchiveWriter(path) as writer:
+        for article in articles:
+            writer.write(article)
+    return writer.count
+
+
+def iter_archive(path, store=None):
+    """Yield the articles of an archive one at a time.
+
+    Args:
+        path: Archive path
+        store: Optional ContentStore to spool bodies into
+    """
+    with gzip.open(path, 'rt', encoding='utf-8', newline="\n") as f:
+        for line in f:
+            if line.strip():
+                yield Article.from_dict(json.loads(line), store=store)
+
+
+class ArticleArchive:
+    """Random access to an archive through its sidecar index.
+
+    Args:
+        path: Archive path; its .idx file must exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._by_item_id = {}
+        self._by_url_hash = {}
+        self._entries = []
+        with open(index_path(path), 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 4:
+                    continue
+                item_id, key, offset, length = parts
+                entry = (int(offset), int(length))
+                self._entries.append(entry)
+                if item_id:
+                    self._by_item_id[item_id] = entry
+                self._by_url_hash[key] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _read(self, entry, store=None):
+        offset, length = entry
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            member = f.read(length)
+        data = zlib.decompress(member, wbits=31)
+        return Article.from_dict(json.loads(data.decode("utf-8")), store=store)
+
+    def get(self, item_id=None, url=None, store=None):
+        """Return one article by Pocket item_id or URL, or None if it is not in the archive."""
+        entry = None
+        if item_id is not None:
+            entry = self._by_item_id.get(str(item_id))
+        if entry is None and url:
+            entry = self._by_url_hash.get(url_hash(url))
+        return self._read(entry, store) if entry else None
+
+
+def iter_articles_file(path, store=None):
+    """Yield the articles of an archive or a legacy JSON dump.
+
+    Archives are streamed; legacy dumps are a single JSON array and are loaded whole.
+    """
+    if is_archive(path):
+        yield from iter_archive(path, store)
+    else:
+        yield from load_articles(path, store=store)
+
+
+def archive_name(json_path):
+    """Return the archive path for a legacy dump (pocket_articles_x.json -> pocket_articles_x.jsonl.gz)."""
+    base = json_path[:-len(".json")] if json_path.endswith(".json") else json_path
+    return base + ARCHIVE_SUFFIX
+
+
+def convert(json_path, archive_path=None):
+    """Convert a legacy JSON dump into an archive next to it.
+
+    Returns:
+        Path of the written archive
+    """
+    archive_path = archive_path or archive_name(json_path)
+    count = write_archive(iter_articles_file(json_path), archive_path)
+    before = os.path.getsize(json_path)
+    after = os.path.getsize(archive_path) + os.path.getsize(index_path(archive_path))
+    logger.info(f"Converted {json_path}: {count} articles, {before} -> {after} bytes ({before / max(after, 1):.1f}x smaller)")
+    return archive_path
+
+
+def main():
+    """Convert legacy dumps to archives or read one article from an archive."""
+    parser = argparse.ArgumentParser(description="Compressed article archives")
+    parser.add_argument("--convert", nargs="+", metavar="JSON", help="Legacy JSON dumps to convert")
+    parser.add_argument("--get", metavar="ITEM_ID_OR_URL", help="Print one article from the archive")
+    parser.add_argument("archive", nargs="?", help="Archive to read with --get")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for json_path in args.convert or []:
+        convert(json_path)
+    if args.get:
+        if not args.archive:
+            parser.error("--get needs an archive path")
+        archive = ArticleArchive(args.archive)
+        key = args.get
+        article = archive.get(url=key) if "://" in key else archive.get(item_id=key)
+        if article is None:
+            print("Not found")
+            sys.exit(1)
+        print(json.dumps(article.to_dict(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#article_store.py do not change filename do not remove line
+"""
+article_store.py - Indexed, deduplicating store of every fetched article.
+
+Articles are kept in one SQLite table keyed by the hash of their canonical
+(normalized) URL, with indexes on Pocket item_id and time_added, so "have we
+seen this URL?" and "what was added last week?" are index lookups instead of
+loading every pocket_articles_*.json snapshot. Saving upserts: an article
+seen in an earlier run is updated in place (or left alone when nothing
+changed) instead of being written again. import_dumps() loads the existing
+JSON snapshots from pocket_articles/ and archive/.
+
+Usage:
+    python article_store.py --import pocket_articles archive
+    python article_store.py --lookup https://example.com/post
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from article import Article, parse_timestamp
+from sync_index import article_key, normalize_url, url_hash
+
+logger = logging.getLogger("article_store")
+
+DEFAULT_STORE_PATH = os.path.join("pocket_articles", "articles.sqlite")
+
+
+def store_path(config):
+    """Return the article store path configured as output.article_store."""
+    return config.get("output", {}).get("article_store", DEFAULT_STORE_PATH)
+
+
+class ArticleStore:
+    """SQLite store of articles, deduplicated by canonical URL and item_id.
+
+    Args:
+        path: Path to the SQLite database file
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS articles (
+                    url_hash TEXT PRIMARY KEY,
+                    item_id TEXT,
+                    canonical_url TEXT NOT NULL,
+                    time_added INTEGER,
+                    data TEXT NOT NULL,
+                    data_hash TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_item_id ON articles(item_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_time_added ON articles(time_added)")
+
+    def _find(self, item_id, key):
+        # item_id first: Pocket keeps it stable even when the resolved URL changes
+        if item_id:
+            row = self._conn.execute(
+                "SELECT url_hash, data_hash FROM articles WHERE item_id = ?", (item_id,)
+            ).fetchone()
+            if row:
+                return row
+        return self._conn.execute("SELECT url_hash, data_hash FROM articles WHERE url_hash = ?", (key,)).fetchone()
+
+    def _upsert(self, data, now):
+        url = data.get("url") or ""
+        item_id = str(data["item_id"]) if data.get("item_id") else None
+        key = article_key(data)
+        payload = json.dumps(data, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.md5(payload.encode("utf-8")).hexdigest()
+        time_added = parse_timestamp(data.get("time_added"))
+
+        row = self._find(item_id, key)
+        if row is None:
+            self._conn.execute(
+                """INSERT INTO articles
+                   (url_hash, item_id, canonical_url, time_added, data, data_hash, first_seen, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (key, item_id, normalize_url(url), time_added, payload, digest, now, now),
+            )
+            return "inserted"
+        if row["data_hash"] == digest:
+            return "unchanged"
+        if row["url_hash"] != key:
+            # The item moved to a URL another row already holds: keep one row
+            self._conn.execute("DELETE FROM articles WHERE url_hash = ?", (key,))
+        self._conn.execute(
+            """UPDATE articles SET url_hash = ?, item_id = COALESCE(?, item_id), canonical_url = ?,
+                   time_added = COALESCE(?, time_added), data = ?, data_hash = ?, updated_at = ?
+               WHERE url_hash = ?""",
+            (key, item_id, normalize_url(url), time_added, payload, digest, now, row["url_hash"]),
+        )
+        return "updated"
+
+    def upsert(self, articles):
+        """Insert or update articles (Article records or dictionaries) in one transaction.
+
+        Returns:
+            Dictionary with the number of articles inserted, updated and unchanged
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        now = time.time()
+        with self._lock, self._conn:
+            for article in articles:
+                data = article.to_dict() if isinstance(article, Article) else article
+                counts[self._upsert(data, now)] += 1
+        return counts
+
+    def _article(self, row, store=None):
+        return Article.from_dict(json.loads(row["data"]), store=store) if row else None
+
+    def get(self, item_id, store=None):
+        """Return the article with this Pocket item_id, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM articles WHERE item_id = ?", (str(item_id),)).fetchone()
+        return self._article(row, store)
+
+    def get_by_url(self, url, store=None):
+        """Return the article whose canonical URL matches url, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM articles WHERE url_hash = ?", (url_hash(url),)).fetchone()
+        return self._article(row, store)
+
+    def contains_url(self, url):
+        """Return True if an article with this canonical URL has been stored."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM articles WHERE url_hash = ?", (url_hash(url),)
+            ).fetchone() is not None
+
+    def added_between(self, start=None, end=None, store=None):
+        """Yield articles by time_added (epoch seconds, inclusive bounds), oldest first."""
+        query = "SELECT data FROM articles WHERE time_added IS NOT NULL"
+        params = []
+        if start is not None:
+            query += " AND time_added >= ?"
+            params.append(int(start))
+        if end is not None:
+            query += " AND time_added <= ?"
+            params.append(int(end))
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY time_added", params).fetchall()
+        for row in rows:
+            yield self._article(row, store)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def save_articles_to_store(articles, path=DEFAULT_STORE_PATH):
+    """Upsert articles into the article store at path.
+
+    Returns:
+        Path to the store, or None if saving failed
+    """
+    try:
+        store = ArticleStore(path)
+        try:
+            counts = store.upsert(articles)
+        finally:
+            store.close()
+        logger.info(
+            f"Saved articles to {path}: {counts['inserted']} new, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+        )
+        return path
+    except Exception as e:
+        logger.error(f"Error saving articles to {path}: {str(e)}")
+        return None
+
+
+def _dump_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [d for d in dirs if not d.startswith(".")]
+                files.extend(os.path.join(root, name) for name in names if name.endswith(".json"))
+        elif path.endswith(".json"):
+            files.append(path)
+    # Timestamped names sort chronologically across folders
+    return sorted(files, key=lambda f: (os.path.basename(f), f))
+
+
+def import_dumps(store, paths):
+    """Import JSON article snapshots (files or folders searched recursively).
+
+    Files are imported in name order, which for the timestamped dumps is
+    chronological, so the newest copy of an article wins. Files that are not
+    article lists (checkpoints, configs) are skipped.
+
+    Returns:
+        Dictionary with the number of files read and articles inserted, updated and unchanged
+    """
+    totals = {"files": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    for path in _dump_files(paths):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Skipping {path}: {str(e)}")
+            continue
+        if not isinstance(data, list) or not all(isinstance(d, dict) and "url" in d for d in data):
+            logger.info(f"Skipping {path}: not an article dump")
+            continue
+        counts = store.upsert(data)
+        totals["files"] += 1
+        for key, value in counts.items():
+            totals[key] += value
+        logger.info(f"Imported {path}: {counts['inserted']} new, {counts['updated']} updated, {counts['unchanged']} unchanged")
+    return totals
+
+
+def main():
+    """Import dumps into the article store or look articles up."""
+    parser = argparse.ArgumentParser(description="Manage the indexed article store")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Path to the article store")
+    parser.add_argument("--import", dest="import_paths", nargs="+", metavar="PATH",
+                        help="JSON dumps or folders of dumps to import (e.g. pocket_articles archive)")
+    parser.add_argument("--lookup", metavar="URL", help="Print the stored article for a URL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    store = ArticleStore(args.store)
+    try:
+        if args.import_paths:
+            totals = import_dumps(store, args.import_paths)
+            logger.info(
+                f"Imported {totals['files']} files: {totals['inserted']} new, {totals['updated']} updated, "
+                f"{totals['unchanged']} unchanged; {store.count()} articles in {args.store}"
+            )
+        if args.lookup:
+            article = store.get_by_url(args.lookup)
+            if article is None:
+                print("Not found")
+            else:
+                print(json.dumps(article.to_dict(), ensure_ascii=False, indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
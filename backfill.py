@@ -0,0 +1,186 @@
+#backfill.py do not change filename do not remove line
+"""
+backfill.py - Full-library Pocket backfill with resumable checkpoints.
+
+The library is split into fixed-size offset chunks (oldest first, so offsets
+stay stable while new items are saved) and fetched with bounded parallelism.
+Every finished chunk is written to its own compressed article archive
+(article_archive.py) and recorded in a checkpoint file, so an interrupted
+backfill resumes with the missing chunks. The last chunk is fetched again
+while it is not full, since items saved after it was fetched land in it.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from article_archive import ARCHIVE_SUFFIX, write_archive
+from get_pocket import (
+    fetch_pocket_page,
+    fetch_pocket_total,
+    scrape_pool_running,
+    start_scrape_pool,
+    stop_scrape_pool,
+)
+
+logger = logging.getLogger("backfill")
+
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_WORKERS = 2
+DEFAULT_FOLDER = os.path.join("pocket_articles", "backfill")
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def load_checkpoint(path):
+    """Load a backfill checkpoint, or return None if there is none."""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading backfill checkpoint {path}: {str(e)}")
+    return None
+
+
+def save_checkpoint(path, checkpoint):
+    """Atomically write the checkpoint file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class _Progress:
+    """Tracks throughput and ETA across worker threads."""
+
+    def __init__(self, total_chunks, done_chunks):
+        self.total_chunks = total_chunks
+        self.done_chunks = done_chunks
+        self.session_chunks = 0
+        self.session_articles = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def chunk_done(self, article_count):
+        with self.lock:
+            self.done_chunks += 1
+            self.session_chunks += 1
+            self.session_articles += article_count
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            rate = self.session_articles / elapsed
+            remaining = self.total_chunks - self.done_chunks
+            eta = remaining * (elapsed / self.session_chunks)
+            logger.info(
+                f"Backfill {self.done_chunks}/{self.total_chunks} chunks, "
+                f"{rate:.1f} articles/s, ETA {eta:.0f}s"
+            )
+
+
+def run_backfill(config, chunk_size=None, workers=None, folder=None, content_store=None):
+    """Fetch the whole Pocket library in resumable chunks.
+
+    Args:
+        config: Pipeline configuration
+        chunk_size: Number of items per chunk (defaults to backfill.chunk_size)
+        workers: Number of chunks fetched in parallel (defaults to backfill.workers)
+        folder: Folder for chunk files and the checkpoint (defaults to backfill.folder)
+        content_store: Optional ContentStore to spool scraped bodies into
+
+    Returns:
+        List of chunk file paths in library order, or None if the backfill
+        did not complete (the checkpoint keeps what was finished)
+    """
+    backfill_config = config.get("backfill", {})
+    chunk_size = chunk_size or backfill_config.get("chunk_size", DEFAULT_CHUNK_SIZE)
+    workers = workers or backfill_config.get("workers", DEFAULT_WORKERS)
+    folder = folder or backfill_config.get("folder", DEFAULT_FOLDER)
+    consumer_key = config["pocket"]["consumer_key"]
+    access_token = config["pocket"]["access_token"]
+
+    os.makedirs(folder, exist_ok=True)
+    checkpoint_path = os.path.join(folder, CHECKPOINT_FILE)
+    checkpoint = load_checkpoint(checkpoint_path)
+
+    if checkpoint and checkpoint.get("chunk_size") != chunk_size:
+        logger.warning(
+            f"Resuming with checkpoint chunk size {checkpoint['chunk_size']} "
+            f"(ignoring requested {chunk_size})"
+        )
+        chunk_size = checkpoint["chunk_size"]
+
+    total = fetch_pocket_total(consumer_key, access_token)
+    if total is None:
+        logger.error("Could not determine the size of the Pocket library. Backfill aborted.")
+        return None
+
+    if not checkpoint:
+        checkpoint = {
+            "chunk_size": chunk_size,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "completed": {},
+        }
+    checkpoint["total"] = total
+
+    offsets = list(range(0, total, chunk_size))
+    completed = checkpoint["completed"]
+    pending = [offset for offset in offsets if str(offset) not in completed]
+    # Items saved since a partial last chunk was fetched belong to it: fetch it again
+    if completed:
+        last = max(int(offset) for offset in completed)
+        if last in offsets and completed[str(last)]["count"] < chunk_size and last not in pending:
+            del completed[str(last)]
+            pending = sorted(pending + [last])
+
+    logger.info(
+        f"Backfilling {total} items in {len(offsets)} chunks of {chunk_size} "
+        f"({len(offsets) - len(pending)} already done, {workers} workers)"
+    )
+
+    progress = _Progress(len(offsets), len(offsets) - len(pending))
+    lock = threading.Lock()
+
+    def fetch_chunk(offset):
+        articles = fetch_pocket_page(consumer_key, access_token, offset, chunk_size, content_store)
+        if articles is None:
+            return offset, None
+        chunk_file = os.path.join(folder, f"chunk_{offset:08d}{ARCHIVE_SUFFIX}")
+        write_archive(articles, chunk_file)
+        with lock:
+            completed[str(offset)] = {"file": chunk_file, "count": len(articles)}
+            save_checkpoint(checkpoint_path, checkpoint)
+        progress.chunk_done(len(articles))
+        return offset, chunk_file
+
+    failed = []
+    # Chunks scrape through one set of warm browsers, closed once when every chunk is done
+    own_pool = not scrape_pool_running()
+    if own_pool:
+        start_scrape_pool(workers, cache_size=0)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fetch_chunk, offset) for offset in pending]
+            for future in as_completed(futures):
+                try:
+                    offset, chunk_file = future.result()
+                except Exception as e:
+                    logger.error(f"Backfill chunk failed: {str(e)}")
+                    failed.append(None)
+                    continue
+                if chunk_file is None:
+                    logger.error(f"Failed to fetch backfill chunk at offset {offset}")
+                    failed.append(offset)
+    finally:
+        if own_pool:
+            stop_scrape_pool()
+
+    if failed:
+        logger.error(f"{len(failed)} backfill chunks failed. Rerun with --backfill to resume.")
+        return None
+
+    checkpoint["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    save_checkpoint(checkpoint_path, checkpoint)
+    logger.info(f"Backfill complete: {sum(c['count'] for c in completed.values())} articles")
+    return [completed[str(offset)]["file"] for offset in offsets]
@@ -0,0 +1,233 @@
+#fixtures.py do not change filename do not remove line
+"""
+fixtures.py - Benchmark datasets and local stand-ins built from the saved article dumps.
+
+The real pocket_articles/*.json and archive/pocket_articles_*.json snapshots
+are turned into:
+
+- raw Pocket /v3/get items (make_pocket_items), scaled to any size by
+  repeating the fixtures under new item ids;
+- saved HTML pages, one per article, served by a local HTTP server
+  (serve_pages) so scraping runs against realistic bodies without the network;
+- a local Pocket API stand-in (serve_pocket) that answers /v3/get with the
+  same since/sort/offset/count/total semantics the pipeline relies on.
+
+Point the pipeline at the stand-in with {"pocket": {"api_url": ...}} and at
+fake_notestore.serve() with evernote.service_url.
+"""
+import glob
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIXTURE_PATTERNS = [
+    os.path.join("pocket_articles", "*.json"),
+    os.path.join("archive", "pocket_articles_*.json"),
+]
+
+# Base epoch for synthetic time_added values, one second apart
+BASE_TIME = 1700000000
+
+
+def load_fixture_articles(patterns=FIXTURE_PATTERNS):
+    """Return the distinct article dictionaries of the saved dumps, oldest file first."""
+    articles = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, pattern))):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, list):
+                continue
+            for article in data:
+                if isinstance(article, dict) and article.get("url"):
+                    articles[article["url"]] = article
+    if not articles:
+        raise RuntimeError("No fixture articles found in pocket_articles/ or archive/")
+    return list(articles.values())
+
+
+def article_body(article):
+    """Return the fixture's scraped text, falling back to its excerpt."""
+    content = article.get("content") or {}
+    return content.get("content") or article.get("excerpt") or article.get("title") or ""
+
+
+def page_html(article):
+    """Render a fixture article as a saved web page with its paragraphs in an <article>."""
+    paragraphs = [p.strip() for p in article_body(article).split("\n\n") if p.strip()]
+    title = html.escape(article.get("title") or "Untitled")
+    body = "\n".join(f"<p>{html.escape(p)}</p>" for p in paragraphs)
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title></head>"
+        f"<body><header><nav>Home | About</nav></header>"
+        f"<article><h1>{title}</h1>\n{body}\n</article>"
+        f"<footer>Saved page fixture</footer></body></html>"
+    )
+
+
+def make_pocket_items(count, page_base_url=None, scrape=True, fixtures=None):
+    """Build count raw Pocket items by cycling through the fixture articles.
+
+    Args:
+        count: Number of items
+        page_base_url: Base URL of serve_pages(); item i resolves to <base>/pages/<i>.html
+        scrape: Keep the fixtures' own excerpts, so items with a short excerpt
+            are scraped as in production; False gives every item a long
+            excerpt, so nothing is scraped
+        fixtures: Fixture articles (defaults to load_fixture_articles())
+
+    Returns:
+        Tuple of (items, pages): items maps item_id to raw Pocket item, pages
+        maps each page path to its HTML
+    """
+    fixtures = fixtures or load_fixture_articles()
+    items = {}
+    pages = {}
+    for i in range(count):
+        article = fixtures[i % len(fixtures)]
+        item_id = str(100000 + i)
+        path = f"/pages/{i}.html"
+        pages[path] = page_html(article)
+        url = f"{page_base_url.rstrip('/')}{path}" if page_base_url else f"{article['url']}#copy-{i}"
+        excerpt = article.get("excerpt") or ""
+        if not scrape and len(excerpt.strip()) < 100:
+            excerpt = article_body(article)[:400].ljust(100, ".")
+        body = article_body(article)
+        items[item_id] = {
+            "item_id": item_id,
+            "resolved_id": item_id,
+            "given_url": url,
+            "resolved_url": url,
+            "given_title": article.get("title") or "",
+            "resolved_title": article.get("title") or "",
+            "excerpt": excerpt,
+            "word_count": str(article.get("word_count") or len(body.split())),
+            "time_added": str(BASE_TIME + i),
+            "time_updated": str(BASE_TIME + i),
+            "status": "0",
+            "has_image": "0",
+            "has_video": "0",
+            "tags": {tag: {"item_id": item_id, "tag": tag} for tag in article.get("tags") or []},
+        }
+    return items, pages
+
+
+class _Server:
+    """A ThreadingHTTPServer running in a daemon thread."""
+
+    def __init__(self, handler_class):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.requests = 0
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this, delayed ACKs add ~40ms per keep-alive request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve_pages(pages, latency=0.0):
+    """Serve saved pages (path -> HTML) over HTTP.
+
+    Args:
+        pages: Mapping of URL path to HTML (read on every request, so it may be filled in later)
+        latency: Seconds to wait before answering, to mimic a remote site
+
+    Returns:
+        Server with .url and .shutdown()
+    """
+    server = None
+
+    class Handler(_QuietHandler):
+        def do_GET(self):
+            server.requests += 1
+            if latency:
+                time.sleep(latency)
+            page = pages.get(self.path.split("?")[0])
+            if page is None:
+                self._send(404, "<html><body>Not found</body></html>", "text/html; charset=utf-8")
+            else:
+                self._send(200, page, "text/html; charset=utf-8")
+
+    server = _Server(Handler)
+    return server
+
+
+def pocket_response(items, params):
+    """Answer a /v3/get request the way Pocket does, from a dict of raw items."""
+    since = int(params.get("since") or 0)
+    selected = [item for item in items.values() if int(item["time_updated"]) >= since]
+    selected.sort(key=lambda item: int(item["time_added"]), reverse=params.get("sort", "newest") != "oldest")
+    total = len(selected)
+    offset = int(params.get("offset") or 0)
+    if params.get("count"):
+        selected = selected[offset:offset + int(params["count"])]
+    else:
+        selected = selected[offset:]
+    response = {
+        "status": 1,
+        "complete": 1,
+        # Pocket sends an empty list, not an empty object, when nothing matches
+        "list": {item["item_id"]: item for item in selected} or [],
+        "since": int(time.time()),
+    }
+    if str(params.get("total")) == "1":
+        response["total"] = str(total)
+    return response
+
+
+def serve_pocket(items, latency=0.0):
+    """Serve a local stand-in for the Pocket API's /v3/get endpoint.
+
+    Args:
+        items: Mapping of item_id to raw Pocket item (see make_pocket_items)
+        latency: Seconds to wait before answering each request
+
+    Returns:
+        Server with .url (use as pocket.api_url), .requests and .shutdown()
+    """
+    server = None
+
+    class Handler(_QuietHandler):
+        def do_POST(self):
+            server.requests += 1
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, '{"error": "bad json"}', "application/json")
+                return
+            if self.path.rstrip("/") != "/v3/get":
+                self._send(404, '{"error": "not found"}', "application/json")
+                return
+            if latency:
+                time.sleep(latency)
+            self._send(200, json.dumps(pocket_response(items, params)), "application/json")
+
+    server = _Server(Handler)
+    server.url = server.url + "/v3"
+    return server
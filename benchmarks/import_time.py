@@ -0,0 +1,190 @@
+#import_time.py do not change filename do not remove line
+"""
+import_time.py - Startup budget check for the pipeline's entry modules.
+
+Imports each module in a fresh interpreter with `python -X importtime`, takes
+the best of several runs of the module's cumulative import time, and fails
+(exit status 1) when one exceeds the budget or pulls in a heavy subsystem
+that should only load on first use (Playwright, the Evernote SDK, requests).
+The per-module breakdown of the slowest imports is printed to help find the
+regression.
+
+It also runs pipeline_runner.main() on paths that make no network calls (such
+as reading an article file with --json and Evernote disabled) and fails when
+they load a heavy subsystem anyway.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 150 --runs 7 --output import_time.json
+    python benchmarks/import_time.py --module get_pocket --allow requests --budget-ms 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["pipeline_runner"]
+DEFAULT_BUDGET_MS = 150.0
+
+# Top-level packages that must not be imported just to start the pipeline
+HEAVY_MODULES = ["playwright", "evernote", "thrift", "requests", "scrap_site"]
+
+# main() command lines that make no HTTP calls, so must not load HTTP either
+OFFLINE_COMMANDS = {
+    "pipeline_runner --json (Evernote disabled)": ["--json", "{articles}"],
+}
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}.
+
+    Interpreter startup (site and everything it imports) is left out, so only
+    the imports triggered by the measured statement are counted.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].strip()
+        if fields[2] == " site":  # top level, not nested
+            times.clear()
+            continue
+        times[name] = (int(fields[0]), int(fields[1]))
+    return times
+
+
+def measure(module, heavy_modules=HEAVY_MODULES):
+    """Import module once in a fresh interpreter.
+
+    Returns:
+        Tuple of ({module: (self_us, cumulative_us)}, list of loaded heavy modules)
+    """
+    check = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {list(heavy_modules)!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=REPO_ROOT, env=_run_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    loaded = [name for name in proc.stdout.strip().split(",") if name]
+    return parse_importtime(proc.stderr), loaded
+
+
+def _run_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+def check_command(argv, heavy_modules=HEAVY_MODULES + ["http_client"]):
+    """Run pipeline_runner.main() with argv in a fresh interpreter, in a scratch folder.
+
+    The folder holds a config with Evernote disabled and a one-article file
+    (substituted for "{articles}" in argv).
+
+    Returns:
+        List of heavy modules loaded by the run
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        config_path = os.path.join(folder, "pipeline_config.json")
+        articles_path = os.path.join(folder, "articles.json")
+        with open(config_path, 'w') as f:
+            json.dump({"pocket": {"hours_lookback": 24}, "evernote": {"enabled": False}}, f)
+        with open(articles_path, 'w') as f:
+            json.dump([{"item_id": "1", "title": "Example", "url": "https://example.com/"}], f)
+        argv = ["pipeline_runner.py", "--config", config_path] + [
+            arg.replace("{articles}", articles_path) for arg in argv
+        ]
+        check = (
+            f"import sys, pipeline_runner; sys.argv = {argv!r}; pipeline_runner.main(); "
+            f"print(','.join(m for m in {list(heavy_modules)!r} if m in sys.modules))"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", check], cwd=folder, env=_run_env(), capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"pipeline_runner {' '.join(argv[1:])} failed:\n{proc.stderr[-2000:]}")
+    lines = proc.stdout.strip().splitlines()
+    return [name for name in (lines[-1] if lines else "").split(",") if name]
+
+
+def run_benchmark(args):
+    heavy_modules = [name for name in HEAVY_MODULES if name not in (args.allow or [])]
+    results = []
+    for module in args.module or DEFAULT_MODULES:
+        best = None
+        best_times = None
+        heavy = set()
+        for _ in range(args.runs):
+            times, loaded = measure(module, heavy_modules)
+            heavy.update(loaded)
+            total = times.get(module, (0, 0))[1]
+            if best is None or total < best:
+                best, best_times = total, times
+        slowest = sorted(
+            ((name, cumulative) for name, (_, cumulative) in best_times.items() if name != module),
+            key=lambda entry: entry[1], reverse=True,
+        )[:args.top]
+        total_ms = best / 1000
+        results.append({
+            "module": module,
+            "import_ms": round(total_ms, 1),
+            "budget_ms": args.budget_ms,
+            "within_budget": total_ms <= args.budget_ms,
+            "heavy_modules_loaded": sorted(heavy),
+            "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest],
+        })
+    commands = []
+    if not args.module:
+        for name, argv in OFFLINE_COMMANDS.items():
+            loaded = check_command(argv, heavy_modules + ["http_client"])
+            commands.append({"command": name, "heavy_modules_loaded": loaded})
+    return {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "ok": (all(r["within_budget"] and not r["heavy_modules_loaded"] for r in results)
+               and not any(c["heavy_modules_loaded"] for c in commands)),
+        "modules": results,
+        "commands": commands,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when pipeline startup exceeds its import-time budget")
+    parser.add_argument("--module", action="append", help="Module to import (repeatable; default pipeline_runner)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Cumulative import time budget per module")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module; the fastest run counts")
+    parser.add_argument("--allow", action="append", help="Heavy module the measured modules may import (repeatable)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to report")
+    parser.add_argument("--output", help="Also write the result as JSON to this file")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    for entry in result["modules"]:
+        if not entry["within_budget"]:
+            print(f"FAIL: import {entry['module']} took {entry['import_ms']}ms (budget {entry['budget_ms']}ms)",
+                  file=sys.stderr)
+        if entry["heavy_modules_loaded"]:
+            print(f"FAIL: import {entry['module']} loaded {', '.join(entry['heavy_modules_loaded'])}", file=sys.stderr)
+    for entry in result["commands"]:
+        if entry["heavy_modules_loaded"]:
+            print(f"FAIL: {entry['command']} loaded {', '.join(entry['heavy_modules_loaded'])}", file=sys.stderr)
+    sys.exit(0 if result["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
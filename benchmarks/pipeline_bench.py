@@ -0,0 +1,448 @@
+#pipeline_bench.py do not change filename do not remove line
+"""
+pipeline_bench.py - Offline benchmark suite for every pipeline stage.
+
+Runs against the saved article dumps (see fixtures.py) and local stand-ins
+only, so results depend on the code and the machine, not on the network:
+
+- normalize: decode a Pocket /v3/get response and build Articles from it
+- enml: render and validate a note per article
+- serialize: JSON dump/load, archive write/read and article store upserts
+- scrape: fetch saved pages from a local HTTP server, statically through the
+  shared pool and with Playwright when a browser is installed
+- end_to_end: full pipeline runs (steps and streaming) against a local
+  Pocket stand-in and the fake NoteStore served over Thrift HTTP
+- schedule: ordering items for scraping (scrape_scheduler.py), with the mean
+  and first completion time it gives on a simulated mix of fast and slow sites
+
+Every run writes a results file (benchmarks/results/<time>_<commit>.json
+unless --output is given) with throughput and latency percentiles per
+benchmark. --compare prints the change against an earlier results file and
+exits 1 when throughput or p95 latency regressed past --threshold.
+
+Usage:
+    python benchmarks/pipeline_bench.py
+    python benchmarks/pipeline_bench.py --only normalize enml --articles 500
+    python benchmarks/pipeline_bench.py --compare benchmarks/results/20250401_120000_abc1234.json
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures  # noqa: E402
+import http_client  # noqa: E402
+import metrics  # noqa: E402
+from article import Article, ContentStore, dump_articles, load_articles  # noqa: E402
+from article_archive import iter_archive, write_archive  # noqa: E402
+from article_store import ArticleStore  # noqa: E402
+
+logger = logging.getLogger("pipeline_bench")
+
+BENCHMARKS = ["normalize", "enml", "serialize", "scrape", "end_to_end", "schedule"]
+RESULTS_DIR = os.path.join(fixtures.REPO_ROOT, "benchmarks", "results")
+
+# Fake Evernote token accepted by fake_notestore
+AUTH_TOKEN = "S=s1:U=1:E=0:C=0:P=1:A=benchmark:V=2:H=0"
+
+
+def percentile(values, pct):
+    """Return the pct percentile (nearest rank) of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(items, run_times, latencies=None, **extra):
+    """Build one benchmark result from per-run wall times and per-item latencies (seconds)."""
+    best = min(run_times)
+    result = {
+        "items": items,
+        "runs": len(run_times),
+        "best_s": round(best, 4),
+        "mean_s": round(sum(run_times) / len(run_times), 4),
+        "items_per_s": round(items / best, 2) if best else None,
+    }
+    if latencies:
+        result["latency_ms"] = {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        }
+    result.update(extra)
+    return result
+
+
+def timed_runs(repeat, items, func):
+    """Call func(item) for every item, repeat times; return (run_times, latencies of the best run)."""
+    run_times = []
+    best_latencies = None
+    for _ in range(repeat):
+        latencies = []
+        started = time.perf_counter()
+        for item in items:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t0)
+        run_times.append(time.perf_counter() - started)
+        if run_times[-1] == min(run_times):
+            best_latencies = latencies
+    return run_times, best_latencies
+
+
+def bench_normalize(args, workdir):
+    from get_pocket import build_article
+
+    items, _ = fixtures.make_pocket_items(args.articles, scrape=False)
+    payload = json.dumps({"status": 1, "list": items})
+    run_times = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = json.loads(payload)
+        articles = [build_article(item_id, item) for item_id, item in result["list"].items()]
+        run_times.append(time.perf_counter() - started)
+    return {"normalize": summarize(len(articles), run_times, response_bytes=len(payload))}
+
+
+def fixture_articles(count, store=None):
+    """Build count scraped Articles from the fixtures."""
+    items, _ = fixtures.make_pocket_items(count)
+    fixture_list = fixtures.load_fixture_articles()
+    articles = []
+    for i, (item_id, item) in enumerate(items.items()):
+        article = Article.from_pocket_item(item_id, item)
+        article.set_content("article", fixtures.article_body(fixture_list[i % len(fixture_list)]), store=store)
+        articles.append(article)
+    return articles
+
+
+def bench_enml(args, workdir):
+    from evernote_poster import build_note_from_article
+
+    articles = fixture_articles(args.articles)
+    run_times, latencies = timed_runs(args.repeat, articles, lambda a: build_note_from_article(a, "notebook-guid"))
+    enml_bytes = sum(len(build_note_from_article(a, "notebook-guid").content) for a in articles)
+    return {"enml": summarize(len(articles), run_times, latencies, enml_bytes=enml_bytes)}
+
+
+def bench_serialize(args, workdir):
+    articles = fixture_articles(args.articles)
+    results = {}
+    json_path = os.path.join(workdir, "articles.json")
+    archive_path = os.path.join(workdir, "articles.jsonl.gz")
+
+    def run(name, func, **extra):
+        run_times = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            func()
+            run_times.append(time.perf_counter() - started)
+        results[f"serialize.{name}"] = summarize(len(articles), run_times, **extra)
+
+    def json_dump():
+        with open(json_path, 'w', encoding='utf-8') as f:
+            dump_articles(articles, f)
+
+    def store_upsert():
+        path = os.path.join(workdir, "store.sqlite")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        store = ArticleStore(path)
+        try:
+            store.upsert(articles)
+        finally:
+            store.close()
+
+    run("json_dump", json_dump)
+    run("json_load", lambda: load_articles(json_path), bytes=os.path.getsize(json_path))
+    run("archive_write", lambda: write_archive(articles, archive_path))
+    run("archive_read", lambda: sum(1 for _ in iter_archive(archive_path)), bytes=os.path.getsize(archive_path))
+    run("json_dumps_memory", lambda: dump_articles(articles, io.StringIO()))
+    run("store_upsert", store_upsert)
+    return results
+
+
+def playwright_ready():
+    """Return None if a Playwright browser can be launched here, else the reason it cannot."""
+    import get_pocket
+    scraper = get_pocket.load_scraper()
+    if scraper is None or not scraper.playwright_available:
+        return "Playwright is not installed"
+    try:
+        scraper.get_browser()
+    except Exception as e:
+        return f"Playwright browser unavailable: {str(e).splitlines()[0]}"
+    return None
+
+
+def bench_scrape(args, workdir):
+    import get_pocket
+
+    count = min(args.articles, args.scrape_pages)
+    # Pages are added once the server's address (part of every URL) is known
+    pages = {}
+    server = fixtures.serve_pages(pages, latency=args.page_latency)
+    results = {}
+    try:
+        pages.update(fixtures.make_pocket_items(count, server.url)[1])
+        urls = [server.url + path for path in pages]
+
+        run_times, latencies = timed_runs(args.repeat, urls, lambda url: http_client.get(url).text)
+        results["scrape.static_fetch"] = summarize(len(urls), run_times, latencies, http=http_client.get_stats())
+
+        reason = playwright_ready()
+        if reason:
+            results["scrape.playwright"] = {"skipped": reason}
+        else:
+            scraped = []
+            run_times, latencies = timed_runs(
+                1, urls, lambda url: scraped.append(get_pocket.scrape_article_content(url))
+            )
+            results["scrape.playwright"] = summarize(
+                len(urls), run_times, latencies, succeeded=sum(1 for content in scraped if content)
+            )
+    finally:
+        server.shutdown()
+        get_pocket.close_scraper()
+    return results
+
+
+def run_end_to_end(args, workdir, stream, scrape):
+    import evernote_session
+    import get_pocket
+    import pipeline_runner
+    import scrape_scheduler
+    from fake_notestore import FakeNoteStore, serve
+
+    run_dir = tempfile.mkdtemp(prefix="e2e_", dir=workdir)
+    pages = {}
+    page_server = fixtures.serve_pages(pages, latency=args.page_latency)
+    items, built = fixtures.make_pocket_items(args.articles, page_server.url, scrape=scrape)
+    pages.update(built)
+    pocket_server = fixtures.serve_pocket(items, latency=args.pocket_latency)
+    store = FakeNoteStore(latency=args.evernote_latency, seed=1)
+    note_server = serve(store)
+
+    config = {
+        "pocket": {"consumer_key": "benchmark", "access_token": "benchmark", "hours_lookback": 24,
+                   "api_url": pocket_server.url},
+        "evernote": {
+            "enabled": True,
+            "auth_token": AUTH_TOKEN,
+            "notebook_name": "Benchmark",
+            "service_url": f"http://127.0.0.1:{note_server.server_address[1]}",
+            "index_path": os.path.join(run_dir, "index.sqlite"),
+            "url_cache": os.path.join(run_dir, "urls.json"),
+            "rate_limit": {"rate": 50.0, "burst": 10, "max_rate": 100.0},
+        },
+        "output": {"json_folder": run_dir, "spool_dir": os.path.join(run_dir, "content")},
+        "ledger": {"path": os.path.join(run_dir, "ledger.sqlite")},
+        "stream": {"enabled": stream},
+        "metrics": {"summary_path": None},
+        "scrape_schedule": {"history_path": None},
+    }
+    config_path = os.path.join(run_dir, "config.json")
+    with open(config_path, 'w') as f:
+        json.dump(config, f)
+
+    get_pocket.configure(config)
+    metrics.configure(config)
+    scrape_scheduler.configure(config)
+    # The fixtures' time_added values are old; look back far enough to include them
+    hours = int((time.time() - fixtures.BASE_TIME) / 3600) + 24
+    before = metrics.snapshot()
+    started = time.perf_counter()
+    try:
+        success = pipeline_runner.run_pipeline_once(
+            config, config_path, hours, False, True, ContentStore(os.path.join(run_dir, "content"))
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        get_pocket.close_scraper()
+        pocket_server.shutdown()
+        page_server.shutdown()
+        note_server.shutdown()
+        get_pocket.configure(None)
+        evernote_session.configure(None)
+        scrape_scheduler.configure(None)
+    run = metrics.summarize(before)
+    stats = store.stats()
+    return elapsed, {
+        "success": success,
+        "notes": stats["calls"].get("createNote", 0),
+        "api_calls": sum(stats["calls"].values()),
+        "pocket_requests": pocket_server.requests,
+        "pages_served": page_server.requests,
+        "first_note_s": run["gauges"].get("first_note_seconds") if stream else None,
+        "scrapes": {k: v for k, v in run["counters"].items() if k.startswith("scrapes_total")},
+    }
+
+
+def bench_end_to_end(args, workdir):
+    scrape = args.e2e_scrape and playwright_ready() is None
+    results = {}
+    for stream in (False, True):
+        run_times = []
+        details = None
+        for _ in range(args.repeat):
+            elapsed, details = run_end_to_end(args, workdir, stream, scrape)
+            run_times.append(elapsed)
+        name = "end_to_end.stream" if stream else "end_to_end.steps"
+        results[name] = summarize(args.articles, run_times, scraped=scrape, **details)
+    return results
+
+
+def bench_schedule(args, workdir):
+    import scrape_scheduler
+
+    items, _ = fixtures.make_pocket_items(args.articles, scrape=False)
+    # Simulated sites: one domain in five is a slow single-page app, the rest are static pages
+    costs = {}
+    for i, item in enumerate(items.values()):
+        site = f"site{i % 25}.example"
+        costs[site] = 12.0 if i % 25 % 5 == 0 else 0.4 + (i % 25) * 0.05
+        item["resolved_url"] = item["given_url"] = f"https://{site}/article/{i}"
+        item["excerpt"] = ""
+    entries = list(items.items())
+
+    def completions(order):
+        elapsed, done = 0.0, []
+        for _, item in order:
+            elapsed += costs[scrape_scheduler.domain(item["resolved_url"])]
+            done.append(elapsed)
+        return done
+
+    scrape_scheduler.configure({"scrape_schedule": {"history_path": None}})
+    try:
+        # One earlier scrape per site, as a previous run would have recorded
+        for site, cost in costs.items():
+            scrape_scheduler.record(f"https://{site}/", cost)
+        run_times = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            ordered = scrape_scheduler.order(entries)
+            run_times.append(time.perf_counter() - started)
+    finally:
+        scrape_scheduler.configure(None)
+    pocket_order, scheduled = completions(entries), completions(ordered)
+    return {"schedule": summarize(
+        len(entries), run_times,
+        simulated={
+            "pocket_order_mean_s": round(sum(pocket_order) / len(pocket_order), 2),
+            "scheduled_mean_s": round(sum(scheduled) / len(scheduled), 2),
+            "pocket_order_first_s": round(pocket_order[0], 2),
+            "scheduled_first_s": round(scheduled[0], 2),
+        },
+    )}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=fixtures.REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Print the change of every benchmark against a baseline results file.
+
+    Returns:
+        List of regression descriptions (empty when nothing regressed past threshold)
+    """
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('git_commit')} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'benchmark':32} {'items/s':>12} {'change':>8} {'p95 ms':>10} {'change':>8}")
+    for name, result in current["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if not old or "items_per_s" not in result or "items_per_s" not in old:
+            continue
+        rate, old_rate = result["items_per_s"], old["items_per_s"]
+        rate_change = (rate - old_rate) / old_rate if old_rate else 0.0
+        p95 = result.get("latency_ms", {}).get("p95")
+        old_p95 = old.get("latency_ms", {}).get("p95")
+        p95_change = (p95 - old_p95) / old_p95 if p95 is not None and old_p95 else None
+        print(f"{name:32} {rate:>12.1f} {rate_change:>+8.1%} "
+              f"{p95 if p95 is not None else '-':>10} {format(p95_change, '+.1%') if p95_change is not None else '-':>8}")
+        if rate_change < -threshold:
+            regressions.append(f"{name}: throughput {rate_change:+.1%}")
+        if p95_change is not None and p95_change > threshold:
+            regressions.append(f"{name}: p95 latency {p95_change:+.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for every pipeline stage")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Benchmarks to run (default: all)")
+    parser.add_argument("--articles", type=int, default=200, help="Articles per benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is reported")
+    parser.add_argument("--scrape-pages", type=int, default=10, help="Pages for the scrape benchmark")
+    parser.add_argument("--page-latency", type=float, default=0.0, help="Seconds the page server waits per page")
+    parser.add_argument("--pocket-latency", type=float, default=0.05, help="Seconds the Pocket stand-in waits per call")
+    parser.add_argument("--evernote-latency", type=float, default=0.01, help="Seconds the fake NoteStore waits per call")
+    parser.add_argument("--e2e-scrape", action="store_true",
+                        help="Scrape short-excerpt items in end-to-end runs (needs a Playwright browser)")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<time>_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's info logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    workdir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    commit = git_commit()
+    current = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "args": vars(args),
+        },
+        "benchmarks": {},
+    }
+    try:
+        for name in args.only or BENCHMARKS:
+            logger.warning(f"Running {name}")
+            current["benchmarks"].update(globals()[f"bench_{name}"](args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(json.dumps(current["benchmarks"], indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
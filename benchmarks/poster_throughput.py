@@ -0,0 +1,151 @@
+#poster_throughput.py do not change filename do not remove line
+"""
+poster_throughput.py - Throughput benchmark for post_to_evernote against the fake NoteStore.
+
+Posts synthetic articles into a FakeNoteStore (in-process, or over Thrift HTTP
+with --server) and reports notes per second, API calls and rate limits hit.
+Runs are repeated until every article is posted, so rate-limit deferrals and
+injected errors show up as extra rounds and elapsed time.
+
+Usage:
+    python benchmarks/poster_throughput.py --articles 500 --latency 0.05 --workers 4
+    python benchmarks/poster_throughput.py --rate-limit 100 --rate-limit-window 5 --server
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import evernote_session  # noqa: E402
+import http_client  # noqa: E402
+from article import Article  # noqa: E402
+from evernote_poster import post_to_evernote  # noqa: E402
+from fake_notestore import FakeNoteStore, serve  # noqa: E402
+from sync_index import SyncIndex  # noqa: E402
+
+logger = logging.getLogger("poster_throughput")
+
+
+def make_articles(count, body_size=2000):
+    """Build synthetic scraped articles with distinct URLs and a few shared tags."""
+    articles = []
+    for i in range(count):
+        article = Article.from_pocket_item(str(i), {
+            "resolved_title": f"Benchmark article {i}",
+            "resolved_url": f"https://example.com/articles/{i}",
+            "excerpt": f"Excerpt of benchmark article {i}",
+            "time_added": str(1700000000 + i),
+            "word_count": body_size // 6,
+            "tags": {f"tag{i % 5}": {}},
+        })
+        article.set_content("article", ("Lorem ipsum dolor sit amet. " * (body_size // 28 + 1))[:body_size])
+        articles.append(article)
+    return articles
+
+
+def run_benchmark(args):
+    workdir = tempfile.mkdtemp(prefix="poster_bench_")
+    store = FakeNoteStore(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        seed=args.seed,
+    )
+    evernote_config = {
+        "enabled": True,
+        "auth_token": "S=s1:U=1:E=0:C=0:P=1:A=benchmark:V=2:H=0",
+        "notebook_name": "Benchmark",
+        "index_path": os.path.join(workdir, "index.sqlite"),
+        "url_cache": os.path.join(workdir, "urls.json"),
+        "workers": args.workers,
+        "rate_limit": {"rate": args.rate, "burst": args.burst, "max_rate": args.max_rate},
+    }
+    server = None
+    if args.server:
+        server = serve(store)
+        evernote_config["service_url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    else:
+        evernote_session.set_note_store_factory(lambda auth_token, sandbox: store)
+
+    config_path = os.path.join(workdir, "config.json")
+    with open(config_path, 'w') as f:
+        json.dump({"evernote": evernote_config}, f)
+
+    articles = make_articles(args.articles, args.body_size)
+    index = SyncIndex(evernote_config["index_path"])
+    rounds = 0
+    started = time.monotonic()
+    try:
+        while index.count() < len(articles) and time.monotonic() - started < args.timeout:
+            if rounds:
+                time.sleep(args.poll)
+            post_to_evernote(articles, config_path)
+            rounds += 1
+        elapsed = time.monotonic() - started
+    finally:
+        posted = index.count()
+        index.close()
+        if server is not None:
+            server.shutdown()
+        evernote_session.set_note_store_factory(None)
+
+    stats = store.stats()
+    result = {
+        "articles": len(articles),
+        "posted": posted,
+        "rounds": rounds,
+        "elapsed_s": round(elapsed, 3),
+        "notes_per_s": round(posted / elapsed, 2) if elapsed else None,
+        "api_calls": sum(stats["calls"].values()),
+        "calls": stats["calls"],
+        "injected_errors": stats["errors"],
+        "rate_limited": stats["rate_limited"],
+        "mode": "server" if args.server else "in-process",
+        "workers": args.workers,
+        "latency": args.latency,
+    }
+    if args.server:
+        result["http"] = http_client.get_stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark post_to_evernote against a fake NoteStore")
+    parser.add_argument("--articles", type=int, default=200, help="Number of synthetic articles")
+    parser.add_argument("--body-size", type=int, default=2000, help="Characters of body text per article")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent poster workers")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per fake API call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected write failure")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Calls per window before RATE_LIMIT_REACHED (0 = off)")
+    parser.add_argument("--rate-limit-window", type=float, default=60, help="Rate-limit window in seconds")
+    parser.add_argument("--rate", type=float, default=50.0, help="Initial poster rate in calls/s")
+    parser.add_argument("--burst", type=int, default=10, help="Poster token bucket size")
+    parser.add_argument("--max-rate", type=float, default=100.0, help="Upper bound for the poster rate")
+    parser.add_argument("--server", action="store_true", help="Serve the fake over Thrift HTTP instead of in-process")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between runs while notes are deferred")
+    parser.add_argument("--timeout", type=float, default=600, help="Give up after this many seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for jitter and error injection")
+    parser.add_argument("--output", help="Also write the result as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the poster's info logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    result = run_benchmark(args)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#enml.py do not change filename do not remove line
+"""
+enml.py - ENML rendering and local validation for Evernote notes.
+
+Notes are rendered in a single pass into a list of fragments, with every
+piece of article data escaped on the way in. The result is validated locally
+against the ENML rules (allowed elements and attributes, content model of
+inline elements, size and title limits) so that a note Evernote would reject
+never costs an API call.
+"""
+import html
+import re
+import xml.etree.ElementTree as ET
+
+ENML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<!DOCTYPE en-note SYSTEM "http://xml.evernote.com/pub/enml2.dtd">'
+)
+
+# Limits from the EDAM Limits constants
+NOTE_CONTENT_LEN_MAX = 5242880
+NOTE_TITLE_LEN_MAX = 255
+TAG_NAME_LEN_MAX = 100
+
+# Elements permitted by the ENML 2 DTD
+ALLOWED_ELEMENTS = frozenset((
+    "en-note", "en-media", "en-crypt", "en-todo",
+    "a", "abbr", "acronym", "address", "area", "b", "bdo", "big", "blockquote", "br",
+    "caption", "center", "cite", "code", "col", "colgroup", "dd", "del", "dfn", "div",
+    "dl", "dt", "em", "font", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "img",
+    "ins", "kbd", "li", "map", "ol", "p", "pre", "q", "s", "samp", "small", "span",
+    "strike", "strong", "sub", "sup", "table", "tbody", "td", "tfoot", "th", "thead",
+    "title", "tr", "tt", "u", "ul", "var", "xmp",
+))
+
+# Attributes every element may carry, plus per-element extras
+CORE_ATTRIBUTES = frozenset(("style", "title", "lang", "xml:lang", "dir"))
+ELEMENT_ATTRIBUTES = {
+    "en-note": {"bgcolor", "text", "xmlns"},
+    "en-media": {"type", "hash", "height", "width", "usemap", "align", "border", "hspace", "vspace", "longdesc", "alt"},
+    "en-crypt": {"hint", "cipher", "length"},
+    "en-todo": {"checked"},
+    "a": {"charset", "type", "name", "href", "hreflang", "rel", "rev", "shape", "coords", "target"},
+    "img": {"src", "alt", "name", "longdesc", "height", "width", "usemap", "ismap", "align", "border", "hspace", "vspace"},
+    "font": {"size", "color", "face"},
+    "table": {"summary", "width", "border", "frame", "rules", "cellspacing", "cellpadding", "align", "bgcolor"},
+    "td": {"abbr", "axis", "headers", "scope", "rowspan", "colspan", "align", "char", "charoff", "valign", "nowrap", "bgcolor", "width", "height"},
+    "th": {"abbr", "axis", "headers", "scope", "rowspan", "colspan", "align", "char", "charoff", "valign", "nowrap", "bgcolor", "width", "height"},
+    "tr": {"align", "char", "charoff", "valign", "bgcolor"},
+    "ol": {"type", "compact", "start"},
+    "ul": {"type", "compact"},
+    "li": {"type", "value"},
+    "hr": {"align", "noshade", "size", "width"},
+    "br": {"clear"},
+    "q": {"cite"},
+    "blockquote": {"cite"},
+    "del": {"cite", "datetime"},
+    "ins": {"cite", "datetime"},
+    "pre": {"width", "xml:space"},
+}
+BLOCK_ALIGN_ELEMENTS = ("div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "caption", "thead", "tbody", "tfoot", "col", "colgroup")
+
+# Inline elements may not contain block-level elements
+INLINE_ELEMENTS = frozenset(("a", "abbr", "acronym", "b", "bdo", "big", "cite", "code", "dfn", "em", "font",
+                             "i", "kbd", "q", "s", "samp", "small", "span", "strike", "strong", "sub", "sup",
+                             "tt", "u", "var"))
+BLOCK_ELEMENTS = frozenset(("address", "blockquote", "center", "div", "dl", "h1", "h2", "h3", "h4", "h5", "h6",
+                            "hr", "ol", "p", "pre", "table", "ul", "xmp"))
+
+ALLOWED_URL_SCHEMES = ("http://", "https://", "evernote:///", "mailto:", "file://")
+
+# Characters that are not allowed anywhere in an XML 1.0 document
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_TITLE_WHITESPACE = re.compile(r"[\s\x00-\x1f\x7f]+")
+_TITLE_CONTROL_CHARS = re.compile("[\x00-\x1f\x7f\u2028\u2029]")
+
+
+class ENMLError(ValueError):
+    """Raised when a rendered note would be rejected by Evernote."""
+
+
+def escape_text(text):
+    """Escape text content for ENML, dropping characters XML cannot carry."""
+    return html.escape(_INVALID_XML_CHARS.sub("", str(text)), quote=False)
+
+
+def escape_attr(value):
+    """Escape an attribute value for ENML."""
+    return html.escape(_INVALID_XML_CHARS.sub("", str(value)), quote=True)
+
+
+def safe_url(url):
+    """Return the URL if its scheme may be linked from ENML, else an empty string."""
+    url = (url or "").strip()
+    return url if url.lower().startswith(ALLOWED_URL_SCHEMES) else ""
+
+
+def clean_title(title, default="Untitled Article"):
+    """Normalize a note title to Evernote's title rules (no control characters,
+    no leading/trailing whitespace, 1-255 characters)."""
+    title = _TITLE_WHITESPACE.sub(" ", str(title or "")).strip()
+    if len(title) > NOTE_TITLE_LEN_MAX:
+        title = title[:NOTE_TITLE_LEN_MAX - 3].rstrip() + "..."
+    return title or default
+
+
+def clean_tag_name(name):
+    """Normalize a Pocket tag to Evernote's tag name rules (no commas or control
+    characters, no leading/trailing whitespace, 1-100 characters).
+
+    Returns:
+        The cleaned name, or None if nothing usable is left
+    """
+    name = _TITLE_WHITESPACE.sub(" ", str(name or "").replace(",", " ")).strip()
+    return name[:TAG_NAME_LEN_MAX].rstrip() or None
+
+
+def _link(parts, url, text):
+    """Append an anchor, or plain text when the URL cannot be linked."""
+    href = safe_url(url)
+    if href:
+        parts.append(f'<a href="{escape_attr(href)}">{escape_text(text)}</a>')
+    else:
+        parts.append(escape_text(text))
+
+
+def _render_body(parts, article):
+    """Append the ENML body of one article (excerpt, content, links, timestamp)."""
+    url = article.get('url', '') or ''
+
+    # Tags are attached as native Evernote tags (tagGuids), not rendered
+
+    # Add article excerpt
+    excerpt = article.get('excerpt')
+    if excerpt:
+        parts.append('<div style="font-style: italic; margin-bottom: 10px;">')
+        parts.append(escape_text(excerpt))
+        parts.append('</div>')
+
+    parts.append('<hr/>')
+
+    # Add content based on type
+    content = article.get('content', {}) or {}
+    content_type = content.get('type', 'unknown')
+
+    if content_type == 'youtube':
+        video_id = content.get('video_id', '') or ''
+        parts.append('<h3>')
+        _link(parts, url, "YouTube Video")
+        parts.append('</h3>')
+        parts.append(f'<div>Video ID: {escape_text(video_id)}</div>')
+        thumbnail = escape_attr(f"https://img.youtube.com/vi/{video_id}/0.jpg")
+        parts.append('<div>')
+        href = safe_url(url)
+        if href:
+            parts.append(f'<a href="{escape_attr(href)}"><img src="{thumbnail}" alt="YouTube Thumbnail"/></a>')
+        else:
+            parts.append(f'<img src="{thumbnail}" alt="YouTube Thumbnail"/>')
+        parts.append('</div>')
+
+    elif content_type == 'article':
+        parts.append('<div>')
+        parts.append(escape_text(content.get('content', '') or ''))
+        parts.append('</div>')
+
+    else:
+        parts.append('<div>')
+        _link(parts, url, "View Original Content")
+        parts.append('</div>')
+
+    # Add original link
+    parts.append('<div style="margin-top: 20px;">')
+    _link(parts, url, "View Original")
+    parts.append('</div>')
+
+    # Add timestamp (only a known one, so re-rendering an unchanged article is byte-identical)
+    timestamp = article.get('time_added')
+    if timestamp:
+        parts.append(f'<div style="font-size: small; margin-top: 10px;">Added to Pocket: {escape_text(timestamp)}</div>')
+
+
+def render_article(article):
+    """Render a Pocket article (Article record or dictionary) as an ENML document.
+
+    Returns:
+        ENML string
+    """
+    parts = [ENML_HEADER, '<en-note>']
+    _render_body(parts, article)
+    parts.append('</en-note>')
+    return "".join(parts)
+
+
+def render_digest(articles):
+    """Render several articles as one ENML digest: a table of contents
+    followed by one numbered section per article.
+
+    Returns:
+        ENML string
+    """
+    parts = [ENML_HEADER, '<en-note>', '<h2>Contents</h2>', '<ol>']
+    for article in articles:
+        parts.append('<li>')
+        _link(parts, article.get('url'), clean_title(article.get('title')))
+        parts.append('</li>')
+    parts.append('</ol>')
+
+    for number, article in enumerate(articles, 1):
+        parts.append('<hr/>')
+        parts.append(f'<h2>{number}. {escape_text(clean_title(article.get("title")))}</h2>')
+        _render_body(parts, article)
+
+    parts.append('</en-note>')
+    return "".join(parts)
+
+
+def _allowed_attributes(tag):
+    allowed = CORE_ATTRIBUTES | ELEMENT_ATTRIBUTES.get(tag, frozenset())
+    if tag in BLOCK_ALIGN_ELEMENTS:
+        allowed = allowed | {"align"}
+    return allowed
+
+
+def _check_element(element, inside_inline):
+    tag = element.tag
+    if tag not in ALLOWED_ELEMENTS:
+        raise ENMLError(f"Element <{tag}> is not allowed in ENML")
+    if tag == "en-note" and inside_inline is not None:
+        raise ENMLError("<en-note> may only appear as the root element")
+    if inside_inline and tag in BLOCK_ELEMENTS:
+        raise ENMLError(f"Block element <{tag}> may not appear inside inline element <{inside_inline}>")
+
+    allowed = _allowed_attributes(tag)
+    for name, value in element.attrib.items():
+        name = name.replace("{http://www.w3.org/XML/1998/namespace}", "xml:")
+        if name not in allowed:
+            raise ENMLError(f"Attribute '{name}' is not allowed on <{tag}>")
+        if name == "href" and not safe_url(value):
+            raise ENMLError(f"Link target '{value[:80]}' uses a scheme ENML does not allow")
+
+    child_inline = tag if tag in INLINE_ELEMENTS else (inside_inline or "")
+    for child in element:
+        _check_element(child, child_inline)
+
+
+def validate_enml(content):
+    """Validate an ENML document locally.
+
+    Checks well-formedness, the root element, allowed elements and attributes,
+    that inline elements contain no block elements, and the content size limit.
+
+    Raises:
+        ENMLError: If Evernote would reject the document
+    """
+    encoded = content.encode("utf-8")
+    if len(encoded) > NOTE_CONTENT_LEN_MAX:
+        raise ENMLError(f"Note content is {len(encoded)} bytes, over the {NOTE_CONTENT_LEN_MAX} byte limit")
+    try:
+        root = ET.fromstring(encoded)
+    except ET.ParseError as e:
+        raise ENMLError(f"Note content is not well-formed XML: {e}")
+    if root.tag != "en-note":
+        raise ENMLError(f"Root element must be <en-note>, not <{root.tag}>")
+    _check_element(root, None)
+
+
+def validate_title(title):
+    """Raise ENMLError if the title breaks Evernote's title rules."""
+    if not title or len(title) > NOTE_TITLE_LEN_MAX:
+        raise ENMLError(f"Note title must be 1-{NOTE_TITLE_LEN_MAX} characters")
+    if title != title.strip() or _TITLE_CONTROL_CHARS.search(title):
+        raise ENMLError("Note title may not contain control characters or leading/trailing whitespace")
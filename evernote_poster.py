@@ -3,27 +3,55 @@ import json
 import logging
 import os
 import time
-import hashlib
 import argparse
+import threading
 import inspect  # Import the inspect module for the fix
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Import Evernote SDK (evernote3 package)
-from evernote.api.client import EvernoteClient
 from evernote.edam.type import ttypes as Types
 from evernote.edam.error.ttypes import EDAMUserException, EDAMSystemException, EDAMNotFoundException
+from evernote.edam.notestore.ttypes import NoteFilter, NotesMetadataResultSpec, SyncChunkFilter
+from thrift.transport.TTransport import TTransportException
+
+from article_archive import iter_articles_file
+import evernote_session
+import metrics
+import profiling
+from enml import ENMLError, clean_tag_name, clean_title, render_article, render_digest, validate_enml, validate_title
+from outbox import Outbox
+from rate_limiter import AdaptiveRateLimiter
+from sync_index import DEFAULT_INDEX_PATH, SyncIndex, article_key, content_hash, url_hash
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("evernote_poster")
 
+# Number of notes created concurrently
+DEFAULT_WORKERS = 2
+
+# Entries requested per getFilteredSyncChunk call
+SYNC_CHUNK_ENTRIES = 250
+
+# Articles per digest note in digest mode (evernote.digest.batch_size)
+DEFAULT_DIGEST_BATCH_SIZE = 10
+
+# Articles read from a file and posted per batch
+FILE_BATCH_SIZE = 100
+
 # FIX: Add compatibility for getargspec
 if not hasattr(inspect, 'getargspec'):
     inspect.getargspec = inspect.getfullargspec
 
 
-def load_config(config_path="pipeline_config.json"):
-    """Load pipeline configuration from JSON file."""
+def load_config(config_path="pipeline_config.json", config=None):
+    """Load pipeline configuration from JSON file.
+    
+    An already loaded configuration (such as one account of a multi-account
+    config, see accounts.py) is returned as it is instead.
+    """
+    if config is not None:
+        return config
     try:
         if os.path.exists(config_path):
             with open(config_path, 'r') as f:
@@ -37,17 +65,22 @@ def load_config(config_path="pipeline_config.json"):
 
 
 def get_note_store(auth_token, sandbox=False):
-    """Initialize Evernote client and get note store."""
+    """Get this thread's persistent note store session (cached URL, pooled connection)."""
     try:
-        client = EvernoteClient(token=auth_token, sandbox=sandbox)
-        return client.get_note_store()
+        return evernote_session.get_note_store(auth_token, sandbox)
     except Exception as e:
         logger.error(f"Error connecting to Evernote: {str(e)}")
         return None
 
 
-def find_or_create_notebook(note_store, notebook_name):
-    """Find the specified notebook or create it if it doesn't exist."""
+def find_or_create_notebook(note_store, notebook_name, usns=None):
+    """Find the specified notebook or create it if it doesn't exist.
+    
+    Args:
+        note_store: Evernote NoteStore client
+        notebook_name: Name of the notebook
+        usns: Optional set that collects the update sequence number of a created notebook
+    """
     try:
         notebooks = note_store.listNotebooks()
         for notebook in notebooks:
@@ -60,6 +93,8 @@ def find_or_create_notebook(note_store, notebook_name):
         new_notebook = Types.Notebook()
         new_notebook.name = notebook_name
         created_notebook = note_store.createNotebook(new_notebook)
+        if usns is not None and created_notebook.updateSequenceNum:
+            usns.add(created_notebook.updateSequenceNum)
         return created_notebook
     
     except Exception as e:
@@ -67,177 +102,1032 @@ def find_or_create_notebook(note_store, notebook_name):
         return None
 
 
-def create_note_from_article(note_store, article, notebook_guid):
-    """Create a new note in Evernote from a Pocket article."""
-    try:
-        # Create a unique note title with date prefix
-        title = article.get('title', 'Untitled Article')
-        
-        # Generate a hash of the URL to use as a unique identifier
-        url = article.get('url', '')
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        
-        # Skip duplicate check due to API compatibility issues
-        # This is a temporary workaround until the NoteFilter issue is resolved
-        logger.info(f"Skipping duplicate check for URL: {url}")
-        existing_notes_count = 0
-        
-        # Skip duplicate checking due to API compatibility issues
-        if existing_notes_count > 0:
-            logger.info(f"Note already exists for: {title}")
-            return None
-        
-        # Create a new note
-        note = Types.Note()
-        note.title = title
-        note.notebookGuid = notebook_guid
-        
-        # Set source URL 
-        note.attributes = Types.NoteAttributes()
-        note.attributes.sourceURL = url
-        
-        # Create note content
-        content_html = '<?xml version="1.0" encoding="UTF-8"?>'
-        content_html += '<!DOCTYPE en-note SYSTEM "http://xml.evernote.com/pub/enml2.dtd">'
-        content_html += '<en-note>'
-        
-        # Add tags as colored labels
-        if article.get('tags'):
-            content_html += '<div style="margin-bottom: 10px;">'
-            for tag in article.get('tags', []):
-                content_html += f'<span style="background-color: #E0E0E0; padding: 2px 5px; margin-right: 5px; border-radius: 3px;">{tag}</span>'
-            content_html += '</div>'
-        
-        # Add article excerpt
-        if article.get('excerpt'):
-            content_html += f'<div style="font-style: italic; margin-bottom: 10px;">{article.get("excerpt")}</div>'
-        
-        # Add divider
-        content_html += '<hr/>'
-        
-        # Add content based on type
-        content = article.get('content', {})
-        content_type = content.get('type', 'unknown')
-        
-        if content_type == 'youtube':
-            video_id = content.get('video_id', '')
-            content_html += f'<div><a href="{url}"><h3>YouTube Video</h3></a></div>'
-            content_html += f'<div>Video ID: {video_id}</div>'
-            content_html += f'<div><a href="{url}"><img src="https://img.youtube.com/vi/{video_id}/0.jpg" alt="YouTube Thumbnail" /></a></div>'
-        
-        elif content_type == 'article':
-            article_content = content.get('content', '')
-            # Clean content to fit within ENML restrictions
-            article_content = article_content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            content_html += f'<div>{article_content}</div>'
+def get_notebook_guid(note_store, index, notebook_name, refresh=False, usns=None):
+    """Return the notebook GUID, using the GUID cache in the SyncIndex.
+    
+    A cached GUID is trusted without an API call; callers pass refresh=True
+    after Evernote reports it as not found. usns collects the update sequence
+    number of a notebook created here (see find_or_create_notebook).
+    
+    Returns:
+        Notebook GUID, or None if the notebook could not be found or created
+    """
+    if refresh:
+        index.drop_guids("notebook", [notebook_name])
+    else:
+        guid = index.get_guid("notebook", notebook_name)
+        if guid:
+            return guid
+    
+    notebook = find_or_create_notebook(note_store, notebook_name, usns)
+    if not notebook:
+        return None
+    index.set_guid("notebook", notebook_name, notebook.guid)
+    return notebook.guid
+
+
+def resolve_tag_guids(note_store, index, tag_names, usns=None):
+    """Map Pocket tag names to Evernote tag GUIDs, creating missing tags.
+    
+    Cached GUIDs cost nothing. All cache misses of a batch are resolved with a
+    single listTags call, and only tags that still do not exist are created.
+    
+    Args:
+        note_store: Evernote NoteStore client
+        index: SyncIndex holding the GUID cache
+        tag_names: Iterable of tag names (cleaned to Evernote's rules here)
+        usns: Optional set that collects the update sequence numbers of created tags
         
+    Returns:
+        Dictionary mapping lowercased tag name to tag GUID
+    """
+    names = {}
+    for tag_name in tag_names:
+        name = clean_tag_name(tag_name)
+        if name:
+            names.setdefault(name.lower(), name)
+    
+    guids = {}
+    missing = []
+    for key, name in names.items():
+        guid = index.get_guid("tag", name)
+        if guid:
+            guids[key] = guid
         else:
-            content_html += f'<div><a href="{url}">View Original Content</a></div>'
-        
-        # Add original link
-        content_html += f'<div style="margin-top: 20px;"><a href="{url}">View Original</a></div>'
-        
-        # Add timestamp
-        timestamp = article.get('time_added', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        content_html += f'<div style="font-size: small; margin-top: 10px;">Added to Pocket: {timestamp}</div>'
-        
-        content_html += '</en-note>'
-        
-        note.content = content_html
+            missing.append(name)
+    if not missing:
+        return guids
+    
+    existing = {tag.name: tag.guid for tag in note_store.listTags()}
+    index.set_guids("tag", existing)
+    existing = {name.lower(): guid for name, guid in existing.items()}
+    
+    created = {}
+    for name in missing:
+        guid = existing.get(name.lower())
+        if not guid:
+            tag = Types.Tag()
+            tag.name = name
+            try:
+                created_tag = note_store.createTag(tag)
+            except (EDAMUserException, EDAMSystemException) as e:
+                logger.error(f"Error creating tag '{name}': {getattr(e, 'errorCode', e)}")
+                continue
+            guid = created_tag.guid
+            if usns is not None and created_tag.updateSequenceNum:
+                usns.add(created_tag.updateSequenceNum)
+            created[name] = guid
+        guids[name.lower()] = guid
+    if created:
+        index.set_guids("tag", created)
+        logger.info(f"Created {len(created)} Evernote tags")
+    return guids
+
+
+def article_tag_guids(article, tag_guids):
+    """Return the tag GUIDs of an article given a resolved name->GUID map."""
+    guids = []
+    for tag_name in article.get('tags') or []:
+        name = clean_tag_name(tag_name)
+        guid = tag_guids.get(name.lower()) if name else None
+        if guid and guid not in guids:
+            guids.append(guid)
+    return guids
+
+
+def build_note_from_article(article, notebook_guid, tag_guids=None):
+    """Render a Pocket article into an unsaved Evernote note.
+    
+    The article may be an Article record or an article dictionary; a spooled
+    Article body is only loaded from disk here, while the note is rendered.
+    The ENML is validated locally, so a note Evernote would reject never
+    reaches the API. Pocket tags are attached as native tags via tag_guids.
+    
+    Raises:
+        ENMLError: If the rendered note breaks ENML rules
+    """
+    # Duplicates are filtered out by post_to_evernote through the local SyncIndex
+    title = clean_title(article.get('title', 'Untitled Article'))
+    url = article.get('url', '')
+    
+    content = render_article(article)
+    validate_title(title)
+    validate_enml(content)
+    
+    # Create a new note
+    note = Types.Note()
+    note.title = title
+    note.notebookGuid = notebook_guid
+    note.content = content
+    if tag_guids:
+        note.tagGuids = list(tag_guids)
+    
+    # Set source URL 
+    note.attributes = Types.NoteAttributes()
+    note.attributes.sourceURL = url
+    return note
+
+
+def digest_title(articles):
+    """Title of a digest note: the day (or range of days) its articles were added."""
+    days = sorted({(article.get('time_added') or '')[:10] for article in articles} - {''})
+    count = f"{len(articles)} article{'' if len(articles) == 1 else 's'}"
+    if not days:
+        return f"Pocket digest ({count})"
+    span = days[0] if len(days) == 1 else f"{days[0]} to {days[-1]}"
+    return f"Pocket digest {span} ({count})"
+
+
+def build_digest_note(articles, notebook_guid, tag_guids=None):
+    """Render several articles into one unsaved digest note with a table of contents.
+    
+    Raises:
+        ENMLError: If the rendered digest breaks ENML rules (e.g. the size limit)
+    """
+    title = clean_title(digest_title(articles))
+    content = render_digest(articles)
+    validate_title(title)
+    validate_enml(content)
+    
+    note = Types.Note()
+    note.title = title
+    note.notebookGuid = notebook_guid
+    note.content = content
+    if tag_guids:
+        note.tagGuids = list(tag_guids)
+    note.attributes = Types.NoteAttributes()
+    return note
+
+
+def digest_groups(articles, digest_config):
+    """Split articles into digest batches of at most batch_size articles.
+    
+    With group_by "day" every day (by time_added) gets its own digests;
+    otherwise articles are batched in the order given.
+    """
+    batch_size = max(1, int(digest_config.get("batch_size", DEFAULT_DIGEST_BATCH_SIZE)))
+    if digest_config.get("group_by") == "day":
+        days = {}
+        for article in articles:
+            days.setdefault((article.get('time_added') or '')[:10], []).append(article)
+        groups = list(days.values())
+    else:
+        groups = [articles]
+    return [group[i:i + batch_size] for group in groups for i in range(0, len(group), batch_size)]
+
+
+def iter_notebook_metadata(note_store, notebook_guid, page_size=250, include_created=True):
+    """Page through the metadata of every note in a notebook.
+    
+    Only the note attributes (for sourceURL) and optionally the creation time
+    are requested, so each page stays small.
+    
+    Args:
+        note_store: Evernote NoteStore client
+        notebook_guid: GUID of the notebook to scan
+        page_size: Notes per findNotesMetadata call (Evernote caps this at 250)
+        include_created: Whether to request the creation time as well
         
-        # Create the note in Evernote
-        created_note = note_store.createNote(note)
-        logger.info(f"Created note: {title}")
-        return created_note
+    Yields:
+        NoteMetadata objects
+    """
+    note_filter = NoteFilter()
+    note_filter.notebookGuid = notebook_guid
+    spec = NotesMetadataResultSpec()
+    spec.includeAttributes = True
+    spec.includeCreated = include_created
     
-    except EDAMUserException as e:
-        logger.error(f"Evernote user error: {e.errorCode}, {e.parameter}")
-        return None
-    except EDAMSystemException as e:
-        logger.error(f"Evernote system error: {e.errorCode}")
-        # Rate limiting might be in effect
-        if e.errorCode == 19:  # RATE_LIMIT_REACHED
-            logger.warning(f"Rate limit exceeded. Retry after {e.rateLimitDuration} seconds")
-            time.sleep(e.rateLimitDuration + 1)
-            return create_note_from_article(note_store, article, notebook_guid)  # Retry
+    offset = 0
+    while True:
+        result = note_store.findNotesMetadata(note_filter, offset, page_size, spec)
+        for note in result.notes:
+            yield note
+        offset = result.startIndex + len(result.notes)
+        if not result.notes or offset >= result.totalNotes:
+            break
+
+
+def scan_notebook_source_urls(note_store, notebook_guid):
+    """Collect the source URLs of every note in the notebook in one paged scan.
+    
+    Returns:
+        Dictionary mapping normalized URL hash to note GUID
+    """
+    source_urls = {}
+    for note in iter_notebook_metadata(note_store, notebook_guid, include_created=False):
+        source_url = note.attributes.sourceURL if note.attributes else None
+        if source_url:
+            source_urls[url_hash(source_url)] = note.guid
+    logger.info(f"Found {len(source_urls)} existing notes with a source URL in the notebook")
+    return source_urls
+
+
+def sync_chunk_source_urls(note_store, notebook_guid, after_usn, update_count, max_entries=SYNC_CHUNK_ENTRIES):
+    """Collect the source URLs of notebook notes changed after a USN.
+    
+    Walks getFilteredSyncChunk from after_usn up to update_count, asking only
+    for notes with their attributes and expunged notebooks.
+    
+    Returns:
+        Tuple of (dictionary mapping URL hash to note GUID, whether the notebook was expunged)
+    """
+    chunk_filter = SyncChunkFilter()
+    chunk_filter.includeNotes = True
+    chunk_filter.includeNoteAttributes = True
+    chunk_filter.includeNotebooks = True
+    chunk_filter.includeExpunged = True
+    
+    source_urls = {}
+    notebook_expunged = False
+    usn = after_usn
+    while usn < update_count:
+        chunk = note_store.getFilteredSyncChunk(usn, max_entries, chunk_filter)
+        for note in chunk.notes or []:
+            source_url = note.attributes.sourceURL if note.attributes else None
+            if note.notebookGuid == notebook_guid and note.active and source_url:
+                source_urls[url_hash(source_url)] = note.guid
+        if notebook_guid in (chunk.expungedNotebooks or []):
+            notebook_expunged = True
+        if not chunk.chunkHighUSN:
+            break
+        usn = chunk.chunkHighUSN
+    return source_urls, notebook_expunged
+
+
+def load_sync_state(index):
+    """Return the (updateCount, currentTime) the index was last reconciled at, or None."""
+    update_count = index.get_meta("update_count")
+    if update_count is None:
         return None
+    return int(update_count), int(index.get_meta("sync_time") or 0)
+
+
+def save_sync_state(index, update_count, sync_time):
+    index.set_meta({"update_count": update_count, "sync_time": sync_time})
+
+
+def reconcile_notebook(note_store, index, notebook_guid, notebook_name, sync_state, previous, usns=None):
+    """Find notes in the notebook that the local index may not know about.
+    
+    Skipped when the account's updateCount has not moved since the index was
+    last reconciled, incremental (getFilteredSyncChunk) when it has, and a
+    full paged scan when there is no usable previous state.
+    
+    Args:
+        note_store: Evernote NoteStore client
+        index: SyncIndex (for the notebook GUID cache)
+        notebook_guid: GUID of the target notebook
+        notebook_name: Name of the target notebook
+        sync_state: The account's current SyncState, or None if unknown
+        previous: (updateCount, currentTime) of the last reconciliation, or None
+        usns: Optional set that collects the update sequence number of a recreated notebook
+        
+    Returns:
+        Tuple of (dictionary mapping URL hash to note GUID, notebook GUID)
+    """
+    if sync_state is not None and previous is not None:
+        update_count, sync_time = previous
+        if sync_state.updateCount == update_count:
+            logger.info(f"Account unchanged since last sync (updateCount {update_count}), skipping notebook scan")
+            return {}, notebook_guid
+        # fullSyncBefore means the server can no longer describe changes since our last sync incrementally
+        if update_count < sync_state.updateCount and (sync_state.fullSyncBefore or 0) <= sync_time:
+            existing, notebook_expunged = sync_chunk_source_urls(
+                note_store, notebook_guid, update_count, sync_state.updateCount
+            )
+            logger.info(
+                f"Reconciled {sync_state.updateCount - update_count} account changes incrementally, "
+                f"{len(existing)} changed notes in the notebook"
+            )
+            if notebook_expunged:
+                notebook_guid = get_notebook_guid(note_store, index, notebook_name, refresh=True, usns=usns)
+            return existing, notebook_guid
+    
+    try:
+        return scan_notebook_source_urls(note_store, notebook_guid), notebook_guid
+    except EDAMNotFoundException:
+        notebook_guid = get_notebook_guid(note_store, index, notebook_name, refresh=True, usns=usns)
+        if not notebook_guid:
+            return {}, None
+        return scan_notebook_source_urls(note_store, notebook_guid), notebook_guid
+
+
+def record_sync_state(note_store, index, start_state, own_usns):
+    """Remember the updateCount the index is consistent with after a run.
+    
+    The count after our own writes is only recorded when every change since
+    start_state was one of ours; otherwise the start count is kept so the next
+    run reconciles the foreign changes incrementally.
+    
+    Args:
+        note_store: Evernote NoteStore client
+        index: SyncIndex to store the state in
+        start_state: SyncState the index was reconciled at before posting
+        own_usns: Update sequence numbers of the notes, tags and notebooks this run
+            created or updated
+    """
+    try:
+        final_state = note_store.getSyncState()
     except Exception as e:
-        logger.error(f"Error creating note: {str(e)}")
-        return None
+        logger.warning(f"Could not read Evernote sync state: {str(e)}")
+        final_state = None
+    if final_state is not None and set(range(start_state.updateCount + 1, final_state.updateCount + 1)) <= own_usns:
+        save_sync_state(index, final_state.updateCount, final_state.currentTime)
+    else:
+        save_sync_state(index, start_state.updateCount, start_state.currentTime)
 
 
-def post_to_evernote(articles_or_file, config_path="pipeline_config.json"):
-    """Post articles to Evernote.
+def rebuild_index(note_store, notebook_guid, index):
+    """Reconstruct the local SyncIndex from the notes in the notebook.
+    
+    Returns:
+        Number of notes indexed
+    """
+    logger.info("Rebuilding local Evernote index from notebook...")
+    index.clear()
+    count = 0
+    for note in iter_notebook_metadata(note_store, notebook_guid):
+        source_url = note.attributes.sourceURL if note.attributes else None
+        if not source_url:
+            continue
+        posted_at = note.created / 1000 if note.created else None
+        index.record({"url": source_url}, note.guid, posted_at=posted_at)
+        count += 1
+    logger.info(f"Indexed {count} notes")
+    return count
+
+
+def open_index(config):
+    """Open the local SyncIndex configured in the evernote section."""
+    return SyncIndex(config.get("evernote", {}).get("index_path", DEFAULT_INDEX_PATH))
+
+
+def rebuild_index_from_config(config_path="pipeline_config.json", config=None):
+    """Connect to Evernote and rebuild the local index for the configured notebook.
     
     Args:
-        articles_or_file: Either a list of article dictionaries or a path to a JSON file
         config_path: Path to the configuration file
-        
+        config: Optional configuration dictionary to use instead of reading config_path
+    
     Returns:
         Boolean indicating success or failure
     """
-    # Load pipeline configuration
-    config = load_config(config_path)
+    config = load_config(config_path, config)
     if not config:
         logger.error("Failed to load pipeline configuration.")
         return False
+    evernote_config = config.get("evernote", {})
+    evernote_session.configure(evernote_config)
+    
+    note_store = get_note_store(evernote_config.get("auth_token"), evernote_config.get("sandbox", False))
+    if not note_store:
+        logger.error("Failed to connect to Evernote.")
+        return False
+    
+    index = open_index(config)
+    try:
+        notebook_guid = get_notebook_guid(
+            note_store, index, evernote_config.get("notebook_name", "Pocket Articles"), refresh=True
+        )
+        if not notebook_guid:
+            logger.error("Failed to find or create notebook.")
+            return False
+        sync_state = note_store.getSyncState()
+        with profiling.stage("rebuild_index"):
+            rebuild_index(note_store, notebook_guid, index)
+        save_sync_state(index, sync_state.updateCount, sync_state.currentTime)
+        return True
+    except Exception as e:
+        logger.error(f"Error rebuilding index: {str(e)}")
+        return False
+    finally:
+        index.close()
+
+
+def load_evernote_config(config_path="pipeline_config.json", config=None):
+    """Load the pipeline config and check that Evernote posting can run.
+    
+    Also applies the evernote section to the session layer.
+    
+    Args:
+        config_path: Path to the configuration file
+        config: Optional configuration dictionary to use instead of reading config_path
+    
+    Returns:
+        Tuple of (config, evernote_config), or None if posting is disabled or not configured
+    """
+    # Load pipeline configuration
+    config = load_config(config_path, config)
+    if not config:
+        logger.error("Failed to load pipeline configuration.")
+        return None
     
     # Check if Evernote is enabled
     if not config.get("evernote", {}).get("enabled", False):
         logger.warning("Evernote integration is disabled in config. Skipping post to Evernote.")
-        return False
+        return None
     
     # Get Evernote configuration
     evernote_config = config.get("evernote", {})
+    evernote_session.configure(evernote_config)
     
     # Check if auth token is still default
     if evernote_config.get("auth_token") == "your-evernote-auth-token":
         logger.error("ERROR: Please update your Evernote auth token in the config file:")
         logger.error(f"Edit the file: {os.path.abspath(config_path)}")
         logger.error("and replace 'your-evernote-auth-token' with your actual Evernote developer token")
+        return None
+    return config, evernote_config
+
+
+def post_to_evernote(articles_or_file, config_path="pipeline_config.json", config=None):
+    """Post articles to Evernote.
+    
+    Args:
+        articles_or_file: Either a list of Article records / article dictionaries or a path to a JSON file
+        config_path: Path to the configuration file
+        config: Optional configuration dictionary to use instead of reading config_path
+        
+    Returns:
+        Boolean indicating success or failure
+    """
+    loaded = load_evernote_config(config_path, config)
+    if not loaded:
         return False
+    config, evernote_config = loaded
     
-    # Load articles
-    articles = articles_or_file
-    if isinstance(articles_or_file, str):
-        try:
-            with open(articles_or_file, 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-            logger.info(f"Loaded {len(articles)} articles from {articles_or_file}")
-        except Exception as e:
-            logger.error(f"Error loading articles from {articles_or_file}: {str(e)}")
+    if not isinstance(articles_or_file, str):
+        if not articles_or_file:
+            logger.warning("No articles found to post to Evernote.")
             return False
+        # Consult the local index first: already-synced articles cost no API calls
+        index = open_index(config)
+        outbox = Outbox(index.path)
+        try:
+            return _sync_articles(articles_or_file, evernote_config, index, outbox)
+        finally:
+            outbox.close()
+            index.close()
     
-    if not articles:
-        logger.warning("No articles found to post to Evernote.")
+    # Files (archives or legacy dumps) are read and posted in batches, so memory stays flat
+    index = open_index(config)
+    session = PosterSession(evernote_config, index, Outbox(index.path))
+    count = 0
+    try:
+        batch = []
+        for article in iter_articles_file(articles_or_file):
+            batch.append(article)
+            count += 1
+            if len(batch) >= FILE_BATCH_SIZE:
+                if not session.submit(batch):
+                    return False
+                batch = []
+        if batch and not session.submit(batch):
+            return False
+        if not count:
+            logger.warning("No articles found to post to Evernote.")
+            return False
+        session.finish()
+        logger.info(f"Posted {count} articles from {articles_or_file}")
+        return True
+    except Exception as e:
+        logger.error(f"Error loading articles from {articles_or_file}: {str(e)}")
         return False
+    finally:
+        session.close()
+
+
+def open_poster_session(config_path="pipeline_config.json", config=None):
+    """Open a PosterSession for articles that arrive a few at a time.
     
-    # Connect to Evernote
-    note_store = get_note_store(
-        evernote_config.get("auth_token"),
-        evernote_config.get("sandbox", False)
-    )
+    Args:
+        config_path: Path to the configuration file
+        config: Optional configuration dictionary to use instead of reading config_path
     
-    if not note_store:
-        logger.error("Failed to connect to Evernote.")
-        return False
+    Returns:
+        PosterSession (call finish() and then close() when done), or None if
+        posting is disabled or not configured
+    """
+    loaded = load_evernote_config(config_path, config)
+    if not loaded:
+        return None
+    config, evernote_config = loaded
+    index = open_index(config)
+    return PosterSession(evernote_config, index, Outbox(index.path))
+
+
+def outbox_key(article):
+    """Return the outbox key of an article (the same key the SyncIndex uses)."""
+    return article_key(article)
+
+
+def note_to_payload(note, article, note_guid=None):
+    """Serialize a rendered note and its article identity for the outbox.
     
-    # Find or create notebook
-    notebook = find_or_create_notebook(note_store, evernote_config.get("notebook_name", "Pocket Articles"))
-    if not notebook:
-        logger.error("Failed to find or create notebook.")
+    A note_guid turns the entry into an update of that existing note.
+    """
+    tag_names = [name for name in (clean_tag_name(t) for t in article.get('tags') or []) if name]
+    return {
+        "note_guid": note_guid,
+        "content_hash": note_fingerprint(note.title, note.content, tag_names),
+        "title": note.title,
+        "content": note.content,
+        "notebook_guid": note.notebookGuid,
+        "source_url": note.attributes.sourceURL if note.attributes else None,
+        "tag_guids": list(note.tagGuids or []),
+        "tag_names": tag_names,
+        "item_id": article.get('item_id'),
+        "url": article.get('url'),
+    }
+
+
+def digest_to_payload(note, articles):
+    """Serialize a rendered digest note and the identities of its articles for the outbox."""
+    tag_names = sorted({name for article in articles
+                        for name in (clean_tag_name(t) for t in article.get('tags') or []) if name})
+    return {
+        "note_guid": None,
+        "content_hash": note_fingerprint(note.title, note.content, tag_names),
+        "title": note.title,
+        "content": note.content,
+        "notebook_guid": note.notebookGuid,
+        "source_url": None,
+        "tag_guids": list(note.tagGuids or []),
+        "tag_names": tag_names,
+        "members": [{"item_id": article.get('item_id'), "url": article.get('url')} for article in articles],
+    }
+
+
+def queue_digests(outbox, articles, digest_config, notebook_guid, tag_guids):
+    """Render new articles into digest notes and queue them in the outbox.
+    
+    A digest that breaks ENML rules (usually the size limit) is split in half
+    and retried, down to single articles.
+    
+    Returns:
+        Number of digest notes queued
+    """
+    queued = 0
+    groups = digest_groups(articles, digest_config)
+    while groups:
+        group = groups.pop(0)
+        group_tags = sorted({tag for article in group for tag in article.get('tags') or []})
+        try:
+            note = build_digest_note(group, notebook_guid, article_tag_guids({"tags": group_tags}, tag_guids))
+        except ENMLError as e:
+            if len(group) > 1:
+                half = len(group) // 2
+                groups[:0] = [group[:half], group[half:]]
+                continue
+            logger.error(f"Skipping invalid note for {group[0].get('url')}: {str(e)}")
+            continue
+        except Exception as e:
+            logger.error(f"Error rendering digest: {str(e)}")
+            continue
+        keys = [outbox_key(article) for article in group]
+        outbox.put("digest:" + content_hash(*keys), digest_to_payload(note, group), members=keys)
+        queued += 1
+    return queued
+
+
+def note_from_payload(payload):
+    """Rebuild a Types.Note from an outbox payload."""
+    note = Types.Note()
+    note.guid = payload.get("note_guid")
+    note.title = payload["title"]
+    note.content = payload["content"]
+    note.notebookGuid = payload["notebook_guid"]
+    if payload.get("tag_guids"):
+        note.tagGuids = list(payload["tag_guids"])
+    note.attributes = Types.NoteAttributes()
+    note.attributes.sourceURL = payload.get("source_url")
+    return note
+
+
+def _send_note(note_store, note):
+    """Create the note, or update it in place when it carries a GUID."""
+    if note.guid:
+        return note_store.updateNote(note)
+    return note_store.createNote(note)
+
+
+def _refresh_stale_guids(note_store, index, evernote_config, entry, error, usns=None):
+    """Refresh the cached GUID named by an EDAMNotFoundException.
+    
+    Updates the outbox entry's payload in place; usns collects the update
+    sequence numbers of a notebook or tags created on the way.
+    
+    Returns:
+        The rebuilt note, or None if the error is not about a cached GUID
+    """
+    payload = entry["payload"]
+    identifier = error.identifier or ""
+    if identifier == "Note.guid" and payload.get("note_guid"):
+        logger.warning("Note to update no longer exists, creating it again")
+        payload["note_guid"] = None
+    elif identifier.startswith("Note.notebookGuid"):
+        logger.warning("Cached notebook GUID is stale, refreshing")
+        guid = get_notebook_guid(
+            note_store, index, evernote_config.get("notebook_name", "Pocket Articles"), refresh=True, usns=usns
+        )
+        if not guid:
+            return None
+        payload["notebook_guid"] = guid
+    elif identifier.startswith("Note.tagGuids"):
+        logger.warning("Cached tag GUIDs are stale, refreshing")
+        index.drop_guids("tag", payload.get("tag_names") or [])
+        tag_guids = resolve_tag_guids(note_store, index, payload.get("tag_names") or [], usns)
+        payload["tag_guids"] = list(dict.fromkeys(tag_guids.values()))
+    else:
+        return None
+    return note_from_payload(payload)
+
+
+def drain_outbox(outbox, index, evernote_config, usns=None, rate_limiter=None):
+    """Post every eligible outbox entry with a small worker pool.
+    
+    A rate limit defers the remaining entries until the limit expires instead
+    of blocking; other failures are retried later with exponential backoff.
+    Permanent errors (EDAMUserException) and entries out of attempts are
+    moved to the outbox's dead letters.
+    
+    Args:
+        outbox: Outbox to drain
+        index: SyncIndex to record posted notes in
+        evernote_config: The evernote section of the pipeline config
+        usns: Optional set that collects the update sequence numbers of posted notes
+            (and of notebooks or tags recreated for them)
+        rate_limiter: Optional AdaptiveRateLimiter to keep pacing across several drains
+        
+    Returns:
+        Number of notes posted
+    """
+    entries = outbox.due()
+    if not entries:
+        return 0
+    logger.info(f"Posting {len(entries)} notes from the outbox")
+    
+    # Create notes concurrently; the shared limiter paces calls to the real quota
+    rate_limiter = rate_limiter or AdaptiveRateLimiter.from_config(evernote_config)
+    workers = max(1, evernote_config.get("workers", DEFAULT_WORKERS))
+    stop = threading.Event()
+    
+    # Thrift clients are not thread-safe, so each worker gets its own NoteStore
+    local = threading.local()
+    
+    def worker_note_store():
+        if not hasattr(local, "note_store"):
+            local.note_store = get_note_store(
+                evernote_config.get("auth_token"),
+                evernote_config.get("sandbox", False)
+            )
+        return local.note_store
+    
+    def fail(entry, error, permanent=False):
+        dead = outbox.defer(entry["id"], error, permanent=permanent)
+        metrics.inc("evernote_notes_total", result="dead_lettered" if dead else "failed")
         return False
     
-    # Create notes for each article
-    created_count = 0
+    def post_entry(entry):
+        if stop.is_set():
+            return False
+        worker_store = worker_note_store()
+        if not worker_store:
+            return fail(entry, "Failed to connect to Evernote")
+        started = time.monotonic()
+        rate_limiter.acquire()
+        if stop.is_set():
+            return False
+        
+        note = note_from_payload(entry["payload"])
+        try:
+            try:
+                created_note = _send_note(worker_store, note)
+            except EDAMNotFoundException as e:
+                # A cached GUID (or the note being updated) went stale: refresh it and retry once
+                note = _refresh_stale_guids(worker_store, index, evernote_config, entry, e, usns)
+                if note is None:
+                    raise
+                outbox.put(entry["key"], entry["payload"])
+                rate_limiter.acquire()
+                created_note = _send_note(worker_store, note)
+        except EDAMSystemException as e:
+            if e.errorCode == 19:  # RATE_LIMIT_REACHED
+                logger.warning(f"Rate limit exceeded. Deferring outbox for {e.rateLimitDuration} seconds")
+                metrics.inc("evernote_rate_limits_total")
+                metrics.inc("evernote_notes_total", result="deferred")
+                rate_limiter.on_rate_limited(e.rateLimitDuration, pause=False)
+                stop.set()
+                outbox.postpone_due(time.time() + e.rateLimitDuration + 1)
+                outbox.defer(entry["id"], f"RATE_LIMIT_REACHED ({e.rateLimitDuration}s)",
+                             delay=e.rateLimitDuration + 1, count_attempt=False)
+                return False
+            logger.error(f"Evernote system error: {e.errorCode}")
+            return fail(entry, f"EDAMSystemException {e.errorCode}: {e.message}")
+        except EDAMUserException as e:
+            # Bad ENML, quota and permission errors fail the same way on every retry
+            logger.error(f"Evernote user error: {e.errorCode}, {e.parameter}")
+            return fail(entry, f"EDAMUserException {e.errorCode}: {e.parameter}", permanent=True)
+        except EDAMNotFoundException as e:
+            logger.error(f"Evernote object not found: {e.identifier}")
+            return fail(entry, f"EDAMNotFoundException {e.identifier}")
+        except TTransportException as e:
+            # The note may have been created before the connection failed: look for it before resending
+            if e.type != TTransportException.NOT_OPEN and not entry["payload"].get("note_guid"):
+                entry["payload"]["uncertain"] = True
+                outbox.put(entry["key"], entry["payload"])
+            logger.error(f"Evernote transport error creating note: {str(e)}")
+            return fail(entry, f"TTransportException {e.type}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error creating note: {str(e)}")
+            return fail(entry, str(e))
+        
+        rate_limiter.on_success()
+        metrics.observe("evernote_note_duration_seconds", time.monotonic() - started)
+        # createNote fills in note.guid, so the payload tells whether this was an update
+        payload = entry["payload"]
+        updated = bool(payload.get("note_guid"))
+        metrics.inc("evernote_notes_total", result="updated" if updated else "created")
+        logger.info(f"{'Updated' if updated else 'Created'} note: {note.title}")
+        if payload.get("members"):
+            # Every article of a digest points at the digest note
+            for member in payload["members"]:
+                index.record(member, created_note.guid, digest=True)
+        else:
+            index.record({"item_id": payload.get("item_id"), "url": payload.get("url")},
+                         created_note.guid, payload.get("content_hash"))
+        if usns is not None and created_note.updateSequenceNum:
+            usns.add(created_note.updateSequenceNum)
+        outbox.remove(entry["id"])
+        return True
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        posted = sum(executor.map(post_entry, entries))
+    
+    logger.info(f"Evernote calls: {rate_limiter.calls}, rate limits hit: {rate_limiter.rate_limited}, final rate {rate_limiter.rate:.2f} calls/s")
+    return posted
+
+
+def note_fingerprint(title, content, tag_names):
+    """Hash everything a note update would change: title, ENML and tag set."""
+    return content_hash(title, content, "\n".join(sorted({name.lower() for name in tag_names})))
+
+
+def _classify_articles(articles, index, outbox):
+    """Split articles into new ones and already-posted ones whose note changed.
+    
+    Every article is rendered locally and its fingerprint compared with the
+    one in the index, so unchanged articles are dropped without any API call.
+    
+    Returns:
+        Tuple of (new_articles, changed) where changed is a list of (article, note_guid)
+    """
+    new_articles = []
+    changed = []
+    unchanged = 0
     for article in articles:
-        note = create_note_from_article(note_store, article, notebook.guid)
-        if note:
-            created_count += 1
-            # Sleep a bit to avoid hitting rate limits
-            time.sleep(1)
+        if outbox.contains(outbox_key(article)):
+            unchanged += 1
+            continue
+        row = index.lookup(article)
+        if row is None:
+            new_articles.append(article)
+            continue
+        if row["digest"]:
+            # Articles posted inside a digest note are not updated individually
+            unchanged += 1
+            continue
+        try:
+            content = render_article(article)
+        except Exception as e:
+            logger.error(f"Error rendering note: {str(e)}")
+            continue
+        tag_names = [name for name in (clean_tag_name(t) for t in article.get('tags') or []) if name]
+        fingerprint = note_fingerprint(clean_title(article.get('title', 'Untitled Article')), content, tag_names)
+        # Rows without a hash, or with the older content-only hash, adopt the fingerprint
+        if row["content_hash"] in (None, content_hash(content)):
+            index.record(article, row["note_guid"], fingerprint, posted_at=row["posted_at"])
+            unchanged += 1
+        elif row["content_hash"] != fingerprint and row["note_guid"]:
+            changed.append((article, row["note_guid"]))
+        else:
+            unchanged += 1
+    if unchanged:
+        logger.info(f"Skipping {unchanged} articles already synced or queued for Evernote")
+        metrics.inc("evernote_articles_skipped_total", unchanged)
+    return new_articles, changed
+
+
+class PosterSession:
+    """Incremental poster for articles that become ready one batch at a time.
+    
+    The Evernote connection, notebook, sync state, notebook reconciliation and
+    rate limiter are set up once, on the first batch that needs the network;
+    every submit() then only classifies, renders, queues and drains its own
+    batch. Call finish() after the last batch to record the sync state.
+    
+    Args:
+        evernote_config: The evernote section of the pipeline config
+        index: SyncIndex of posted notes
+        outbox: Outbox sharing the index database
+    """
     
-    logger.info(f"Synced {created_count} of {len(articles)} articles to Evernote notebook '{evernote_config.get('notebook_name')}'")
+    def __init__(self, evernote_config, index, outbox):
+        self.evernote_config = evernote_config
+        self.index = index
+        self.outbox = outbox
+        self.note_store = None
+        self.notebook_guid = None
+        self.sync_state = None
+        self.previous = load_sync_state(index)
+        self.reconciled_at = self.previous[0] if self.previous else None
+        self.existing = None
+        self.usns = set()
+        self.posted = 0
+        self.drained = False
+        self.rate_limiter = AdaptiveRateLimiter.from_config(evernote_config)
+    
+    def _connect(self):
+        """Connect and look up the notebook and sync state (first call only)."""
+        if self.note_store is not None:
+            return True
+        note_store = get_note_store(
+            self.evernote_config.get("auth_token"),
+            self.evernote_config.get("sandbox", False)
+        )
+        if not note_store:
+            logger.error("Failed to connect to Evernote.")
+            return False
+        
+        # Find or create notebook (cached GUID, validated lazily)
+        notebook_name = self.evernote_config.get("notebook_name", "Pocket Articles")
+        self.notebook_guid = get_notebook_guid(note_store, self.index, notebook_name)
+        if not self.notebook_guid:
+            logger.error("Failed to find or create notebook.")
+            return False
+        
+        # The account's updateCount tells whether anything changed since the index was reconciled
+        try:
+            self.sync_state = note_store.getSyncState()
+        except Exception as e:
+            logger.warning(f"Could not read Evernote sync state: {str(e)}")
+        self.note_store = note_store
+        return True
+    
+    def _reconcile(self):
+        """Map the notebook's notes the index may not know about (first call only)."""
+        if self.existing is not None:
+            return True
+        self.existing = {}
+        notebook_name = self.evernote_config.get("notebook_name", "Pocket Articles")
+        try:
+            self.existing, self.notebook_guid = reconcile_notebook(
+                self.note_store, self.index, self.notebook_guid, notebook_name, self.sync_state, self.previous,
+                self.usns
+            )
+            if not self.notebook_guid:
+                logger.error("Failed to find or create notebook.")
+                return False
+            if self.sync_state is not None:
+                self.reconciled_at = self.sync_state.updateCount
+        except Exception as e:
+            logger.warning(f"Could not scan notebook for existing notes, skipping remote dedup: {str(e)}")
+        return True
+    
+    def _queue(self, pending, changed):
+        """Render new and changed articles into the outbox, connecting and reconciling first.
+        
+        Returns:
+            Boolean indicating success or failure
+        """
+        index, outbox, evernote_config = self.index, self.outbox, self.evernote_config
+        with profiling.stage("render"):
+            if not self._connect():
+                return False
+            
+            # Reconcile only when there are new articles to dedup against the notebook
+            if pending and not self._reconcile():
+                return False
+            
+            # Posted by an earlier run whose index entry was lost: remember them
+            new_articles = []
+            for article in pending:
+                note_guid = self.existing.get(article_key(article))
+                if note_guid:
+                    index.record(article, note_guid)
+                else:
+                    new_articles.append(article)
+            if len(new_articles) < len(pending):
+                logger.info(f"Skipping {len(pending) - len(new_articles)} articles already in the notebook")
+            
+            # Resolve every tag of the batch at once (cached, one listTags on a miss)
+            to_queue = [(article, None) for article in new_articles] + changed
+            try:
+                tag_guids = resolve_tag_guids(
+                    self.note_store, index, {tag for article, _ in to_queue for tag in article.get('tags') or []},
+                    self.usns
+                )
+            except Exception as e:
+                logger.warning(f"Could not resolve Evernote tags, posting without tags: {str(e)}")
+                tag_guids = {}
+            
+            # Render every new or changed article once and queue it in the durable outbox
+            queued = 0
+            digest_config = evernote_config.get("digest", {})
+            if digest_config.get("enabled") and new_articles:
+                digests = queue_digests(outbox, new_articles, digest_config, self.notebook_guid, tag_guids)
+                logger.info(f"Queued {len(new_articles)} new articles in {digests} digest notes")
+                queued += digests
+                to_queue = changed
+            for article, note_guid in to_queue:
+                try:
+                    note = build_note_from_article(article, self.notebook_guid, article_tag_guids(article, tag_guids))
+                except ENMLError as e:
+                    logger.error(f"Skipping invalid note for {article.get('url')}: {str(e)}")
+                    continue
+                except Exception as e:
+                    logger.error(f"Error rendering note: {str(e)}")
+                    continue
+                outbox.put(outbox_key(article), note_to_payload(note, article, note_guid))
+                queued += 1
+            logger.info(f"Queued {queued} notes in the outbox ({len(changed)} updates)")
+            metrics.inc("evernote_notes_queued_total", queued)
+            return True
+    
+    def _settle_uncertain(self):
+        """Record, instead of posting again, uncertain creates that did reach the notebook.
+        
+        A create whose connection failed after the request was sent is marked
+        uncertain in the outbox. Once the sync state shows changes that were
+        not ours, reconciliation maps the notebook's notes by source URL, and
+        a note found there for the entry means the create went through.
+        """
+        uncertain = [entry for entry in self.outbox.due() if entry["payload"].get("uncertain")]
+        if not uncertain or not self._connect() or not self._reconcile():
+            return
+        for entry in uncertain:
+            note_guid = self.existing.get(entry["key"])
+            if not note_guid:
+                continue
+            payload = entry["payload"]
+            logger.info(f"Note for {payload.get('url')} was created before its connection failed, not posting it again")
+            self.index.record({"item_id": payload.get("item_id"), "url": payload.get("url")},
+                              note_guid, payload.get("content_hash"))
+            self.outbox.remove(entry["id"])
+    
+    def submit(self, articles):
+        """Queue the new and changed articles of a batch and drain the outbox.
+        
+        Returns:
+            Boolean indicating success or failure
+        """
+        index, outbox, evernote_config = self.index, self.outbox, self.evernote_config
+        pending, changed = _classify_articles(articles, index, outbox)
+        if not pending and not changed and not outbox.due_count():
+            waiting = outbox.count()
+            if waiting:
+                logger.info(f"{waiting} notes are waiting in the outbox for a later run")
+            logger.info("All articles already synced. Nothing to post.")
+            return True
+        
+        if (pending or changed) and not self._queue(pending, changed):
+            return False
+        self._settle_uncertain()
+        
+        with profiling.stage("post"):
+            self.posted += drain_outbox(outbox, index, evernote_config, self.usns, self.rate_limiter)
+        self.drained = True
+        return True
+    
+    def article_stage(self, article):
+        """Return "posted" once the article's note exists, "rendered" while it waits in the outbox, else None."""
+        if self.index.contains(article):
+            return "posted"
+        if self.outbox.contains(outbox_key(article)):
+            return "rendered"
+        return None
+    
+    def finish(self):
+        """Record the sync state the index is now consistent with."""
+        if not self.drained:
+            return
+        metrics.set_gauge("outbox_pending", self.outbox.count())
+        if self.sync_state is not None and self.reconciled_at == self.sync_state.updateCount:
+            record_sync_state(self.note_store, self.index, self.sync_state, self.usns)
+        logger.info(f"Synced {self.posted} notes to Evernote notebook '{self.evernote_config.get('notebook_name')}', {self.outbox.count()} waiting in the outbox")
+    
+    def close(self):
+        """Close the outbox and index (sessions from open_poster_session own them)."""
+        self.outbox.close()
+        self.index.close()
+
+
+def _sync_articles(articles, evernote_config, index, outbox):
+    """Queue new and changed articles and drain the outbox."""
+    session = PosterSession(evernote_config, index, outbox)
+    if not session.submit(articles):
+        return False
+    session.finish()
     return True
 
 
@@ -246,7 +1136,16 @@ def main():
     parser = argparse.ArgumentParser(description="Post articles to Evernote")
     parser.add_argument("--config", default="pipeline_config.json", help="Path to config file")
     parser.add_argument("--file", help="Path to articles JSON file")
+    parser.add_argument("--rebuild-index", action="store_true", help="Rebuild the local dedup index from the notebook")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start_from_args(args)
+    
+    if args.rebuild_index:
+        if not rebuild_index_from_config(args.config):
+            sys.exit(1)
+        if not args.file:
+            return
     
     if not args.file:
         logger.error("No articles file specified. Use --file to specify a JSON file.")
@@ -256,7 +1155,14 @@ def main():
         logger.error(f"File not found: {args.file}")
         sys.exit(1)
     
-    success = post_to_evernote(args.file, args.config)
+    config = load_config(args.config)
+    metrics.configure(config)
+    metrics.start_run()
+    success = False
+    try:
+        success = post_to_evernote(args.file, args.config, config)
+    finally:
+        metrics.finish_run(success, mode="file")
     
     if success:
         print("Evernote posting completed successfully.")
@@ -0,0 +1,327 @@
+#evernote_session.py do not change filename do not remove line
+"""
+evernote_session.py - Persistent Evernote NoteStore sessions.
+
+EvernoteClient.get_note_store() asks the UserStore for the NoteStore URL on
+every call and its THttpClient transport opens a new connection for every
+Thrift call. Here the NoteStore URL (and the web API prefix derived from it)
+is cached per token in memory and in a small JSON file, and Thrift calls are
+posted through the pooled http_client session so the connection stays alive
+for the whole run. A transport error drops the connection and the call is
+retried once on a fresh one. Writes are only retried when the request never
+left the client; after that Evernote may already have applied them.
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+from io import BytesIO
+
+import requests
+import evernote.edam.notestore.NoteStore as NoteStore
+import evernote.edam.userstore.UserStore as UserStore
+import evernote.edam.userstore.constants as UserStoreConstants
+from thrift.protocol import TBinaryProtocol
+from thrift.transport.TTransport import TTransportBase, TTransportException
+from urllib3.exceptions import NewConnectionError
+
+import http_client
+import metrics
+
+logger = logging.getLogger("evernote_session")
+
+DEFAULT_URL_CACHE = "evernote_urls.json"
+
+# NoteStore calls that only read and can always be retried after a transport error
+READ_ONLY_PREFIXES = ("get", "list", "find")
+
+_lock = threading.Lock()
+# Serializes configure(), which accounts running side by side call at the same time
+_configure_lock = threading.Lock()
+_local = threading.local()
+_url_cache_path = DEFAULT_URL_CACHE
+_url_cache = None
+_service_url = None
+_factory = None
+_fake_config = None
+
+
+def configure(evernote_config=None):
+    """Apply settings from the evernote section of the pipeline config.
+
+    Args:
+        evernote_config: The evernote section. Reads "url_cache" (the JSON file
+            the NoteStore URLs are cached in), "service_url" (overrides the
+            Evernote host, e.g. a local fake server) and "backend" ("fake"
+            uses an in-process FakeNoteStore configured by the "fake" block)
+    """
+    global _url_cache_path, _url_cache, _service_url, _fake_config
+    evernote_config = evernote_config or {}
+    path = evernote_config.get("url_cache", DEFAULT_URL_CACHE)
+    with _configure_lock:
+        with _lock:
+            if path != _url_cache_path:
+                _url_cache_path = path
+                _url_cache = None
+            _service_url = evernote_config.get("service_url")
+
+        if evernote_config.get("backend") == "fake":
+            fake_config = evernote_config.get("fake", {})
+            # Keep the same fake (and its notes) across runs while the settings are unchanged
+            if _factory is None or fake_config != _fake_config:
+                from fake_notestore import FakeNoteStore
+                store = FakeNoteStore.from_config(fake_config)
+                set_note_store_factory(lambda auth_token, sandbox: store)
+                _fake_config = fake_config
+                logger.info("Using the in-process fake Evernote NoteStore")
+        elif _fake_config is not None:
+            set_note_store_factory(None)
+            _fake_config = None
+
+
+def set_note_store_factory(factory):
+    """Make get_note_store return factory(auth_token, sandbox) instead of a real session.
+
+    Pass None to go back to real Evernote sessions.
+    """
+    global _factory
+    with _lock:
+        _factory = factory
+
+
+def _token_key(auth_token, sandbox):
+    # Never store the token itself, only a digest of it
+    digest = hashlib.sha256(auth_token.encode("utf-8")).hexdigest()
+    return f"{_service_url or ('sandbox' if sandbox else 'production')}:{digest}"
+
+
+def _load_url_cache():
+    global _url_cache
+    if _url_cache is None:
+        _url_cache = {}
+        try:
+            if os.path.exists(_url_cache_path):
+                with open(_url_cache_path, 'r') as f:
+                    _url_cache = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Evernote URL cache {_url_cache_path}: {str(e)}")
+    return _url_cache
+
+
+def _save_url_cache():
+    try:
+        tmp_path = _url_cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(_url_cache, f, indent=2)
+        os.replace(tmp_path, _url_cache_path)
+    except Exception as e:
+        logger.warning(f"Could not write Evernote URL cache {_url_cache_path}: {str(e)}")
+
+
+def service_url(sandbox=False):
+    if _service_url:
+        return _service_url.rstrip("/")
+    return "https://sandbox.evernote.com" if sandbox else "https://www.evernote.com"
+
+
+def _user_agent(auth_token):
+    # Same User-Agent the SDK's Store sends
+    agent_id = auth_token.split(":A=", 1)[1].split(":", 1)[0] if ":A=" in auth_token else ""
+    version = f"{UserStoreConstants.EDAM_VERSION_MAJOR}.{UserStoreConstants.EDAM_VERSION_MINOR}"
+    return f"{agent_id} / {version}; Python / {sys.version.splitlines()[0]};"
+
+
+def _never_sent(error):
+    """Return True if a requests error happened before the request reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    # requests wraps the connect failure in urllib3's MaxRetryError
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, NewConnectionError)
+
+
+class PooledHttpTransport(TTransportBase):
+    """Thrift HTTP transport that posts through the shared keep-alive pool.
+
+    Errors are raised as TTransportException: NOT_OPEN only when the request
+    never left the client (so any call can be replayed), TIMED_OUT or
+    END_OF_FILE when it failed after being sent, and UNKNOWN for an HTTP
+    error status.
+
+    Args:
+        url: Thrift endpoint URL
+        headers: Extra headers sent with every call
+    """
+
+    def __init__(self, url, headers=None):
+        self.url = url
+        self.headers = {"Content-Type": "application/x-thrift", "Accept": "application/x-thrift"}
+        self.headers.update(headers or {})
+        self._wbuf = BytesIO()
+        self._rbuf = BytesIO()
+
+    def isOpen(self):
+        return True
+
+    def write(self, buf):
+        self._wbuf.write(buf)
+
+    def read(self, sz):
+        return self._rbuf.read(sz)
+
+    def readAll(self, sz):
+        data = self._rbuf.read(sz)
+        if len(data) < sz:
+            raise TTransportException(TTransportException.END_OF_FILE, "Truncated Thrift response")
+        return data
+
+    def flush(self):
+        data = self._wbuf.getvalue()
+        self._wbuf = BytesIO()
+        try:
+            response = http_client.post(self.url, data=data, headers=self.headers)
+        except requests.exceptions.RequestException as e:
+            if _never_sent(e):
+                raise TTransportException(TTransportException.NOT_OPEN, str(e))
+            if isinstance(e, requests.exceptions.Timeout):
+                raise TTransportException(TTransportException.TIMED_OUT, str(e))
+            raise TTransportException(TTransportException.END_OF_FILE, str(e))
+        if response.status_code != 200:
+            raise TTransportException(
+                TTransportException.UNKNOWN, f"HTTP {response.status_code} from {self.url}"
+            )
+        self._rbuf = BytesIO(response.content)
+
+
+def _thrift_client(client_class, url, auth_token):
+    transport = PooledHttpTransport(url, {"User-Agent": _user_agent(auth_token)})
+    return client_class(TBinaryProtocol.TBinaryProtocol(transport))
+
+
+def get_user_urls(auth_token, sandbox=False, refresh=False):
+    """Return the NoteStore URL and web API prefix for a token.
+
+    Cached per token; only a cache miss (or refresh) costs a UserStore call.
+
+    Returns:
+        Dictionary with noteStoreUrl and webApiUrlPrefix
+    """
+    key = _token_key(auth_token, sandbox)
+    with _lock:
+        cache = _load_url_cache()
+        if not refresh and key in cache:
+            return cache[key]
+
+    user_store = _thrift_client(UserStore.Client, f"{service_url(sandbox)}/edam/user", auth_token)
+    note_store_url = user_store.getNoteStoreUrl(auth_token)
+    # The web API prefix is the shard URL the NoteStore path hangs off
+    urls = {
+        "noteStoreUrl": note_store_url,
+        "webApiUrlPrefix": note_store_url.rsplit("notestore", 1)[0],
+    }
+    logger.info(f"Discovered Evernote NoteStore URL {note_store_url}")
+    with _lock:
+        cache = _load_url_cache()
+        cache[key] = urls
+        _save_url_cache()
+    return urls
+
+
+class NoteStoreSession:
+    """NoteStore client bound to one token, with transparent reconnects.
+
+    Methods of NoteStore.Client are available directly; the authentication
+    token is filled in when the caller leaves it out, as with the SDK's Store.
+    A session is not thread-safe; use one per thread (see get_note_store).
+
+    Args:
+        auth_token: Evernote developer or OAuth token
+        sandbox: Whether to use the sandbox service
+    """
+
+    def __init__(self, auth_token, sandbox=False):
+        self.auth_token = auth_token
+        self.sandbox = sandbox
+        self.note_store_url = None
+        self.web_api_url_prefix = None
+        self._client = None
+        self._urls_from_cache = False
+
+    def connect(self, refresh_urls=False):
+        """Resolve the NoteStore URL (cached) and build a Thrift client on the pooled transport."""
+        key = _token_key(self.auth_token, self.sandbox)
+        with _lock:
+            self._urls_from_cache = not refresh_urls and key in _load_url_cache()
+        urls = get_user_urls(self.auth_token, self.sandbox, refresh=refresh_urls)
+        self.note_store_url = urls["noteStoreUrl"]
+        self.web_api_url_prefix = urls["webApiUrlPrefix"]
+        self._client = _thrift_client(NoteStore.Client, self.note_store_url, self.auth_token)
+        return self
+
+    def close(self):
+        self._client = None
+
+    def __getattr__(self, name):
+        method = getattr(NoteStore.Client, name, None)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+        params = [p for p in inspect.signature(method).parameters if p != "self"]
+
+        def call(*args, **kwargs):
+            if ("authenticationToken" in params and "authenticationToken" not in kwargs
+                    and len(args) < len(params)):
+                names = [p for p in params if p != "authenticationToken"]
+                kwargs.update(zip(names, args))
+                kwargs["authenticationToken"] = self.auth_token
+                args = ()
+            return self._call(name, args, kwargs)
+
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+
+    def _call(self, name, args, kwargs):
+        if self._client is None:
+            self.connect()
+        metrics.inc("evernote_api_calls_total", method=name)
+        try:
+            return getattr(self._client, name)(*args, **kwargs)
+        except TTransportException as e:
+            self._client = None
+            # A stale cached URL shows up as an HTTP error: rediscover it
+            refresh = self._urls_from_cache and e.type == TTransportException.UNKNOWN
+            # A write that reached the server may have been applied, and replaying it
+            # could create a duplicate: let the outbox and index reconciliation decide
+            if e.type != TTransportException.NOT_OPEN and not name.startswith(READ_ONLY_PREFIXES):
+                if refresh:
+                    self.connect(refresh_urls=True)
+                raise
+            logger.warning(f"Evernote transport error on {name} ({str(e)}), reconnecting")
+            self.connect(refresh_urls=refresh)
+            return getattr(self._client, name)(*args, **kwargs)
+
+
+def get_note_store(auth_token, sandbox=False):
+    """Return this thread's NoteStoreSession for the token, connecting on first use.
+
+    Sessions live for the whole process, so long-running modes keep reusing
+    the cached URL and the pooled connection across runs. A factory set with
+    set_note_store_factory (or the "fake" backend) takes precedence.
+    """
+    if _factory is not None:
+        return _factory(auth_token, sandbox)
+    sessions = getattr(_local, "sessions", None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+    key = _token_key(auth_token, sandbox)
+    session = sessions.get(key)
+    if session is None:
+        session = NoteStoreSession(auth_token, sandbox).connect()
+        sessions[key] = session
+    return session
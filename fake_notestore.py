@@ -0,0 +1,291 @@
+#fake_notestore.py do not change filename do not remove line
+"""
+fake_notestore.py - Local stand-in for the Evernote NoteStore.
+
+FakeNoteStore keeps notebooks, tags and notes in memory and answers the
+NoteStore calls the poster makes, with configurable latency, random error
+injection and EDAM rate-limit simulation. It can be used in-process (set
+"backend": "fake" in the evernote config section) or served over the Thrift
+HTTP protocol the evernote3 SDK speaks (see serve()), so post_to_evernote can
+be load-tested without touching a real account.
+"""
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import evernote.edam.notestore.NoteStore as NoteStore
+import evernote.edam.userstore.UserStore as UserStore
+from evernote.edam.error.ttypes import EDAMErrorCode, EDAMNotFoundException, EDAMSystemException, EDAMUserException
+from evernote.edam.notestore.ttypes import NoteMetadata, NotesMetadataList, SyncChunk, SyncState
+from thrift.protocol import TBinaryProtocol
+from thrift.transport.TTransport import TTransportBase
+
+logger = logging.getLogger("fake_notestore")
+
+RATE_LIMIT_REACHED = 19  # EDAMErrorCode.RATE_LIMIT_REACHED
+
+
+class FakeNoteStore:
+    """Thread-safe in-memory NoteStore.
+
+    Methods take the same arguments as the SDK's token-injecting Store (no
+    authentication token), so the fake can stand in wherever the poster uses
+    a note store.
+
+    Args:
+        latency: Seconds every call takes
+        jitter: Random extra latency of up to this many seconds per call
+        error_rate: Probability that a write fails with EDAMSystemException INTERNAL_ERROR
+        rate_limit: Calls allowed per rate_limit_window before RATE_LIMIT_REACHED (0 disables)
+        rate_limit_window: Length of the rate-limit window in seconds
+        seed: Seed for the jitter and error injection
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0, rate_limit_window=60, seed=None):
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.error_rate = float(error_rate)
+        self.rate_limit = int(rate_limit)
+        self.rate_limit_window = float(rate_limit_window)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._usn = 0
+        self._notebooks = {}
+        self._tags = {}
+        self._notes = {}
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self.calls = {}
+        self.errors = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_config(cls, fake_config):
+        """Build a fake from the "fake" block of the evernote config section."""
+        return cls(**{k: v for k, v in (fake_config or {}).items()
+                      if k in ("latency", "jitter", "error_rate", "rate_limit", "rate_limit_window", "seed")})
+
+    def _enter(self, name, write=False):
+        """Count the call, apply latency and raise injected errors."""
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+            fail = write and self.error_rate and self._random.random() < self.error_rate
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= self.rate_limit_window:
+                    self._window_start = now
+                    self._window_calls = 0
+                self._window_calls += 1
+                if self._window_calls > self.rate_limit:
+                    self.rate_limited += 1
+                    duration = max(1, math.ceil(self._window_start + self.rate_limit_window - now))
+                    raise EDAMSystemException(errorCode=RATE_LIMIT_REACHED, rateLimitDuration=duration)
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise EDAMSystemException(errorCode=EDAMErrorCode.INTERNAL_ERROR, message=f"Injected failure in {name}")
+
+    def _next_usn(self):
+        self._usn += 1
+        return self._usn
+
+    def _now_ms(self):
+        return int(time.time() * 1000)
+
+    # Notebooks
+    def listNotebooks(self):
+        self._enter("listNotebooks")
+        with self._lock:
+            return list(self._notebooks.values())
+
+    def createNotebook(self, notebook):
+        self._enter("createNotebook", write=True)
+        with self._lock:
+            if any(nb.name.lower() == notebook.name.lower() for nb in self._notebooks.values()):
+                raise EDAMUserException(errorCode=EDAMErrorCode.DATA_CONFLICT, parameter="Notebook.name")
+            notebook.guid = str(uuid.uuid4())
+            notebook.updateSequenceNum = self._next_usn()
+            self._notebooks[notebook.guid] = notebook
+            return notebook
+
+    # Tags
+    def listTags(self):
+        self._enter("listTags")
+        with self._lock:
+            return list(self._tags.values())
+
+    def createTag(self, tag):
+        self._enter("createTag", write=True)
+        with self._lock:
+            if any(t.name.lower() == tag.name.lower() for t in self._tags.values()):
+                raise EDAMUserException(errorCode=EDAMErrorCode.DATA_CONFLICT, parameter="Tag.name")
+            tag.guid = str(uuid.uuid4())
+            tag.updateSequenceNum = self._next_usn()
+            self._tags[tag.guid] = tag
+            return tag
+
+    # Notes
+    def _check_note(self, note):
+        if not note.title:
+            raise EDAMUserException(errorCode=EDAMErrorCode.DATA_REQUIRED, parameter="Note.title")
+        if note.notebookGuid not in self._notebooks:
+            raise EDAMNotFoundException(identifier="Note.notebookGuid", key=note.notebookGuid)
+        for tag_guid in note.tagGuids or []:
+            if tag_guid not in self._tags:
+                raise EDAMNotFoundException(identifier="Note.tagGuids", key=tag_guid)
+
+    def createNote(self, note):
+        self._enter("createNote", write=True)
+        with self._lock:
+            self._check_note(note)
+            note.guid = str(uuid.uuid4())
+            note.created = note.updated = self._now_ms()
+            note.active = True
+            note.updateSequenceNum = self._next_usn()
+            self._notes[note.guid] = note
+            return note
+
+    def updateNote(self, note):
+        self._enter("updateNote", write=True)
+        with self._lock:
+            existing = self._notes.get(note.guid)
+            if existing is None:
+                raise EDAMNotFoundException(identifier="Note.guid", key=note.guid)
+            self._check_note(note)
+            note.created = existing.created
+            note.updated = self._now_ms()
+            note.active = True
+            note.updateSequenceNum = self._next_usn()
+            self._notes[note.guid] = note
+            return note
+
+    def findNotesMetadata(self, note_filter, offset, max_notes, result_spec):
+        self._enter("findNotesMetadata")
+        with self._lock:
+            notes = [n for n in self._notes.values()
+                     if n.active and (not note_filter.notebookGuid or n.notebookGuid == note_filter.notebookGuid)]
+        page = notes[offset:offset + min(max_notes, 250)]
+        return NotesMetadataList(
+            startIndex=offset,
+            totalNotes=len(notes),
+            notes=[NoteMetadata(
+                guid=n.guid,
+                title=n.title if result_spec.includeTitle else None,
+                created=n.created if result_spec.includeCreated else None,
+                notebookGuid=n.notebookGuid,
+                attributes=n.attributes if result_spec.includeAttributes else None,
+            ) for n in page],
+            updateCount=self._usn,
+        )
+
+    # Sync state
+    def getSyncState(self):
+        self._enter("getSyncState")
+        with self._lock:
+            return SyncState(currentTime=self._now_ms(), fullSyncBefore=0, updateCount=self._usn)
+
+    def getFilteredSyncChunk(self, after_usn, max_entries, sync_filter):
+        self._enter("getFilteredSyncChunk")
+        with self._lock:
+            notes = sorted((n for n in self._notes.values() if n.updateSequenceNum > after_usn),
+                           key=lambda n: n.updateSequenceNum)[:max_entries]
+            return SyncChunk(
+                currentTime=self._now_ms(),
+                chunkHighUSN=notes[-1].updateSequenceNum if notes else None,
+                updateCount=self._usn,
+                notes=notes if sync_filter.includeNotes else None,
+            )
+
+    def stats(self):
+        """Return call counts, injected errors and simulated rate limits."""
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "notes": len(self._notes),
+            }
+
+
+class _TokenDroppingHandler:
+    """Thrift handler that forwards NoteStore calls to a FakeNoteStore without the token."""
+
+    def __init__(self, store, note_store_url):
+        self._store = store
+        self._note_store_url = note_store_url
+
+    def getNoteStoreUrl(self, authenticationToken):
+        return self._note_store_url
+
+    def __getattr__(self, name):
+        method = getattr(self._store, name)
+        return lambda authenticationToken, *args: method(*args)
+
+
+class _BufferTransport(TTransportBase):
+    def __init__(self, data=b""):
+        self._buf = BytesIO(data)
+
+    def read(self, sz):
+        return self._buf.read(sz)
+
+    def readAll(self, sz):
+        return self._buf.read(sz)
+
+    def write(self, buf):
+        self._buf.write(buf)
+
+    def getvalue(self):
+        return self._buf.getvalue()
+
+
+class _ServerProtocol(TBinaryProtocol.TBinaryProtocol):
+    # The bundled Thrift reads the method name as bytes; the processor maps str names
+    def readMessageBegin(self):
+        name, message_type, seqid = super().readMessageBegin()
+        return (name.decode("utf-8") if isinstance(name, bytes) else name), message_type, seqid
+
+
+def serve(store, host="127.0.0.1", port=0):
+    """Serve a FakeNoteStore over Thrift HTTP in a background thread.
+
+    The server answers UserStore.getNoteStoreUrl on /edam/user and NoteStore
+    calls on /shard/s1/notestore. Point the poster at it with
+    "service_url": "http://<host>:<port>" in the evernote config section.
+
+    Returns:
+        The running ThreadingHTTPServer (call shutdown() to stop it)
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            processor = user_processor if self.path.startswith("/edam/user") else note_processor
+            out = _BufferTransport()
+            processor.process(_ServerProtocol(_BufferTransport(data)), _ServerProtocol(out))
+            body = out.getvalue()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-thrift")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    handler = _TokenDroppingHandler(store, f"http://{host}:{server.server_address[1]}/shard/s1/notestore")
+    user_processor = UserStore.Processor(handler)
+    note_processor = NoteStore.Processor(handler)
+    threading.Thread(target=server.serve_forever, name="fake-notestore", daemon=True).start()
+    logger.info(f"Fake NoteStore listening on http://{host}:{server.server_address[1]}")
+    return server
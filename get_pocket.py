@@ -7,17 +7,24 @@ import argparse
 import random
 import time
 import asyncio
+import importlib.util
 from datetime import datetime, timedelta
 import requests
 from requests.exceptions import RequestException, SSLError, ConnectionError, Timeout
 
-# Import scraping module (will be lazy-loaded when needed)
-try:
-    from scrap_site import scrape_website
-    scraping_available = True
-except ImportError:
+import http_client
+import metrics
+import profiling
+import scrape_scheduler
+from article import Article, dump_articles
+
+# The scraping module (and Playwright with it) is imported on the first scrape
+scraping_available = importlib.util.find_spec("scrap_site") is not None
+if not scraping_available:
     logging.warning("scrap_site module not found. Web scraping will not function properly.")
-    scraping_available = False
+_scraper = None
+# Shared ScrapePool (see start_scrape_pool); None scrapes on the calling thread
+_scrape_pool = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -36,24 +43,41 @@ def load_config(config_path="pipeline_config.json"):
         logger.error(f"Error loading config: {str(e)}")
         return None
 
-def fetch_pocket_articles(consumer_key, access_token, hours_lookback=24):
-    """Fetch articles from Pocket API.
+DEFAULT_POCKET_API_URL = "https://getpocket.com/v3"
+POCKET_GET_URL = DEFAULT_POCKET_API_URL + "/get"
+
+def configure(config=None):
+    """Apply settings from the "pocket" section of the pipeline config.
+    
+    Args:
+        config: Full pipeline configuration dictionary. Reads "api_url", the
+            base URL of the Pocket API (e.g. a local stand-in for benchmarks)
+    """
+    global POCKET_GET_URL
+    api_url = (config or {}).get("pocket", {}).get("api_url") or DEFAULT_POCKET_API_URL
+    POCKET_GET_URL = api_url.rstrip("/") + "/get"
+
+def pocket_get(consumer_key, access_token, params, timeout=30, max_retries=3, retry_delay=1.0):
+    """Call the Pocket /v3/get endpoint with retry logic.
     
     Args:
         consumer_key: Pocket API consumer key
         access_token: Pocket API access token
-        hours_lookback: Number of hours to look back for articles
+        params: Extra request parameters (state, sort, since, count, offset, ...)
+        timeout: Read timeout in seconds
+        max_retries: Maximum number of attempts
+        retry_delay: Base delay between retries in seconds
         
     Returns:
-        List of article dictionaries
+        Parsed JSON response dictionary, or None if the request failed
     """
-    logger.info(f"Fetching articles from Pocket (last {hours_lookback} hours)...")
-    
-    # Calculate the unix timestamp for hours_lookback
-    since = int((datetime.now() - timedelta(hours=hours_lookback)).timestamp())
-    
-    # Prepare API request
-    url = "https://getpocket.com/v3/get"
+    with metrics.timer("pocket_request_duration_seconds"):
+        result = _pocket_request(consumer_key, access_token, params, timeout, max_retries, retry_delay)
+    metrics.inc("pocket_requests_total", result="ok" if result is not None else "failed")
+    return result
+
+def _pocket_request(consumer_key, access_token, params, timeout, max_retries, retry_delay):
+    """Send the /v3/get request, retrying rate limits, server and network errors."""
     headers = {"Content-Type": "application/json; charset=UTF-8", "X-Accept": "application/json"}
     data = {
         "consumer_key": consumer_key,
@@ -61,12 +85,8 @@ def fetch_pocket_articles(consumer_key, access_token, hours_lookback=24):
         "state": "all",  # all, unread, archive
         "sort": "newest",  # newest, oldest, title, site
         "detailType": "complete",  # simple, complete
-        "since": since
     }
-    
-    # Maximum retries for Pocket API calls
-    max_retries = 3
-    retry_delay = 1.0
+    data.update(params)
     
     for attempt in range(max_retries):
         try:
@@ -76,72 +96,10 @@ def fetch_pocket_articles(consumer_key, access_token, hours_lookback=24):
                 logger.info(f"Retrying Pocket API call (attempt {attempt+1}/{max_retries}) after {retry_wait:.1f}s")
                 time.sleep(retry_wait)
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(POCKET_GET_URL, headers=headers, json=data, timeout=http_client.timeout(timeout))
             response.raise_for_status()  # Raise exception for 4XX/5XX status codes
             
-            result = response.json()
-            
-            # Check if we have any items
-            if "list" not in result or not result["list"]:
-                logger.info("No articles found in Pocket for the given time range.")
-                return []
-            
-            # Process the items into a more usable format
-            articles = []
-            for item_id, item in result["list"].items():
-                # Basic article info
-                article = {
-                    "item_id": item_id,
-                    "title": item.get("resolved_title") or item.get("given_title") or "Untitled",
-                    "url": item.get("resolved_url") or item.get("given_url"),
-                    "excerpt": item.get("excerpt", ""),
-                    "time_added": datetime.fromtimestamp(int(item.get("time_added", 0))).strftime('%Y-%m-%d %H:%M:%S'),
-                    "time_updated": datetime.fromtimestamp(int(item.get("time_updated", 0))).strftime('%Y-%m-%d %H:%M:%S'),
-                    "word_count": item.get("word_count", 0),
-                    "tags": list(item.get("tags", {}).keys())
-                }
-                
-                # Add content info based on type
-                content = {}
-                if item.get("has_video") == "2" and item.get("videos"):
-                    # YouTube content
-                    for vid in item.get("videos", {}).values():
-                        if vid.get("src").lower().find("youtube") >= 0:
-                            content = {
-                                "type": "youtube",
-                                "video_id": vid.get("vid")
-                            }
-                            break
-                elif item.get("has_image") == "1" and item.get("images"):
-                    # Image content
-                    content = {
-                        "type": "image",
-                        "image_url": next(iter(item.get("images", {}).values()), {}).get("src", "")
-                    }
-                else:
-                    # Article content
-                    excerpt = item.get("excerpt", "")
-                    if not excerpt or len(excerpt.strip()) < 100:  # If no excerpt or very short excerpt
-                        # Try to scrape content
-                        url = item.get("resolved_url") or item.get("given_url")
-                        scraped_content = scrape_article_content(url)
-                        content = {
-                            "type": "article",
-                            "content": scraped_content if scraped_content else excerpt,
-                            "scraped": scraped_content is not None
-                        }
-                    else:
-                        content = {
-                            "type": "article",
-                            "content": excerpt,
-                            "scraped": False
-                        }
-                
-                article["content"] = content
-                articles.append(article)
-            
-            logger.info(f"Found {len(articles)} articles in Pocket")
-            return articles
+            return response.json()
             
         except requests.exceptions.HTTPError as e:
             # Handle specific HTTP errors
@@ -154,31 +112,203 @@ def fetch_pocket_articles(consumer_key, access_token, hours_lookback=24):
                     continue
             
             # For other HTTP errors, no need to retry
-            return []
+            return None
             
         except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
             logger.error(f"Network error when fetching from Pocket API (attempt {attempt+1}/{max_retries}): {str(e)}")
             if attempt < max_retries - 1:
                 continue
-            return []
+            return None
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error when fetching from Pocket API: {str(e)}")
             if attempt < max_retries - 1:
                 continue
-            return []
+            return None
             
         except json.JSONDecodeError as e:
             logger.error(f"Error decoding JSON response from Pocket API: {str(e)}")
-            return []
+            return None
             
         except Exception as e:
-            logger.error(f"Unexpected error processing Pocket data: {str(e)}")
-            return []
+            logger.error(f"Unexpected error calling Pocket API: {str(e)}")
+            return None
     
     # If we reach here, all retries failed
     logger.error(f"Failed to fetch articles from Pocket API after {max_retries} attempts")
-    return []
+    return None
+
+def build_article(item_id, item, content_store=None):
+    """Convert a raw Pocket item into an Article, scraping content when needed.
+    
+    Args:
+        item_id: Pocket item id
+        item: Raw item dictionary from the Pocket API
+        content_store: Optional ContentStore to spool scraped bodies into
+        
+    Returns:
+        Article record
+    """
+    # Basic article info (timestamps stay epoch ints, formatted lazily)
+    article = Article.from_pocket_item(item_id, item)
+    
+    # Add content info based on type
+    if item.get("has_video") == "2" and item.get("videos"):
+        # YouTube content
+        for vid in item.get("videos", {}).values():
+            if vid.get("src").lower().find("youtube") >= 0:
+                article.set_content("youtube", video_id=vid.get("vid"))
+                break
+    elif item.get("has_image") == "1" and item.get("images"):
+        # Image content
+        article.set_content(
+            "image",
+            image_url=next(iter(item.get("images", {}).values()), {}).get("src", "")
+        )
+    else:
+        # Article content
+        excerpt = item.get("excerpt", "")
+        if scrape_scheduler.needs_scrape(item):  # If no excerpt or very short excerpt
+            # Try to scrape content
+            url = item.get("resolved_url") or item.get("given_url")
+            scraped_content = scrape_article_content(url)
+            article.set_content(
+                "article",
+                scraped_content if scraped_content else excerpt,
+                store=content_store,
+                scraped=scraped_content is not None
+            )
+        else:
+            article.set_content("article", excerpt, scraped=False)
+    
+    return article
+
+def build_articles(result, content_store=None):
+    """Convert a Pocket /v3/get response into a list of Articles."""
+    # Pocket returns an empty list instead of a dict when nothing matches
+    items = result.get("list") or {}
+    return [build_article(item_id, item, content_store) for item_id, item in items.items()]
+
+def fetch_pocket_items(consumer_key, access_token, since):
+    """Fetch the raw items saved or changed since a timestamp, without scraping.
+    
+    Returns:
+        Dictionary of item_id to raw Pocket item, or None if the request failed
+    """
+    result = pocket_get(consumer_key, access_token, {"since": since})
+    if result is None:
+        return None
+    # Pocket returns an empty list instead of a dict when nothing matches
+    items = result.get("list") or {}
+    metrics.inc("articles_fetched_total", len(items))
+    return items
+
+def fetch_pocket_articles(consumer_key, access_token, hours_lookback=24, content_store=None):
+    """Fetch articles from Pocket API.
+    
+    Args:
+        consumer_key: Pocket API consumer key
+        access_token: Pocket API access token
+        hours_lookback: Number of hours to look back for articles
+        content_store: Optional ContentStore; scraped bodies are spooled to disk
+            instead of being held in memory
+        
+    Returns:
+        List of Article records
+    """
+    logger.info(f"Fetching articles from Pocket (last {hours_lookback} hours)...")
+    
+    # Calculate the unix timestamp for hours_lookback
+    since = int((datetime.now() - timedelta(hours=hours_lookback)).timestamp())
+    
+    with profiling.stage("fetch"):
+        items = fetch_pocket_items(consumer_key, access_token, since)
+    if items is None:
+        return []
+    
+    # Check if we have any items
+    if not items:
+        logger.info("No articles found in Pocket for the given time range.")
+        return []
+    
+    try:
+        with profiling.stage("scrape"):
+            # Cheapest items first (see scrape_scheduler.py); the articles keep Pocket's order
+            built = {
+                item_id: build_article(item_id, item, content_store)
+                for item_id, item in scrape_scheduler.order(items.items())
+            }
+            articles = [built[item_id] for item_id in items]
+    except Exception as e:
+        logger.error(f"Unexpected error processing Pocket data: {str(e)}")
+        return []
+    finally:
+        scrape_scheduler.save()
+    
+    logger.info(f"Found {len(articles)} articles in Pocket")
+    return articles
+
+def iter_pocket_pages(consumer_key, access_token, since, page_size=30):
+    """Yield the raw items saved since a timestamp, one page at a time.
+    
+    Nothing is scraped here, so the first items are available as soon as the
+    first page arrives. Pages are sorted oldest first, like fetch_pocket_page:
+    items saved while paging land after the last page instead of shifting
+    the offsets of the pages still to come.
+    
+    Args:
+        consumer_key: Pocket API consumer key
+        access_token: Pocket API access token
+        since: Unix timestamp of the oldest change to return
+        page_size: Items requested per call
+    
+    Yields:
+        Dictionary of item_id to raw item per page; None (as the last value)
+        if a request failed
+    """
+    offset = 0
+    while True:
+        result = pocket_get(
+            consumer_key, access_token, {"since": since, "sort": "oldest", "count": page_size, "offset": offset}
+        )
+        if result is None:
+            yield None
+            return
+        # Pocket returns an empty list instead of a dict when nothing matches
+        items = result.get("list") or {}
+        metrics.inc("articles_fetched_total", len(items))
+        yield items
+        if len(items) < page_size:
+            return
+        offset += page_size
+
+def fetch_pocket_page(consumer_key, access_token, offset, count, content_store=None):
+    """Fetch one page of the full Pocket library, oldest first.
+    
+    Sorting oldest-first keeps offsets stable while new items are saved,
+    which is what makes offset chunks safe to checkpoint and resume.
+    
+    Args:
+        consumer_key: Pocket API consumer key
+        access_token: Pocket API access token
+        offset: Index of the first item to return
+        count: Number of items to return
+        content_store: Optional ContentStore to spool scraped bodies into
+        
+    Returns:
+        List of Article records, or None if the request failed
+    """
+    result = pocket_get(consumer_key, access_token, {"sort": "oldest", "offset": offset, "count": count})
+    if result is None:
+        return None
+    return build_articles(result, content_store)
+
+def fetch_pocket_total(consumer_key, access_token):
+    """Return the total number of items in the Pocket library, or None on failure."""
+    result = pocket_get(consumer_key, access_token, {"detailType": "simple", "count": 1, "total": "1"})
+    if result is None or "total" not in result:
+        return None
+    return int(result["total"])
 
 def fetch_with_retry(url, max_retries=3, backoff_factor=0.5):
     """Fetches a URL with retry logic using requests.
@@ -216,7 +346,7 @@ def fetch_with_retry(url, max_retries=3, backoff_factor=0.5):
                 # Small random delay even on first attempt
                 time.sleep(random.uniform(0.2, 0.7))
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = http_client.get(url, headers=headers, timeout=http_client.timeout(15))
             response.raise_for_status()
             return response
             
@@ -226,7 +356,7 @@ def fetch_with_retry(url, max_retries=3, backoff_factor=0.5):
                 # Last attempt, try without SSL verification
                 try:
                     logger.warning(f"Trying final attempt without SSL verification for {url}")
-                    response = requests.get(url, headers=headers, timeout=15, verify=False)
+                    response = http_client.get(url, headers=headers, timeout=http_client.timeout(15), verify=False)
                     response.raise_for_status()
                     return response
                 except Exception as inner_e:
@@ -253,6 +383,18 @@ def fetch_with_retry(url, max_retries=3, backoff_factor=0.5):
     
     return None
 
+def load_scraper():
+    """Import scrap_site on first use and return it, or None if it is unavailable."""
+    global _scraper, scraping_available
+    if _scraper is None and scraping_available:
+        try:
+            import scrap_site
+            _scraper = scrap_site
+        except ImportError as e:
+            logger.warning(f"Could not import scrap_site, web scraping disabled: {e}")
+            scraping_available = False
+    return _scraper
+
 def scrape_article_content(url, timeout=30000):
     """Scrape content from a web page.
     
@@ -266,19 +408,90 @@ def scrape_article_content(url, timeout=30000):
     if not url:
         return None
         
-    if not scraping_available:
+    pool = _scrape_pool
+    if pool is not None:
+        return pool.scrape(url, timeout)
+    return _scrape_now(url, timeout)
+
+
+def _scrape_now(url, timeout):
+    """Scrape url on the calling thread with its warm browser."""
+    scraper = load_scraper()
+    if scraper is None:
         logger.error("Scraping module not available. Cannot scrape web content.")
         return None
     
     # Use the dedicated scraping module
-    return scrape_website(url, timeout=timeout)
+    started = time.monotonic()
+    try:
+        content = scraper.scrape_website(url, timeout=timeout)
+    finally:
+        elapsed = time.monotonic() - started
+        metrics.observe("scrape_duration_seconds", elapsed)
+        # Slow or failing domains are scheduled later next time
+        scrape_scheduler.record(url, elapsed)
+    metrics.inc("scrapes_total", result="ok" if content else "failed")
+    if content:
+        metrics.inc("scraped_characters_total", len(content))
+    return content
+
+
+def close_scraper():
+    """Close the calling thread's warm scraping browser, if one was launched."""
+    # Nothing to close if nothing was ever scraped
+    if _scraper is not None:
+        _scraper.close_browser()
+
+
+def start_scrape_pool(workers=None, cache_size=None):
+    """Route every scrape in the process through one shared ScrapePool.
+    
+    Concurrent runs then share a fixed number of browsers and reuse each
+    other's pages instead of each launching their own (see scrape_pool.py).
+    
+    Args:
+        workers: Number of scraping threads, one browser each
+        cache_size: Scraped pages kept for reuse until clear_scrape_cache()
+        
+    Returns:
+        The ScrapePool
+    """
+    global _scrape_pool
+    from scrape_pool import DEFAULT_CACHE_SIZE, DEFAULT_WORKERS, ScrapePool
+    if _scrape_pool is None:
+        _scrape_pool = ScrapePool(
+            _scrape_now,
+            close_scraper,
+            workers=DEFAULT_WORKERS if workers is None else workers,
+            cache_size=DEFAULT_CACHE_SIZE if cache_size is None else cache_size
+        )
+    return _scrape_pool
+
+
+def scrape_pool_running():
+    """Return True if scrapes go through a shared ScrapePool."""
+    return _scrape_pool is not None
+
+
+def clear_scrape_cache():
+    """Drop the pages cached by the shared ScrapePool, if one is running."""
+    if _scrape_pool is not None:
+        _scrape_pool.clear_cache()
+
+
+def stop_scrape_pool():
+    """Close the shared ScrapePool and its browsers; scrapes go back to the calling thread."""
+    global _scrape_pool
+    pool, _scrape_pool = _scrape_pool, None
+    if pool is not None:
+        pool.close()
 
 
 def save_articles_to_json(articles, output_folder="pocket_articles"):
     """Save articles to a JSON file with timestamp.
     
     Args:
-        articles: List of article dictionaries
+        articles: List of Article records or article dictionaries
         output_folder: Folder to save JSON file in
         
     Returns:
@@ -299,7 +512,7 @@ def save_articles_to_json(articles, output_folder="pocket_articles"):
     # Save articles to file
     try:
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(articles, f, ensure_ascii=False, indent=2)
+            dump_articles(articles, f)
         logger.info(f"Saved {len(articles)} articles to {filepath}")
         return filepath
     except Exception as e:
@@ -308,7 +521,7 @@ def save_articles_to_json(articles, output_folder="pocket_articles"):
 
 def check_playwright_installation():
     """Check if Playwright is installed and offer to install it if not."""
-    if not playwright_available:
+    if importlib.util.find_spec("playwright") is None:
         logger.warning("Playwright is not installed. JavaScript-heavy sites may not scrape properly.")
         try:
             user_input = input("Would you like to install Playwright now? (y/n): ")
@@ -323,29 +536,17 @@ def check_playwright_installation():
             logger.error(f"Error during Playwright installation: {e}")
     return False
 
-def main():
-    """Main function to fetch articles from Pocket."""
-    parser = argparse.ArgumentParser(description="Fetch articles from Pocket")
-    parser.add_argument("--config", default="pipeline_config.json", help="Path to config file")
-    parser.add_argument("--hours", type=int, help="Hours to look back for articles")
-    parser.add_argument("--save-to-file", action="store_true", help="Save articles to JSON file")
-    parser.add_argument("--run-evernote", action="store_true", help="Directly run Evernote posting after fetching")
-    parser.add_argument("--install-playwright", action="store_true", help="Install Playwright for better scraping of JavaScript-heavy sites")
-    args = parser.parse_args()
-    
-    # Check if we need to install Playwright
-    if args.install_playwright:
-        installed = check_playwright_installation()
-        if installed:
-            logger.info("Playwright installed. Please restart the script.")
-            sys.exit(0)
-    
-    # Load configuration
-    config = load_config(args.config)
-    if not config:
-        logger.error("Failed to load configuration. Exiting.")
-        sys.exit(1)
+def fetch_and_post(config, args):
+    """
+    Fetch articles from Pocket, then save and post them as the command line asks.
     
+    Args:
+        config: Loaded configuration
+        args: Parsed command line arguments of main()
+        
+    Returns:
+        Tuple of (success, fetched articles)
+    """
     # Get Pocket configuration
     pocket_config = config.get("pocket", {})
     
@@ -361,13 +562,17 @@ def main():
     
     if not articles:
         logger.warning("No articles found to process.")
-        sys.exit(0)
+        return True, articles
     
-    # Save to JSON file if requested
+    # Save to the article store (or a JSON snapshot with output.format "json") if requested
     json_file = None
     if args.save_to_file or config.get("output", {}).get("save_json", False):
-        json_folder = config.get("output", {}).get("json_folder", "pocket_articles")
-        json_file = save_articles_to_json(articles, json_folder)
+        if config.get("output", {}).get("format", "store") == "json":
+            json_folder = config.get("output", {}).get("json_folder", "pocket_articles")
+            json_file = save_articles_to_json(articles, json_folder)
+        else:
+            from article_store import save_articles_to_store, store_path
+            save_articles_to_store(articles, store_path(config))
     
     # Run Evernote posting if requested
     if args.run_evernote:
@@ -380,11 +585,54 @@ def main():
                 logger.info("Evernote posting completed successfully.")
             else:
                 logger.error("Evernote posting encountered errors.")
-                sys.exit(1)
+                return False, articles
         except ImportError:
             logger.error("Failed to import evernote_poster module. Make sure it's in the same directory.")
-            sys.exit(1)
+            return False, articles
+    
+    return True, articles
+
+def main():
+    """Main function to fetch articles from Pocket."""
+    parser = argparse.ArgumentParser(description="Fetch articles from Pocket")
+    parser.add_argument("--config", default="pipeline_config.json", help="Path to config file")
+    parser.add_argument("--hours", type=int, help="Hours to look back for articles")
+    parser.add_argument("--save-to-file", action="store_true", help="Save articles to JSON file")
+    parser.add_argument("--run-evernote", action="store_true", help="Directly run Evernote posting after fetching")
+    parser.add_argument("--install-playwright", action="store_true", help="Install Playwright for better scraping of JavaScript-heavy sites")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args)
+    
+    # Check if we need to install Playwright
+    if args.install_playwright:
+        installed = check_playwright_installation()
+        if installed:
+            logger.info("Playwright installed. Please restart the script.")
+            sys.exit(0)
+    
+    # Load configuration
+    config = load_config(args.config)
+    if not config:
+        logger.error("Failed to load configuration. Exiting.")
+        sys.exit(1)
+    
+    # Configure the shared HTTP connection pool
+    http_client.configure(config)
+    scrape_scheduler.configure(config)
+    metrics.configure(config)
+    
+    metrics.start_run()
+    success = False
+    articles = None
+    try:
+        success, articles = fetch_and_post(config, args)
+    finally:
+        metrics.finish_run(success, len(articles) if articles is not None else None, mode="fetch")
+    if not success:
+        sys.exit(1)
     
+    http_client.log_stats()
     logger.info("Pocket article fetching completed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+#http_client.py do not change filename do not remove line
+"""
+http_client.py - Shared pooled HTTP client for every module that talks HTTP.
+
+One requests.Session is kept for the whole process so Pocket API calls and
+static page fetches (get_pocket.py) reuse keep-alive connections instead of
+paying a new TCP/TLS handshake per request. The Evernote SDK opens its own
+connections; evernote_session.py routes its Thrift calls through this
+session too.
+"""
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Mapping
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Optional brotli support: only advertise "br" if we can decode it
+try:
+    import brotli  # noqa: F401
+    brotli_available = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        brotli_available = True
+    except ImportError:
+        brotli_available = False
+
+# Optional HTTP/2 support through httpx (pip install httpx[http2])
+try:
+    import httpx
+    import h2  # noqa: F401
+    http2_available = True
+except ImportError:
+    http2_available = False
+
+logger = logging.getLogger("http_client")
+
+# Defaults: (connect timeout, read timeout) in seconds
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_POOL_CONNECTIONS = 10  # number of hosts kept in the pool manager
+DEFAULT_POOL_MAXSIZE = 4  # connections kept alive per host
+
+_lock = threading.Lock()
+_session = None
+_http2_client = None
+_settings = {
+    "timeout": DEFAULT_TIMEOUT,
+    "pool_connections": DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+    "http2": False,
+}
+
+# Per-host connection statistics
+_stats = defaultdict(lambda: {"requests": 0, "new_connections": 0, "http2_requests": 0})
+
+
+def _record(host, key):
+    with _lock:
+        _stats[host][key] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    """Connection pool that counts newly opened connections."""
+
+    def _new_conn(self):
+        _record(self.host, "new_connections")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS connection pool that counts newly opened connections."""
+
+    def _new_conn(self):
+        _record(self.host, "new_connections")
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report connection reuse statistics."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _accept_encoding():
+    return "gzip, deflate, br" if brotli_available else "gzip, deflate"
+
+
+def configure(config=None):
+    """Apply settings from the "http" section of the pipeline config.
+
+    Must be called before the first request to take effect on pool sizes.
+
+    Args:
+        config: Full pipeline configuration dictionary (or None for defaults)
+    """
+    http_config = (config or {}).get("http", {})
+    with _lock:
+        if "connect_timeout" in http_config or "read_timeout" in http_config:
+            _settings["timeout"] = (
+                http_config.get("connect_timeout", DEFAULT_TIMEOUT[0]),
+                http_config.get("read_timeout", DEFAULT_TIMEOUT[1]),
+            )
+        _settings["pool_connections"] = http_config.get("pool_connections", _settings["pool_connections"])
+        _settings["pool_maxsize"] = http_config.get("pool_maxsize", _settings["pool_maxsize"])
+        _settings["http2"] = bool(http_config.get("http2", _settings["http2"]))
+
+    if _settings["http2"] and not http2_available:
+        logger.warning("HTTP/2 requested but httpx[http2] is not installed. Falling back to HTTP/1.1.")
+
+
+def timeout(read=None):
+    """Return the configured (connect, read) timeout, optionally with a caller-specific read timeout."""
+    connect, default_read = _settings["timeout"]
+    return (connect, default_read if read is None else read)
+
+
+def get_session():
+    """Return the process-wide pooled requests.Session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = _PooledAdapter(
+                pool_connections=_settings["pool_connections"],
+                pool_maxsize=_settings["pool_maxsize"],
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Accept-Encoding"] = _accept_encoding()
+            session.headers["Connection"] = "keep-alive"
+            _session = session
+        return _session
+
+
+def _get_http2_client():
+    global _http2_client
+    with _lock:
+        if _http2_client is None:
+            connect, read = _settings["timeout"]
+            _http2_client = httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_keepalive_connections=_settings["pool_maxsize"] * _settings["pool_connections"]),
+                headers={"Accept-Encoding": _accept_encoding()},
+            )
+        return _http2_client
+
+
+def _http2_request(method, url, **kwargs):
+    """Send a request over HTTP/2 and return it as a requests.Response.
+
+    Behaves like the requests path: redirects are followed unless
+    allow_redirects is false, and data is form-encoded when it is a mapping
+    and sent as the raw body otherwise. httpx exceptions are translated to
+    their requests equivalents so callers only ever need to handle requests
+    exceptions.
+    """
+    client = _get_http2_client()
+    timeout = kwargs.pop("timeout", None)
+    if isinstance(timeout, tuple):
+        timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+    data = kwargs.get("data")
+    body = {"data": data} if isinstance(data, Mapping) else {"content": data}
+    try:
+        r = client.request(
+            method,
+            url,
+            headers=kwargs.get("headers"),
+            params=kwargs.get("params"),
+            json=kwargs.get("json"),
+            follow_redirects=kwargs.get("allow_redirects", True),
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            **body,
+        )
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e))
+    except httpx.ConnectError as e:
+        if "SSL" in str(e) or "certificate" in str(e).lower():
+            raise requests.exceptions.SSLError(str(e))
+        raise requests.exceptions.ConnectionError(str(e))
+    except httpx.HTTPError as e:
+        raise requests.exceptions.RequestException(str(e))
+
+    response = requests.Response()
+    response.status_code = r.status_code
+    response.reason = r.reason_phrase
+    response.headers = CaseInsensitiveDict(r.headers)
+    response.url = str(r.url)
+    response.encoding = r.encoding
+    response._content = r.content
+    return response
+
+
+def request(method, url, **kwargs):
+    """Send a request through the shared pool.
+
+    Accepts the same keyword arguments as requests.Session.request. A default
+    (connect, read) timeout is applied when none is given.
+
+    Returns:
+        requests.Response
+    """
+    kwargs.setdefault("timeout", _settings["timeout"])
+    host = urlsplit(url).hostname
+
+    # Custom certificate verification (verify=False or a CA bundle) and streaming
+    # are per-request options only the requests path supports
+    if _settings["http2"] and http2_available and kwargs.get("verify", True) is True and not kwargs.get("stream"):
+        _record(host, "http2_requests")
+        return _http2_request(method, url, **kwargs)
+
+    _record(host, "requests")
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """GET a URL through the shared pool."""
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    """POST to a URL through the shared pool."""
+    return request("POST", url, **kwargs)
+
+
+def get_stats():
+    """Return connection reuse statistics per host.
+
+    Returns:
+        Dictionary mapping host to requests, new_connections, reused and http2_requests counts.
+        "reused" only covers HTTP/1.1 requests; HTTP/2 multiplexes over one connection.
+    """
+    with _lock:
+        stats = {}
+        for host, s in _stats.items():
+            reused = max(s["requests"] - s["new_connections"], 0)
+            stats[host] = dict(s, reused=reused)
+        return stats
+
+
+def log_stats():
+    """Log a one-line connection reuse summary per host."""
+    for host, s in sorted(get_stats().items()):
+        logger.info(
+            f"HTTP pool {host}: {s['requests']} requests, {s['new_connections']} new connections, "
+            f"{s['reused']} reused" + (f", {s['http2_requests']} over HTTP/2" if s["http2_requests"] else "")
+        )
+
+
+def close():
+    """Close all pooled connections."""
+    global _session, _http2_client
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _http2_client is not None:
+            _http2_client.close()
+            _http2_client = None
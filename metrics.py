@@ -0,0 +1,299 @@
+#metrics.py do not change filename do not remove line
+"""
+metrics.py - Process-wide run metrics with Prometheus textfile and JSON export.
+
+Modules record counters, gauges and histograms here as they work (Pocket
+requests, scrapes, Evernote notes, stage durations). At the end of every
+pipeline run the registry is written as:
+
+- a Prometheus textfile-collector file (metrics.textfile), replaced
+  atomically so node_exporter never reads half a file; values are
+  cumulative for the life of the process, as Prometheus expects;
+- one JSON line per run appended to metrics.summary_path, holding only what
+  that run recorded, so runs can be compared across days.
+
+Recording is a dictionary update under a lock and has no dependencies, so it
+is always on; only the export is configured.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger("metrics")
+
+PREFIX = "pocket_pipeline_"
+DEFAULT_SUMMARY_PATH = os.path.join("metrics", "runs.jsonl")
+
+# Upper bounds in seconds; +Inf is implied
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Every metric the pipeline records: name -> (type, help)
+METRICS = {
+    "runs_total": ("counter", "Pipeline runs by result"),
+    "run_duration_seconds": ("histogram", "Wall time of a pipeline run"),
+    "stage_duration_seconds": ("histogram", "Wall time of a pipeline stage"),
+    "articles_fetched_total": ("counter", "Articles fetched from Pocket"),
+    "last_run_articles": ("gauge", "Articles handled by the last run"),
+    "last_run_success": ("gauge", "1 if the last run succeeded, else 0"),
+    "last_run_timestamp_seconds": ("gauge", "Unix time the last run finished"),
+    "first_note_seconds": ("gauge", "Seconds from the start of the last streaming run to its first note"),
+    "pocket_requests_total": ("counter", "Pocket API requests by result"),
+    "pocket_request_duration_seconds": ("histogram", "Pocket API request latency, retries included"),
+    "scrapes_total": ("counter", "Article scrapes by result"),
+    "scrape_duration_seconds": ("histogram", "Time to scrape one article"),
+    "scraped_characters_total": ("counter", "Characters of article text scraped"),
+    "scrape_retries_total": ("counter", "Scrape attempts retried after a navigation or browser error"),
+    "page_load_duration_seconds": ("histogram", "Time for a scraped page to reach DOMContentLoaded"),
+    "browser_launches_total": ("counter", "Playwright browsers launched"),
+    "evernote_api_calls_total": ("counter", "Evernote NoteStore calls by method"),
+    "evernote_notes_total": ("counter", "Outbox notes sent to Evernote by result"),
+    "evernote_note_duration_seconds": ("histogram", "Time to create or update one note, rate-limit waits included"),
+    "evernote_rate_limits_total": ("counter", "RATE_LIMIT_REACHED errors from Evernote"),
+    "evernote_notes_queued_total": ("counter", "Notes rendered into the outbox"),
+    "evernote_articles_skipped_total": ("counter", "Articles skipped because their note is already up to date"),
+    "outbox_pending": ("gauge", "Notes waiting in the outbox after the last post"),
+    "account_runs_total": ("counter", "Per-account runs of a multi-account pipeline by account and result"),
+    "account_last_run_articles": ("gauge", "Articles handled by the account's last run"),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+_baseline = None
+_run_started = None
+_settings = {"textfile": None, "summary_path": DEFAULT_SUMMARY_PATH}
+
+
+def _key(name, labels):
+    if name not in METRICS:
+        raise KeyError(f"Unknown metric: {name}")
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def configure(config=None):
+    """Apply settings from the "metrics" section of the pipeline config.
+
+    Args:
+        config: Full pipeline configuration dictionary. Reads "textfile" (the
+            .prom file for node_exporter's textfile collector, off by default)
+            and "summary_path" (the JSON lines run log; null turns it off)
+    """
+    metrics_config = (config or {}).get("metrics", {})
+    with _lock:
+        _settings["textfile"] = metrics_config.get("textfile")
+        _settings["summary_path"] = metrics_config.get("summary_path", DEFAULT_SUMMARY_PATH)
+
+
+def inc(name, value=1, **labels):
+    """Add value to a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    """Set a gauge to value."""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+def observe(name, value, **labels):
+    """Record one observation in a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {"buckets": [0] * (len(DEFAULT_BUCKETS) + 1), "sum": 0.0, "count": 0}
+        hist["buckets"][bisect.bisect_left(DEFAULT_BUCKETS, value)] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+@contextmanager
+def timer(name, **labels):
+    """Observe the wall time of the with-block in a histogram, even if it raises."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        observe(name, time.monotonic() - started, **labels)
+
+
+def snapshot():
+    """Return a copy of every metric: {"counters", "gauges", "histograms"} keyed by (name, labels)."""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {key: {"buckets": list(h["buckets"]), "sum": h["sum"], "count": h["count"]}
+                           for key, h in _histograms.items()},
+        }
+
+
+def reset():
+    """Forget every recorded value."""
+    global _baseline, _run_started
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+        _baseline = None
+        _run_started = None
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def to_prometheus(snap=None):
+    """Render a snapshot in the Prometheus text exposition format."""
+    snap = snap or snapshot()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        series = {
+            "counter": snap["counters"], "gauge": snap["gauges"], "histogram": snap["histograms"]
+        }[kind]
+        keys = sorted(key for key in series if key[0] == name)
+        if not keys:
+            continue
+        full = PREFIX + name
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {kind}")
+        for key in keys:
+            labels = key[1]
+            value = series[key]
+            if kind != "histogram":
+                lines.append(f"{full}{_label_text(labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(DEFAULT_BUCKETS + (float("inf"),), value["buckets"]):
+                cumulative += count
+                lines.append(f"{full}_bucket{_label_text(labels, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{full}_sum{_label_text(labels)} {_number(value['sum'])}")
+            lines.append(f"{full}_count{_label_text(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path):
+    """Write the Prometheus textfile atomically (write a temp file, then rename)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _series_name(key):
+    name, labels = key
+    return name + _label_text(labels)
+
+
+def summarize(since=None):
+    """Return a JSON-friendly view of the metrics recorded after the since snapshot.
+
+    Counters and histograms are reported as the difference from since, gauges
+    as their current value. Histograms are reduced to count, sum and mean.
+    """
+    snap = snapshot()
+    since = since or {"counters": {}, "gauges": {}, "histograms": {}}
+    counters = {}
+    for key, value in snap["counters"].items():
+        delta = value - since["counters"].get(key, 0)
+        if delta:
+            counters[_series_name(key)] = delta
+    histograms = {}
+    for key, hist in snap["histograms"].items():
+        before = since["histograms"].get(key, {"sum": 0.0, "count": 0})
+        count = hist["count"] - before["count"]
+        if count:
+            total = hist["sum"] - before["sum"]
+            histograms[_series_name(key)] = {"count": count, "sum": round(total, 3), "mean": round(total / count, 3)}
+    gauges = {_series_name(key): value for key, value in snap["gauges"].items()}
+    return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+def start_run():
+    """Mark the start of a pipeline run; its summary only covers what is recorded from now on."""
+    global _baseline, _run_started
+    baseline = snapshot()
+    with _lock:
+        _baseline = baseline
+        _run_started = time.time()
+
+
+def finish_run(success, articles=None, mode=None):
+    """Record the run's outcome and export the metrics.
+
+    Args:
+        success: Whether the run succeeded
+        articles: Number of articles the run handled, if known
+        mode: Short description of the run (e.g. "steps", "stream", "file")
+
+    Returns:
+        The run summary dictionary
+    """
+    finished = time.time()
+    started = _run_started or finished
+    result = "success" if success else "failure"
+    inc("runs_total", result=result)
+    observe("run_duration_seconds", finished - started)
+    set_gauge("last_run_success", 1 if success else 0)
+    set_gauge("last_run_timestamp_seconds", int(finished))
+    if articles is not None:
+        set_gauge("last_run_articles", articles)
+
+    summary = {
+        "started": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "duration_s": round(finished - started, 3),
+        "success": bool(success),
+        "mode": mode,
+        "articles": articles,
+    }
+    summary.update(summarize(_baseline))
+    export(summary)
+    return summary
+
+
+def export(summary=None):
+    """Write the configured textfile, and append summary to the run log if given.
+
+    Export failures are logged and never fail the pipeline.
+    """
+    textfile = _settings["textfile"]
+    if textfile:
+        try:
+            write_textfile(textfile)
+        except Exception as e:
+            logger.error(f"Error writing metrics textfile {textfile}: {str(e)}")
+    summary_path = _settings["summary_path"]
+    if summary is not None and summary_path:
+        try:
+            directory = os.path.dirname(summary_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(summary_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(summary, ensure_ascii=False, sort_keys=True) + "\n")
+        except Exception as e:
+            logger.error(f"Error writing run summary {summary_path}: {str(e)}")
@@ -0,0 +1,194 @@
+#outbox.py do not change filename do not remove line
+"""
+outbox.py - Durable outbox of rendered notes waiting to be posted to Evernote.
+
+Notes are rendered once and stored here before any API call. Each entry keeps
+its attempt count, the time it next becomes eligible and the last error, so a
+rate limit or transient failure only defers the entry; any later run picks it
+up again and nothing is lost.
+
+Entries that fail with a permanent error, or keep failing for MAX_ATTEMPTS
+attempts, are moved to the dead letters: they stay in the database (so the
+article is not queued again every run) but are no longer posted or counted
+as pending. revive_dead() puts them back in line once the cause is fixed.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("outbox")
+
+# Backoff for failed entries: BASE_DELAY * 2^(attempts-1), capped at MAX_DELAY seconds
+BASE_DELAY = 60
+MAX_DELAY = 24 * 3600
+# Failed attempts after which an entry becomes a dead letter
+MAX_ATTEMPTS = 8
+
+
+class Outbox:
+    """SQLite-backed outbox.
+
+    Args:
+        path: Path to the SQLite database file (shared with the SyncIndex)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT UNIQUE NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_eligible_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            if "dead" not in columns:
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN dead INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_next_eligible ON outbox(next_eligible_at)")
+            # Keys of the articles an entry carries when it is not a single article (digests)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS outbox_members (
+                    member_key TEXT PRIMARY KEY,
+                    entry_key TEXT NOT NULL
+                )"""
+            )
+
+    def put(self, key, payload, members=None):
+        """Add a rendered note, or refresh the payload of an existing entry.
+
+        An existing entry keeps its attempt count and eligibility time.
+
+        Args:
+            key: Entry key
+            payload: JSON-serializable note payload
+            members: Optional keys of the articles the entry carries; contains()
+                reports them as queued too
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO outbox (key, payload, next_eligible_at, created_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET payload = excluded.payload""",
+                (key, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            if members:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO outbox_members (member_key, entry_key) VALUES (?, ?)",
+                    [(member, key) for member in members],
+                )
+
+    def contains(self, key):
+        """Return True if a note with this key (or carrying this article key) is in the outbox, dead letters included."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM outbox WHERE key = ? UNION ALL SELECT 1 FROM outbox_members WHERE member_key = ?",
+                (key, key),
+            ).fetchone() is not None
+
+    def due(self, now=None, limit=None):
+        """Return entries eligible for posting, oldest first."""
+        now = time.time() if now is None else now
+        query = "SELECT * FROM outbox WHERE dead = 0 AND next_eligible_at <= ? ORDER BY next_eligible_at, id"
+        params = [now]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        entries = []
+        for row in rows:
+            entry = dict(row)
+            entry["payload"] = json.loads(entry["payload"])
+            entries.append(entry)
+        return entries
+
+    def remove(self, entry_id):
+        """Remove an entry after it was posted."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM outbox_members WHERE entry_key = (SELECT key FROM outbox WHERE id = ?)", (entry_id,)
+            )
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def defer(self, entry_id, error, delay=None, count_attempt=True, permanent=False):
+        """Record a failed attempt and push the entry's eligibility into the future.
+
+        Args:
+            entry_id: Outbox entry id
+            error: Description of the last error
+            delay: Seconds to wait; defaults to exponential backoff on the attempt count
+            count_attempt: Whether this counts as a failed attempt (rate limits do not)
+            permanent: The error will not go away by retrying; dead-letter the entry now
+
+        Returns:
+            True if the entry was moved to the dead letters
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT key, attempts FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return False
+            attempts = row["attempts"] + (1 if count_attempt else 0)
+            if permanent or attempts >= MAX_ATTEMPTS:
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = ?, dead = 1, last_error = ? WHERE id = ?",
+                    (attempts, str(error), entry_id),
+                )
+                logger.error(f"Outbox entry {row['key']} moved to the dead letters after {attempts} attempts: {error}")
+                return True
+            if delay is None:
+                delay = min(MAX_DELAY, BASE_DELAY * (2 ** max(attempts - 1, 0)))
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, next_eligible_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, str(error), entry_id),
+            )
+            return False
+
+    def postpone_due(self, until):
+        """Make every currently eligible entry wait until the given epoch time."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET next_eligible_at = ? WHERE dead = 0 AND next_eligible_at < ?", (until, until)
+            )
+
+    def dead_letters(self):
+        """Return the dead-lettered entries with their attempt count and last error."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, attempts, last_error FROM outbox WHERE dead = 1 ORDER BY id"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def revive_dead(self):
+        """Put every dead letter back in line with a fresh attempt count; returns how many."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE outbox SET dead = 0, attempts = 0, next_eligible_at = ? WHERE dead = 1", (time.time(),)
+            ).rowcount
+
+    def count(self):
+        """Return the number of entries waiting to be posted (dead letters excluded)."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE dead = 0").fetchone()[0]
+
+    def due_count(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE dead = 0 AND next_eligible_at <= ?", (now,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
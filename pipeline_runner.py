@@ -2,12 +2,25 @@
 import os
 import sys
 import json
+import time
+import signal
 import argparse
 import logging
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 
-from get_pocket import fetch_pocket_articles
-from evernote_poster import post_to_evernote
+from article import ContentStore, dump_articles
+from article_archive import ARCHIVE_SUFFIX, iter_articles_file, write_archive
+from article_store import save_articles_to_store, store_path
+import metrics
+import profiling
+import scrape_scheduler
+from run_ledger import DEFAULT_LEDGER_PATH, RunLedger
+
+# Heavy subsystems are imported where they are first used, so startup and
+# --help do not pay for them: get_pocket (requests, and Playwright on
+# the first scrape), evernote_poster (the Evernote Thrift SDK), backfill,
+# streaming and http_client.
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +29,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger("pipeline_runner")
 
+# Daemon defaults (daemon.poll_interval / daemon.overlap_seconds)
+DEFAULT_POLL_INTERVAL = 900
+DAEMON_OVERLAP_SECONDS = 300
+
 def load_pipeline_config(config_path="pipeline_config.json"):
     """Load pipeline configuration from JSON file."""
     try:
@@ -54,7 +71,78 @@ def load_pipeline_config(config_path="pipeline_config.json"):
         logger.error(f"Error loading pipeline config: {str(e)}")
         return None
 
-def fetch_pocket_and_save(config, hours_lookback=None, save_to_file=False):
+def get_content_store(config):
+    """Return the ContentStore used to spool scraped article bodies to disk."""
+    spool_dir = config.get('output', {}).get(
+        'content_spool',
+        os.path.join(config.get('output', {}).get('json_folder', 'pocket_articles'), '.content')
+    )
+    return ContentStore(spool_dir)
+
+def save_articles_file(config, articles):
+    """Save articles and return where they went.
+    
+    Articles are upserted into the indexed article store unless output.format
+    asks for a timestamped file per run: "archive" (compressed, see
+    article_archive.py) or "json" (the legacy pretty-printed snapshot).
+    """
+    output_format = config.get('output', {}).get('format', 'store')
+    if output_format not in ('json', 'archive'):
+        return save_articles_to_store(articles, store_path(config))
+    
+    # Create the output directory if it doesn't exist
+    os.makedirs(config['output']['json_folder'], exist_ok=True)
+    
+    # Create filename with timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if output_format == 'archive':
+        archive_file = os.path.join(config['output']['json_folder'], f'pocket_articles_{timestamp}{ARCHIVE_SUFFIX}')
+        count = write_archive(articles, archive_file)
+        logger.info(f"Saved {count} articles to {archive_file}")
+        return archive_file
+    
+    json_file = os.path.join(config['output']['json_folder'], f'pocket_articles_{timestamp}.json')
+    
+    # Save to a JSON file, one article at a time
+    with open(json_file, 'w', encoding='utf-8') as f:
+        dump_articles(articles, f)
+    
+    logger.info(f"Saved {len(articles)} articles to {json_file}")
+    return json_file
+
+def fetch_ledger_articles(config, ledger, content_store=None):
+    """
+    Fetch and scrape the ledger run's articles, checkpointing each one.
+    
+    A resumed run skips the Pocket call when its fetch had finished and only
+    scrapes the articles the ledger has no scraped copy of.
+    
+    Returns:
+        List of Article records, or None if the Pocket request failed
+    """
+    from get_pocket import build_article, fetch_pocket_items
+    
+    if not ledger.fetch_done:
+        with profiling.stage("fetch"):
+            items = fetch_pocket_items(config['pocket']['consumer_key'], config['pocket']['access_token'], ledger.since)
+        if items is None:
+            return None
+        ledger.record_fetched(items.items())
+        ledger.mark_fetch_done()
+    
+    pending = ledger.unscraped_items()
+    if pending:
+        logger.info(f"Scraping {len(pending)} articles")
+    try:
+        with profiling.stage("scrape"):
+            # Cheapest first, so most articles are checkpointed early (see scrape_scheduler.py)
+            for item_id, item in scrape_scheduler.order(pending):
+                ledger.record_scraped(build_article(item_id, item, content_store))
+    finally:
+        scrape_scheduler.save()
+    return ledger.scraped_articles(content_store)
+
+def fetch_pocket_and_save(config, hours_lookback=None, save_to_file=False, content_store=None, ledger=None):
     """
     Fetch articles from Pocket and optionally save to file.
     
@@ -62,25 +150,36 @@ def fetch_pocket_and_save(config, hours_lookback=None, save_to_file=False):
         config: Pipeline configuration
         hours_lookback: Number of hours to look back for articles
         save_to_file: Whether to save articles to JSON file
+        content_store: Optional ContentStore to spool scraped bodies into
+        ledger: Optional RunLedger with a started or resumed run to checkpoint
+            into (its window replaces hours_lookback)
         
     Returns:
         Tuple of (articles, json_file_path)
-        articles: List of article dictionaries
+        articles: List of Article records
         json_file_path: Path to saved JSON file (or None if not saved)
     """
     # Determine hours lookback
     if hours_lookback is None:
         hours_lookback = config['pocket']['hours_lookback']
     
-    logger.info(f"Fetching articles from Pocket (last {hours_lookback} hours)")
+    if ledger is not None:
+        logger.info(f"Fetching articles from Pocket (since {datetime.fromtimestamp(ledger.since)})")
+    else:
+        logger.info(f"Fetching articles from Pocket (last {hours_lookback} hours)")
     
     try:
         # Fetch the articles
-        articles = fetch_pocket_articles(
-            consumer_key=config['pocket']['consumer_key'],
-            access_token=config['pocket']['access_token'],
-            hours_lookback=hours_lookback
-        )
+        if ledger is not None:
+            articles = fetch_ledger_articles(config, ledger, content_store)
+        else:
+            from get_pocket import fetch_pocket_articles
+            articles = fetch_pocket_articles(
+                consumer_key=config['pocket']['consumer_key'],
+                access_token=config['pocket']['access_token'],
+                hours_lookback=hours_lookback,
+                content_store=content_store
+            )
         
         if not articles:
             logger.warning("No articles found.")
@@ -89,18 +188,7 @@ def fetch_pocket_and_save(config, hours_lookback=None, save_to_file=False):
         json_file = None
         # Save to file only if explicitly requested
         if save_to_file:
-            # Create the output directory if it doesn't exist
-            os.makedirs(config['output']['json_folder'], exist_ok=True)
-            
-            # Create filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            json_file = os.path.join(config['output']['json_folder'], f'pocket_articles_{timestamp}.json')
-            
-            # Save to a JSON file
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(articles, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"Saved {len(articles)} articles to {json_file}")
+            json_file = save_articles_file(config, articles)
         else:
             logger.info(f"Found {len(articles)} articles (not saved to file)")
         
@@ -110,6 +198,363 @@ def fetch_pocket_and_save(config, hours_lookback=None, save_to_file=False):
         logger.error(f"Error fetching Pocket articles: {e}")
         return None, None
 
+def run_backfill_pipeline(config, config_path, evernote_enabled, chunk_size=None, workers=None):
+    """
+    Backfill the whole Pocket library and optionally post it to Evernote.
+    
+    Chunks are posted one file at a time so memory stays bounded by the chunk size.
+    
+    Returns:
+        Boolean indicating success or failure
+    """
+    from backfill import run_backfill
+    from evernote_poster import post_to_evernote
+    
+    logger.info("Step 1: Backfilling the full Pocket library")
+    with profiling.stage("backfill"):
+        chunk_files = run_backfill(config, chunk_size=chunk_size, workers=workers)
+    scrape_scheduler.save()
+    if chunk_files is None:
+        return False
+    logger.info(f"Step 1 complete: {len(chunk_files)} backfill chunks available")
+    
+    if not evernote_enabled:
+        logger.info("\nStep 2 skipped: Evernote sync not enabled")
+        return True
+    
+    logger.info("\nStep 2: Posting backfilled articles to Evernote")
+    for chunk_file in chunk_files:
+        if not post_to_evernote(chunk_file, config_path=config_path, config=config):
+            logger.error(f"Step 2 failed: Error posting {chunk_file} to Evernote")
+            return False
+    logger.info("Step 2 complete: Backfilled articles posted to Evernote")
+    return True
+
+def post_articles(articles, config, config_path, ledger=None):
+    """
+    Post articles through one PosterSession and record how far each got in the ledger.
+    
+    Returns:
+        Boolean indicating success or failure
+    """
+    from evernote_poster import open_poster_session
+    
+    poster = open_poster_session(config_path, config=config)
+    if poster is None:
+        return False
+    try:
+        success = poster.submit(articles)
+        if success:
+            poster.finish()
+        if ledger is not None:
+            ledger.record_post_stages(poster, articles)
+        return success
+    finally:
+        poster.close()
+
+def open_run_ledger(config, hours_lookback, resume=False):
+    """Open the run ledger and start a new run, or resume the last unfinished one."""
+    ledger = RunLedger(config.get('ledger', {}).get('path', DEFAULT_LEDGER_PATH))
+    if resume:
+        if ledger.resume_run() is not None:
+            return ledger
+        logger.info("No unfinished run to resume, starting a new one")
+    ledger.start_run((datetime.now() - timedelta(hours=hours_lookback)).timestamp())
+    return ledger
+
+def run_streaming_pipeline(config, config_path, hours_lookback, save_to_file, evernote_enabled, content_store, ledger=None):
+    """
+    Run one cycle with fetch, scrape and post overlapped (see streaming.py).
+    
+    Returns:
+        Boolean indicating success or failure
+    """
+    from streaming import run_streaming
+    
+    poster = None
+    if evernote_enabled:
+        from evernote_poster import open_poster_session
+        poster = open_poster_session(config_path, config=config)
+        if poster is None:
+            logger.error("Evernote posting is not configured. Pipeline aborted.")
+            return False
+    else:
+        logger.info("Evernote sync not enabled: streaming fetch and scrape only")
+    
+    try:
+        with metrics.timer("stage_duration_seconds", stage="stream"), profiling.stage("stream"):
+            articles, success = run_streaming(config, hours_lookback, content_store, poster, ledger)
+        if poster is not None:
+            poster.finish()
+    finally:
+        if poster is not None:
+            poster.close()
+    
+    if not articles:
+        logger.error("Failed to fetch articles from Pocket. Pipeline aborted.")
+        return False
+    if save_to_file:
+        save_articles_file(config, articles)
+    return success
+
+def run_pipeline_once(config, config_path, hours_lookback, save_to_file, evernote_enabled, content_store, resume=False,
+                      account=None):
+    """
+    Run one fetch-and-post cycle: fetch recent Pocket articles and post them to Evernote.
+    
+    Every article's progress is checkpointed in the run ledger. A run that
+    fails or dies stays open, and resume=True picks it up where it stopped.
+    
+    The run's metrics are exported when it ends (see metrics.py). The run of
+    one account of several is recorded under its name instead, and exported
+    with the others by run_accounts_once.
+    
+    Returns:
+        Boolean indicating success or failure
+    """
+    if account is None:
+        metrics.start_run()
+    streaming = config.get('stream', {}).get('enabled', False)
+    success = False
+    articles = None
+    ledger = open_run_ledger(config, hours_lookback, resume)
+    try:
+        if streaming:
+            success = run_streaming_pipeline(
+                config, config_path, hours_lookback, save_to_file, evernote_enabled, content_store, ledger
+            )
+        else:
+            success = run_pipeline_steps(config, config_path, save_to_file, evernote_enabled, content_store, ledger)
+        articles = len(ledger.known_item_ids())
+        # A window with nothing in it leaves nothing to resume either
+        ledger.finish_run(success or (ledger.fetch_done and not articles))
+        return success
+    finally:
+        ledger.close()
+        if account is None:
+            metrics.finish_run(success, articles, mode="stream" if streaming else "steps")
+        else:
+            metrics.inc("account_runs_total", account=account, result="success" if success else "failure")
+            if articles is not None:
+                metrics.set_gauge("account_last_run_articles", articles, account=account)
+
+def run_file_pipeline(json_file, config_path, config, evernote_enabled):
+    """
+    Post an existing archive / legacy JSON file to Evernote, or just count its articles.
+    
+    Args:
+        json_file: Path to the article file
+        config_path: Path to the configuration file
+        config: Account configuration to post with, or None for the file at config_path
+        evernote_enabled: Whether to post the articles to Evernote
+        
+    Returns:
+        Tuple of (success, number of articles read or None when they were posted)
+    """
+    logger.info(f"Using provided article file: {json_file}")
+    if not os.path.exists(json_file):
+        logger.error(f"File not found: {json_file}")
+        return False, None
+    
+    # Step 2: Post to Evernote if enabled (the file is streamed in batches)
+    if evernote_enabled:
+        logger.info("\nStep 2: Posting articles directly to Evernote")
+        from evernote_poster import post_to_evernote
+        if not post_to_evernote(json_file, config_path=config_path, config=config):
+            logger.error("Step 2 failed: Error posting to Evernote")
+            return False, None
+        logger.info("Step 2 complete: Articles posted to Evernote")
+        return True, None
+    
+    try:
+        count = sum(1 for _ in iter_articles_file(json_file))
+        logger.info(f"Read {count} articles from {json_file}")
+    except Exception as e:
+        logger.error(f"Error loading articles from {json_file}: {e}")
+        return False, None
+    logger.info("\nStep 2 skipped: Evernote sync not enabled")
+    return True, count
+
+def run_accounts_once(accounts, config_path, lookbacks, save_to_file, evernote_enabled, content_stores, resume=False):
+    """
+    Run one cycle for every account at the same time, one thread per account.
+    
+    The accounts share the process's HTTP connection pool and scrape pool
+    (browsers and scraped pages). Each keeps its own Pocket window, run
+    ledger, dedup index, outbox and Evernote rate limiter.
+    
+    Args:
+        accounts: List of (name, config) pairs from accounts.account_configs
+        config_path: Path of the configuration file the accounts come from
+        lookbacks: Dictionary of account name to hours to look back
+        save_to_file: Whether to save each account's articles
+        evernote_enabled: Post every account to Evernote (otherwise each
+            account's evernote.enabled decides)
+        content_stores: Dictionary of account name to ContentStore
+        resume: Continue each account's last unfinished run
+        
+    Returns:
+        Dictionary of account name to success
+    """
+    metrics.start_run()
+    results = {}
+    
+    def run_account(name, account_config):
+        enabled = evernote_enabled or account_config.get('evernote', {}).get('enabled', False)
+        logger.info(f"Account {name}: starting (last {lookbacks[name]:.1f} hours)")
+        try:
+            results[name] = run_pipeline_once(
+                account_config, config_path, lookbacks[name], save_to_file, enabled, content_stores[name],
+                resume=resume, account=name
+            )
+        except Exception as e:
+            logger.error(f"Account {name} failed: {e}")
+            results[name] = False
+        logger.info(f"Account {name}: {'finished' if results[name] else 'failed'}")
+    
+    threads = [threading.Thread(target=run_account, args=(name, account_config), name=f"account-{name}")
+               for name, account_config in accounts]
+    try:
+        with metrics.timer("stage_duration_seconds", stage="accounts"), profiling.stage("accounts"):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        metrics.finish_run(bool(results) and all(results.values()), mode="accounts")
+    failed = sorted(name for name, ok in results.items() if not ok)
+    if failed:
+        logger.error(f"{len(failed)} of {len(accounts)} accounts failed: {', '.join(failed)}")
+    return results
+
+def run_pipeline_steps(config, config_path, save_to_file, evernote_enabled, content_store, ledger):
+    """
+    Run the fetch and post steps one after the other for the ledger's run.
+    
+    Returns:
+        Boolean indicating success or failure
+    """
+    logger.info("Step 1: Fetching articles from Pocket")
+    with metrics.timer("stage_duration_seconds", stage="fetch"):
+        articles, json_file = fetch_pocket_and_save(config, save_to_file=save_to_file, content_store=content_store, ledger=ledger)
+    if not articles:
+        logger.error("Failed to fetch articles from Pocket. Pipeline aborted.")
+        return False
+    logger.info("Step 1 complete: Articles fetched from Pocket")
+    
+    # Step 2: Post to Evernote if enabled
+    if evernote_enabled:
+        logger.info("\nStep 2: Posting articles directly to Evernote")
+        with metrics.timer("stage_duration_seconds", stage="post"):
+            posted = post_articles(articles, config, config_path, ledger)
+        if not posted:
+            logger.error("Step 2 failed: Error posting to Evernote")
+            return False
+        logger.info("Step 2 complete: Articles posted to Evernote")
+    else:
+        logger.info("\nStep 2 skipped: Evernote sync not enabled")
+    return True
+
+def configure_http(config):
+    """Import the shared HTTP client and configure it before the first request is made.
+    
+    Returns:
+        The http_client module
+    """
+    import http_client
+    
+    http_client.configure(config)
+    if config['pocket'].get('api_url'):
+        import get_pocket
+        get_pocket.configure(config)
+    return http_client
+
+def start_shared_scraping(config):
+    """Start the scrape pool the accounts share, sized by the scrape_pool section (workers, cache_size)."""
+    from get_pocket import start_scrape_pool
+    
+    pool_config = config.get('scrape_pool', {})
+    return start_scrape_pool(pool_config.get('workers'), pool_config.get('cache_size'))
+
+def run_daemon(config, config_path, interval, hours_lookback, save_to_file, evernote_enabled, resume=False,
+               accounts=None):
+    """
+    Run the pipeline every interval seconds until SIGTERM or SIGINT.
+    
+    The browser, HTTP pools, Evernote session and GUID caches stay warm between
+    cycles. After the first cycle each one only looks back to the start of the
+    last successful cycle (plus a small overlap), so known articles are not
+    scraped again.
+    A stop signal lets the current cycle finish, then state is flushed and
+    resources are closed. With resume set, the first cycle continues the last
+    unfinished run.
+    
+    With accounts (a list of (name, config) pairs) every cycle runs all of
+    them together, and each account keeps its own window.
+    """
+    import http_client
+    from get_pocket import clear_scrape_cache, close_scraper, stop_scrape_pool
+    
+    stop = threading.Event()
+    
+    def request_stop(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down after the current cycle")
+        stop.set()
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    if accounts:
+        content_stores = {name: get_content_store(account_config) for name, account_config in accounts}
+    else:
+        content_stores = {None: get_content_store(config)}
+    overlap = config.get('daemon', {}).get('overlap_seconds', DAEMON_OVERLAP_SECONDS)
+    logger.info(f"Daemon started: polling every {interval}s"
+                + (f" for {len(accounts)} accounts" if accounts else ""))
+    
+    cycle = 0
+    # Start of the last successful cycle, per account
+    last_started = {}
+    try:
+        while not stop.is_set():
+            cycle += 1
+            started = time.time()
+            lookbacks = {
+                name: hours_lookback if name not in last_started else (started - last_started[name] + overlap) / 3600
+                for name in content_stores
+            }
+            try:
+                # A failed (or empty) cycle keeps the old window so nothing is skipped
+                if accounts:
+                    results = run_accounts_once(accounts, config_path, lookbacks, save_to_file, evernote_enabled,
+                                                content_stores, resume=resume and cycle == 1)
+                else:
+                    results = {None: run_pipeline_once(config, config_path, lookbacks[None], save_to_file,
+                                                       evernote_enabled, content_stores[None],
+                                                       resume=resume and cycle == 1)}
+                for name, success in results.items():
+                    if success:
+                        last_started[name] = started
+            except Exception as e:
+                logger.error(f"Cycle {cycle} failed: {e}")
+            finally:
+                for content_store in content_stores.values():
+                    content_store.clear()
+                clear_scrape_cache()
+            elapsed = time.time() - started
+            wait = max(0.0, interval - elapsed)
+            logger.info(f"Cycle {cycle} finished in {elapsed:.1f}s, next in {wait:.0f}s")
+            stop.wait(wait)
+    finally:
+        logger.info("Daemon stopping: closing browser and connections")
+        stop_scrape_pool()
+        close_scraper()
+        for content_store in content_stores.values():
+            content_store.clear()
+        http_client.log_stats()
+        http_client.close()
+    logger.info("\n===== Daemon stopped =====")
+
 def main():
     """Main function to run the entire pipeline."""
     # Set up argument parser
@@ -117,9 +562,20 @@ def main():
     parser.add_argument('--hours', type=int, help='Hours to look back for articles')
     parser.add_argument('--evernote', action='store_true', help='Enable Evernote sync')
     parser.add_argument('--config', default='pipeline_config.json', help='Path to config file')
-    parser.add_argument('--json', help='Path to existing JSON file to use (skips Pocket step)')
+    parser.add_argument('--json', help='Path to an existing article archive or JSON file to use (skips Pocket step)')
     parser.add_argument('--save-to-file', action='store_true', help='Save articles to JSON file')
+    parser.add_argument('--backfill', action='store_true', help='Fetch the full Pocket library in resumable chunks')
+    parser.add_argument('--chunk-size', type=int, help='Items per backfill chunk')
+    parser.add_argument('--backfill-workers', type=int, help='Number of backfill chunks fetched in parallel')
+    parser.add_argument('--rebuild-index', action='store_true', help='Rebuild the local Evernote dedup index from the notebook before running')
+    parser.add_argument('--daemon', action='store_true', help='Keep running and poll Pocket on an interval')
+    parser.add_argument('--interval', type=int, help='Seconds between daemon cycles')
+    parser.add_argument('--stream', action='store_true', help='Overlap fetching, scraping and posting with bounded queues')
+    parser.add_argument('--resume', action='store_true', help='Continue the last run that did not finish')
+    parser.add_argument('--account', action='append', help='Only run this account of the accounts list (repeatable)')
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start_from_args(args)
     
     # Load configuration
     config = load_pipeline_config(args.config)
@@ -127,6 +583,9 @@ def main():
         logger.error("Failed to load pipeline configuration. Exiting.")
         sys.exit(1)
     
+    metrics.configure(config)
+    scrape_scheduler.configure(config)
+    
     # Determine hours lookback
     hours_lookback = args.hours if args.hours is not None else config['pocket']['hours_lookback']
     
@@ -136,41 +595,117 @@ def main():
     # Override save_to_file based on command line flag
     save_to_file = args.save_to_file or config.get('output', {}).get('save_json', False)
     
+    if args.stream:
+        config.setdefault('stream', {})['enabled'] = True
+    
+    # A config with an accounts list runs every account side by side (see accounts.py)
+    accounts = None
+    if config.get('accounts') or args.account:
+        from accounts import account_configs
+        accounts = account_configs(config, args.account)
+        if not accounts:
+            logger.error("No usable accounts in the configuration. Exiting.")
+            sys.exit(1)
+        logger.info(f"Accounts: {', '.join(name for name, _ in accounts)}")
+        if args.json and len(accounts) != 1:
+            logger.error("--json posts to a single account: choose it with --account")
+            sys.exit(1)
+    
+    # Reading a file without posting it makes no HTTP calls: don't even load the HTTP client
+    json_config = accounts[0][1] if accounts else config
+    file_only = (args.json and not (args.rebuild_index or args.backfill or args.daemon)
+                 and not (args.evernote or json_config.get('evernote', {}).get('enabled', False)))
+    http_client = None if file_only else configure_http(config)
+    
     logger.info("\n===== Pocket to Evernote Pipeline =====\n")
     
-    # Step 1: Get articles (either from Pocket or from provided JSON file)
-    articles = None
-    json_file = args.json
+    if args.rebuild_index:
+        logger.info("Rebuilding local Evernote dedup index")
+        from evernote_poster import rebuild_index_from_config
+        for name, account_config in accounts or [("default", None)]:
+            if not rebuild_index_from_config(args.config, config=account_config):
+                logger.error(f"Failed to rebuild the Evernote dedup index ({name}). Pipeline aborted.")
+                sys.exit(1)
     
-    if json_file:
-        logger.info(f"Using provided JSON file: {json_file}")
+    if args.backfill:
+        # Accounts are backfilled one after the other: each backfill already fetches in parallel
+        backfills = [(config, evernote_enabled)]
+        if accounts:
+            backfills = [(account_config, args.evernote or account_config.get('evernote', {}).get('enabled', False))
+                         for _, account_config in accounts]
+        metrics.start_run()
+        success = False
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-            logger.info(f"Loaded {len(articles)} articles from {json_file}")
-        except Exception as e:
-            logger.error(f"Error loading articles from {json_file}: {e}")
+            for backfill_config, backfill_evernote in backfills:
+                if not run_backfill_pipeline(backfill_config, args.config, backfill_evernote,
+                                             args.chunk_size, args.backfill_workers):
+                    break
+            else:
+                success = True
+        finally:
+            metrics.finish_run(success, mode="backfill")
+        if not success:
+            logger.error("Backfill incomplete. Rerun with --backfill to resume from the checkpoint.")
             sys.exit(1)
-    else:
-        logger.info("Step 1: Fetching articles from Pocket")
-        articles, json_file = fetch_pocket_and_save(config, hours_lookback, save_to_file)
-        if not articles:
-            logger.error("Failed to fetch articles from Pocket. Pipeline aborted.")
-            sys.exit(1)
-        logger.info("Step 1 complete: Articles fetched from Pocket")
+        http_client.log_stats()
+        logger.info("\n===== Backfill completed successfully =====")
+        return
     
-    # Step 2: Post to Evernote if enabled
-    if evernote_enabled:
-        logger.info("\nStep 2: Posting articles directly to Evernote")
-        success = post_to_evernote(articles, config_path=args.config)
-        if success:
-            logger.info("Step 2 complete: Articles posted to Evernote")
+    if args.daemon:
+        interval = args.interval or config.get('daemon', {}).get('poll_interval', DEFAULT_POLL_INTERVAL)
+        if accounts:
+            start_shared_scraping(config)
+            run_daemon(config, args.config, interval, hours_lookback, save_to_file, args.evernote, args.resume,
+                       accounts=accounts)
         else:
-            logger.error("Step 2 failed: Error posting to Evernote")
+            run_daemon(config, args.config, interval, hours_lookback, save_to_file, evernote_enabled, args.resume)
+        return
+    
+    if accounts and not args.json:
+        content_stores = {name: get_content_store(account_config) for name, account_config in accounts}
+        start_shared_scraping(config)
+        from get_pocket import stop_scrape_pool
+        try:
+            results = run_accounts_once(accounts, args.config, {name: hours_lookback for name in content_stores},
+                                        save_to_file, args.evernote, content_stores, resume=args.resume)
+        finally:
+            stop_scrape_pool()
+            for content_store in content_stores.values():
+                content_store.clear()
+        if not all(results.get(name) for name in content_stores):
             sys.exit(1)
-    else:
-        logger.info("\nStep 2 skipped: Evernote sync not enabled")
+        http_client.log_stats()
+        logger.info("\n===== Pipeline completed successfully =====")
+        return
+    
+    # Posting a file to one account of several uses that account's config
+    account_config = None
+    if accounts:
+        name, account_config = accounts[0]
+        evernote_enabled = args.evernote or account_config.get('evernote', {}).get('enabled', False)
+        logger.info(f"Posting to account {name}")
+    
+    # Scraped bodies are spooled here and only loaded when a note is rendered
+    content_store = get_content_store(config)
+    
+    # Step 1: Get articles (either from Pocket or from a provided archive / legacy JSON file)
+    if args.json:
+        metrics.start_run()
+        success = False
+        count = None
+        try:
+            success, count = run_file_pipeline(args.json, args.config, account_config, evernote_enabled)
+        finally:
+            metrics.finish_run(success, count, mode="file")
+        if not success:
+            sys.exit(1)
+    elif not run_pipeline_once(config, args.config, hours_lookback, save_to_file, evernote_enabled, content_store,
+                               resume=args.resume):
+        sys.exit(1)
     
+    content_store.clear()
+    if http_client is not None:
+        http_client.log_stats()
     logger.info("\n===== Pipeline completed successfully =====")
 
 if __name__ == "__main__":
@@ -0,0 +1,309 @@
+#profiling.py do not change filename do not remove line
+"""
+profiling.py - Opt-in per-stage profiling for the pipeline entry points.
+
+Code marks its stages with `with profiling.stage("fetch"):`, which does
+nothing unless a profiler was started (the --profile option of
+pipeline_runner, get_pocket and evernote_poster). Each finished stage
+writes its reports into the run directory (profiles/<timestamp>/ by
+default), numbered in the order the stages ran:
+
+- cprofile mode: <n>_<stage>.pstats (open with `python -m pstats` or
+  snakeviz) and <n>_<stage>.txt with the top functions by cumulative time.
+  cProfile only sees the thread that entered the stage, so the worker
+  threads of --stream and the poster pool are not included.
+- sample mode: a background thread records the stacks of every thread
+  every --profile-interval seconds. The overhead stays around a percent,
+  so it can be left on in production. Writes <n>_<stage>.folded (collapsed
+  stacks for flamegraph.pl or speedscope) and <n>_<stage>.txt with the
+  functions seen most often.
+- --profile-memory adds tracemalloc: <n>_<stage>.alloc.txt lists the source
+  lines that allocated the most memory during the stage, and the peak.
+
+profile_summary.json lists every stage with its duration and report files.
+"""
+import atexit
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger("profiling")
+
+DEFAULT_PROFILE_DIR = "profiles"
+MODES = ("cprofile", "sample")
+DEFAULT_SAMPLE_INTERVAL = 0.02
+
+# Lines per text report
+REPORT_LINES = 30
+# Frames kept per tracemalloc traceback
+TRACEMALLOC_FRAMES = 10
+
+# Stack tops of threads that are blocked, not working; left out of the "self" ranking
+IDLE_FRAMES = {
+    "threading.py:wait", "threading.py:_wait_for_tstate_lock", "queue.py:get", "queue.py:put",
+    "selectors.py:select", "socket.py:readinto", "socketserver.py:serve_forever",
+}
+
+_active = None
+# Whether a stage is being profiled; stages do not overlap, even across threads
+_in_stage = False
+_stage_lock = threading.Lock()
+
+
+class _Sampler(threading.Thread):
+    """Records the stack of every other thread at a fixed interval."""
+
+    def __init__(self, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sampled = Counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                sampled[";".join(reversed(stack))] += 1
+            with self._lock:
+                self.stacks.update(sampled)
+                self.samples += 1
+
+    def take(self):
+        """Return and reset the stacks sampled so far."""
+        with self._lock:
+            stacks, samples = self.stacks, self.samples
+            self.stacks, self.samples = Counter(), 0
+        return stacks, samples
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profiler:
+    """Collects per-stage profiles into a run directory.
+
+    Args:
+        run_dir: Directory for the reports (created if missing)
+        mode: "cprofile" (deterministic, calling thread) or "sample" (all threads, low overhead)
+        memory: Also trace allocations with tracemalloc
+        interval: Seconds between samples in sample mode
+    """
+
+    def __init__(self, run_dir, mode="cprofile", memory=False, interval=DEFAULT_SAMPLE_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.run_dir = run_dir
+        self.mode = mode
+        self.memory = memory
+        self.interval = interval
+        self.stages = []
+        self._lock = threading.Lock()
+        self._sampler = None
+        os.makedirs(run_dir, exist_ok=True)
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if self.mode == "sample":
+            self._sampler = _Sampler(self.interval)
+            self._sampler.start()
+        logger.info(f"Profiling ({self.mode}{', memory' if self.memory else ''}) into {self.run_dir}")
+
+    def stop(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        with open(os.path.join(self.run_dir, "profile_summary.json"), 'w') as f:
+            json.dump({"mode": self.mode, "memory": self.memory, "stages": self.stages}, f, indent=2)
+        logger.info(f"Wrote {len(self.stages)} stage profiles to {self.run_dir}")
+
+    def _prefix(self, name):
+        with self._lock:
+            number = len(self.stages) + 1
+            self.stages.append(None)  # reserve the number
+        return number, os.path.join(self.run_dir, f"{number:03d}_{name}")
+
+    @contextmanager
+    def stage(self, name):
+        number, prefix = self._prefix(name)
+        profile = cProfile.Profile() if self.mode == "cprofile" else None
+        if self._sampler is not None:
+            self._sampler.take()  # drop samples from before the stage
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            duration = time.perf_counter() - started
+            files = []
+            try:
+                # Allocations first, so the other reports' own allocations are not counted
+                if self.memory:
+                    files.append(self._write_allocations(before, prefix))
+                if profile is not None:
+                    files += self._write_cprofile(profile, prefix)
+                if self._sampler is not None:
+                    files += self._write_samples(prefix)
+            except Exception as e:
+                logger.error(f"Error writing profile for stage {name}: {str(e)}")
+            with self._lock:
+                self.stages[number - 1] = {
+                    "stage": name, "duration_s": round(duration, 4), "files": [os.path.basename(f) for f in files]
+                }
+            logger.info(f"Profiled stage {name} ({duration:.2f}s)")
+
+    def _write_cprofile(self, profile, prefix):
+        profile.dump_stats(prefix + ".pstats")
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(REPORT_LINES)
+        with open(prefix + ".txt", 'w') as f:
+            f.write(out.getvalue())
+        return [prefix + ".pstats", prefix + ".txt"]
+
+    def _write_samples(self, prefix):
+        stacks, samples = self._sampler.take()
+        with open(prefix + ".folded", 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        # A function counts once per sample it appears in, wherever it is on the stack
+        total = Counter()
+        own = Counter()
+        idle = 0
+        for stack, count in stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames or frames[-1] in IDLE_FRAMES:
+                idle += count
+                continue
+            for frame in set(frames):
+                total[frame] += count
+            own[frames[-1]] += count
+        with open(prefix + ".txt", 'w') as f:
+            f.write(f"{samples} samples every {self.interval}s: {sum(stacks.values())} thread stacks, "
+                    f"{idle} of them idle (waiting on a lock, queue or socket) and left out below\n\n")
+            f.write("Most frequent on top of the stack (self):\n")
+            for frame, count in own.most_common(REPORT_LINES):
+                f.write(f"{count:8d}  {frame}\n")
+            f.write("\nMost frequent anywhere on the stack (total):\n")
+            for frame, count in total.most_common(REPORT_LINES):
+                f.write(f"{count:8d}  {frame}\n")
+        return [prefix + ".folded", prefix + ".txt"]
+
+    def _write_allocations(self, before, prefix):
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        path = prefix + ".alloc.txt"
+        with open(path, 'w') as f:
+            f.write(f"Traced memory: {current / 1024 / 1024:.1f} MiB now, {peak / 1024 / 1024:.1f} MiB peak during the stage\n\n")
+            f.write("Top allocations by growth during the stage:\n")
+            for entry in diff[:REPORT_LINES]:
+                f.write(f"{entry}\n")
+        return path
+
+
+def start(run_dir=None, mode="cprofile", memory=False, interval=DEFAULT_SAMPLE_INTERVAL):
+    """Start the process-wide profiler; stage() blocks are profiled until stop().
+
+    Args:
+        run_dir: Report directory (default profiles/<timestamp>)
+        mode: "cprofile" or "sample"
+        memory: Also trace allocations with tracemalloc
+        interval: Seconds between samples in sample mode
+
+    Returns:
+        The Profiler
+    """
+    global _active
+    run_dir = run_dir or os.path.join(DEFAULT_PROFILE_DIR, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    profiler = Profiler(run_dir, mode, memory, interval)
+    profiler.start()
+    _active = profiler
+    # Entry points exit through sys.exit in many places; write the summary whichever way they leave
+    atexit.register(stop)
+    return profiler
+
+
+def stop():
+    """Stop the profiler and write profile_summary.json."""
+    global _active
+    if _active is not None:
+        _active.stop()
+        _active = None
+
+
+@contextmanager
+def stage(name):
+    """Profile the with-block as a stage when profiling is on; otherwise do nothing.
+
+    A stage that starts while another one is running, nested or on another
+    thread (concurrent accounts), is part of the running stage.
+    """
+    global _in_stage
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with _stage_lock:
+        busy = _in_stage
+        _in_stage = True
+    if busy:
+        yield
+        return
+    try:
+        with profiler.stage(name):
+            yield
+    finally:
+        _in_stage = False
+
+
+def add_arguments(parser):
+    """Add the --profile options to an argparse parser."""
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=MODES,
+                        help='Profile each stage (cprofile, or sample for low overhead) into a run directory')
+    parser.add_argument('--profile-memory', action='store_true', help='Also record top allocations with tracemalloc')
+    parser.add_argument('--profile-dir', help='Directory for profile reports (default profiles/<timestamp>)')
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help='Seconds between samples with --profile sample')
+
+
+def start_from_args(args):
+    """Start profiling if the parsed arguments ask for it (--profile or --profile-memory).
+
+    Returns:
+        The Profiler, or None when profiling is off
+    """
+    if not args.profile and not args.profile_memory:
+        return None
+    return start(args.profile_dir, args.profile or "cprofile", args.profile_memory, args.profile_interval)
@@ -0,0 +1,90 @@
+#rate_limiter.py do not change filename do not remove line
+"""
+rate_limiter.py - Adaptive token-bucket rate limiter for Evernote API calls.
+
+The bucket starts at a configured rate. When Evernote answers with
+RATE_LIMIT_REACHED the rate is cut multiplicatively and every caller waits
+out rateLimitDuration; each success then grows the rate back additively, so
+throughput tracks the account's real quota instead of a fixed sleep.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger("rate_limiter")
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket with AIMD rate adaptation.
+
+    Args:
+        rate: Initial rate in calls per second
+        burst: Bucket capacity (calls allowed back-to-back)
+        min_rate: Lower bound for the rate after repeated rate limits
+        max_rate: Upper bound the rate may grow back to
+        increase: Calls per second added after each successful call
+        decrease: Factor the rate is multiplied by on a rate limit
+    """
+
+    def __init__(self, rate=1.0, burst=3, min_rate=0.02, max_rate=5.0, increase=0.02, decrease=0.5):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+        self.calls = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_config(cls, evernote_config):
+        """Build a limiter from the "rate_limit" block of the evernote config section."""
+        settings = evernote_config.get("rate_limit", {})
+        return cls(**{k: v for k, v in settings.items()
+                      if k in ("rate", "burst", "min_rate", "max_rate", "increase", "decrease")})
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """Block until a call may be made."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    self._cond.wait(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.calls += 1
+                    return
+                self._cond.wait((1 - self._tokens) / self.rate)
+
+    def on_success(self):
+        """Grow the rate back gradually after a successful call."""
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_rate_limited(self, duration, pause=True):
+        """Shrink the rate and, if pause is set, block every caller for duration seconds.
+
+        Callers that defer work on a rate limit instead of waiting pass pause=False.
+        """
+        with self._cond:
+            self.rate_limited += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            if not pause:
+                logger.warning(f"Rate limit reached: rate reduced to {self.rate:.2f} calls/s")
+                return
+            self._blocked_until = max(self._blocked_until, time.monotonic() + (duration or 0) + 1)
+            # Start refilling from an empty bucket once the pause is over
+            self._tokens = 0.0
+            self._last = self._blocked_until
+            logger.warning(f"Rate limit reached: pausing {duration}s, rate reduced to {self.rate:.2f} calls/s")
+            self._cond.notify_all()
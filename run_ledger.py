@@ -0,0 +1,219 @@
+#run_ledger.py do not change filename do not remove line
+"""
+run_ledger.py - Per-article stage checkpoints for pipeline runs.
+
+Every run records each Pocket item as it moves through the pipeline stages
+(fetched, scraped, rendered, posted) together with the stage output: the raw
+Pocket item once fetched and the scraped article once scraped. Rendered
+notes live in the outbox and posted ones in the sync index, so those stages
+only need the status. A run that dies (reboot, OOM kill) stays marked as
+running; resuming it skips the Pocket call when the fetch had finished and
+every article that was already scraped, so a restart only costs the
+unfinished work. Once a run finishes, only its status rows are kept.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from article import Article
+
+logger = logging.getLogger("run_ledger")
+
+DEFAULT_LEDGER_PATH = "run_ledger.sqlite"
+
+# Stages in pipeline order
+STAGES = ("fetched", "scraped", "rendered", "posted")
+
+# Finished runs kept in the ledger (stages only, without items or articles)
+KEEP_RUNS = 20
+
+
+class RunLedger:
+    """SQLite ledger of pipeline runs and their articles.
+
+    Stage methods apply to the current run, set by start_run or resume_run.
+
+    Args:
+        path: Path to the SQLite database file
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        self.path = path
+        self.run_id = None
+        self.since = None
+        self.fetch_done = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    since INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    fetch_done INTEGER NOT NULL DEFAULT 0,
+                    started_at REAL NOT NULL,
+                    finished_at REAL
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS run_articles (
+                    run_id INTEGER NOT NULL,
+                    item_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    item TEXT,
+                    article TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, item_id)
+                )"""
+            )
+
+    def start_run(self, since):
+        """Start a new run for items changed since the given epoch time."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (since, status, started_at) VALUES (?, 'running', ?)", (int(since), time.time())
+            )
+        self.run_id = cursor.lastrowid
+        self.since = int(since)
+        self.fetch_done = False
+        return self.run_id
+
+    def resume_run(self):
+        """Continue the most recent run that did not finish.
+
+        Returns:
+            The run id, or None if the last run finished (nothing to resume)
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs ORDER BY run_id DESC LIMIT 1").fetchone()
+        if row is None or row["status"] != "running":
+            return None
+        self.run_id = row["run_id"]
+        self.since = row["since"]
+        self.fetch_done = bool(row["fetch_done"])
+        counts = self.stage_counts()
+        logger.info(
+            f"Resuming run {self.run_id}: "
+            + ", ".join(f"{counts.get(stage, 0)} {stage}" for stage in STAGES)
+            + ("" if self.fetch_done else " (fetch unfinished)")
+        )
+        return self.run_id
+
+    def finish_run(self, success=True):
+        """Close the current run; a failed run can still be resumed."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?",
+                ("done" if success else "running", time.time(), self.run_id),
+            )
+            if success:
+                # Finished runs only matter for the record; keep the latest few
+                self._conn.execute(
+                    "DELETE FROM run_articles WHERE run_id IN "
+                    "(SELECT run_id FROM runs WHERE status = 'done' ORDER BY run_id DESC LIMIT -1 OFFSET ?)",
+                    (KEEP_RUNS,),
+                )
+                self._conn.execute(
+                    "DELETE FROM runs WHERE run_id IN "
+                    "(SELECT run_id FROM runs WHERE status = 'done' ORDER BY run_id DESC LIMIT -1 OFFSET ?)",
+                    (KEEP_RUNS,),
+                )
+                # A finished run supersedes older unfinished ones
+                self._conn.execute(
+                    "UPDATE runs SET status = 'abandoned' WHERE status = 'running' AND run_id < ?", (self.run_id,)
+                )
+                # Nothing resumes these runs, so drop the stored items and article bodies
+                self._conn.execute(
+                    "UPDATE run_articles SET item = NULL, article = NULL "
+                    "WHERE run_id <= ? AND (item IS NOT NULL OR article IS NOT NULL)",
+                    (self.run_id,),
+                )
+
+    # Stage records
+    def record_fetched(self, items):
+        """Record raw Pocket items; items already further along keep their stage."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT INTO run_articles (run_id, item_id, stage, item, updated_at)
+                   VALUES (?, ?, 'fetched', ?, ?)
+                   ON CONFLICT(run_id, item_id) DO NOTHING""",
+                [(self.run_id, str(item_id), json.dumps(item, ensure_ascii=False), now) for item_id, item in items],
+            )
+
+    def mark_fetch_done(self):
+        """Record that every item of the run's window was fetched."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET fetch_done = 1 WHERE run_id = ?", (self.run_id,))
+        self.fetch_done = True
+
+    def record_scraped(self, article):
+        """Store the scraped article (body included) so a resume does not scrape it again."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE run_articles SET stage = 'scraped', article = ?, updated_at = ? WHERE run_id = ? AND item_id = ?",
+                (json.dumps(article.to_dict(), ensure_ascii=False), time.time(), self.run_id, str(article.item_id)),
+            )
+
+    def set_stage(self, item_ids, stage):
+        """Move articles to a later stage (rendered or posted)."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE run_articles SET stage = ?, updated_at = ? WHERE run_id = ? AND item_id = ?",
+                [(stage, time.time(), self.run_id, str(item_id)) for item_id in item_ids],
+            )
+
+    # Queries for the current run
+    def unscraped_items(self):
+        """Return the (item_id, item) pairs fetched but not yet scraped."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, item FROM run_articles WHERE run_id = ? AND stage = 'fetched' ORDER BY rowid",
+                (self.run_id,),
+            ).fetchall()
+        return [(row["item_id"], json.loads(row["item"])) for row in rows]
+
+    def scraped_articles(self, store=None, include_posted=True):
+        """Return the run's scraped articles.
+
+        Args:
+            store: Optional ContentStore to spool the bodies into
+            include_posted: Whether to include articles already posted
+        """
+        query = "SELECT article FROM run_articles WHERE run_id = ? AND article IS NOT NULL"
+        if not include_posted:
+            query += " AND stage != 'posted'"
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY rowid", (self.run_id,)).fetchall()
+        return [Article.from_dict(json.loads(row["article"]), store=store) for row in rows]
+
+    def known_item_ids(self):
+        """Return the ids of every item the current run has recorded."""
+        with self._lock:
+            rows = self._conn.execute("SELECT item_id FROM run_articles WHERE run_id = ?", (self.run_id,)).fetchall()
+        return {row["item_id"] for row in rows}
+
+    def record_post_stages(self, poster, articles):
+        """Record how far a batch handed to a PosterSession got (rendered or posted)."""
+        stages = {}
+        for article in articles:
+            stage = poster.article_stage(article)
+            if stage:
+                stages.setdefault(stage, []).append(article.item_id)
+        for stage, item_ids in stages.items():
+            self.set_stage(item_ids, stage)
+
+    def stage_counts(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, COUNT(*) AS n FROM run_articles WHERE run_id = ? GROUP BY stage", (self.run_id,)
+            ).fetchall()
+        return {row["stage"]: row["n"] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
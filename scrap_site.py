@@ -1,16 +1,19 @@
 #scrap_site.py do not change filename do not remove line
+import atexit
+import importlib.util
 import logging
 import os
 import random
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 
-# Lazy import of playwright to avoid startup overhead if not needed
-playwright_available = False
-try:
-    from playwright.sync_api import sync_playwright
-    playwright_available = True
-except ImportError:
+import metrics
+
+# Playwright is only imported when the first browser is launched; finding it is cheap
+playwright_available = importlib.util.find_spec("playwright") is not None
+if not playwright_available:
     logging.warning("Playwright not installed. Web scraping will not function properly.")
     logging.warning("Install with: pip install playwright pyee greenlet typing-extensions websockets && playwright install chromium")
 
@@ -18,6 +21,77 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("scrap_site")
 
+# Launch options for the shared headless browser; the args handle SSL errors
+BROWSER_ARGS = [
+    '--ignore-certificate-errors',
+    '--ignore-ssl-errors',
+    '--disable-web-security'
+]
+
+# Playwright's sync API is bound to the thread that started it, so each thread keeps its own browser
+_local = threading.local()
+
+
+def get_browser():
+    """Return this thread's headless Chromium, launching it on first use.
+    
+    The browser stays up between scrapes (and between daemon cycles) and is
+    relaunched if it crashed. Call close_browser() from the same thread to
+    shut it down.
+    """
+    browser = getattr(_local, "browser", None)
+    if browser is not None and browser.is_connected():
+        return browser
+    if getattr(_local, "playwright", None) is None:
+        from playwright.sync_api import sync_playwright
+        _local.playwright = sync_playwright().start()
+    logger.info("Launching headless browser")
+    metrics.inc("browser_launches_total")
+    _local.browser = _local.playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+    return _local.browser
+
+
+def close_browser():
+    """Close this thread's browser and Playwright driver, if any."""
+    browser = getattr(_local, "browser", None)
+    playwright = getattr(_local, "playwright", None)
+    _local.browser = None
+    _local.playwright = None
+    try:
+        if browser is not None and browser.is_connected():
+            browser.close()
+    except Exception as e:
+        logger.warning(f"Error closing browser: {e}")
+    try:
+        if playwright is not None:
+            playwright.stop()
+    except Exception as e:
+        logger.warning(f"Error stopping Playwright: {e}")
+
+
+# The main thread's browser is closed at exit; other threads close their own
+atexit.register(close_browser)
+
+
+@contextmanager
+def browser_context():
+    """Open a fresh browser context (cookies, cache) on the warm browser and close it afterwards."""
+    # Configure context with realistic browser profile
+    context = get_browser().new_context(
+        viewport={"width": 1280, "height": 800},
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        locale="en-US",
+        timezone_id="America/New_York",
+        permissions=["geolocation"]
+    )
+    try:
+        yield context
+    finally:
+        try:
+            context.close()
+        except Exception:
+            pass
+
 def scrape_website(url, timeout=30000, screenshot_dir="debug_screenshots"):
     """Scrape content from a web page using Playwright.
     
@@ -51,38 +125,13 @@ def scrape_website(url, timeout=30000, screenshot_dir="debug_screenshots"):
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
+                    metrics.inc("scrape_retries_total")
                     retry_wait = retry_delay * (2 ** (attempt - 1)) + random.uniform(0.1, 0.5)
                     logger.info(f"Retry attempt {attempt+1}/{max_retries} for {url}, waiting {retry_wait:.1f}s")
                     time.sleep(retry_wait)
                 
-                with sync_playwright() as p:
-                    # Launch browser in headless mode with appropriate options
-                    browser_type = p.chromium
-                    
-                    # Configure browser launch options
-                    browser_args = []
-                    
-                    # Add arguments to handle SSL errors
-                    browser_args.extend([
-                        '--ignore-certificate-errors',
-                        '--ignore-ssl-errors',
-                        '--disable-web-security'
-                    ])
-                    
-                    browser = browser_type.launch(
-                        headless=True,
-                        args=browser_args
-                    )
-                    
-                    # Configure context with realistic browser profile
-                    context = browser.new_context(
-                        viewport={"width": 1280, "height": 800},
-                        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                        locale="en-US",
-                        timezone_id="America/New_York",
-                        permissions=["geolocation"]
-                    )
-                    
+                # Reuse the warm browser; every scrape gets its own context
+                with browser_context() as context:
                     # Open new page with timeout
                     page = context.new_page()
                     page.set_default_timeout(timeout)
@@ -124,7 +173,8 @@ def scrape_website(url, timeout=30000, screenshot_dir="debug_screenshots"):
                         else:
                             # Standard navigation
                             logger.info(f"Navigating to: {url}")
-                            response = page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+                            with metrics.timer("page_load_duration_seconds"):
+                                response = page.goto(url, wait_until="domcontentloaded", timeout=timeout)
                         
                         # Check if we got a valid response
                         if not response or response.status >= 400:
@@ -134,7 +184,6 @@ def scrape_website(url, timeout=30000, screenshot_dir="debug_screenshots"):
                                 pass
                             else:
                                 # Not last attempt, try again
-                                browser.close()
                                 continue
                     except Exception as e:
                         logger.warning(f"Error navigating to {url}: {e}")
@@ -147,7 +196,6 @@ def scrape_website(url, timeout=30000, screenshot_dir="debug_screenshots"):
                             pass
                         else:
                             # Not last attempt, try again
-                            browser.close()
                             continue
                     
                     # For SPAs, wait extra time for JavaScript to render
@@ -242,9 +290,6 @@ def scrape_website(url, timeout=30000, screenshot_dir="debug_screenshots"):
                         except Exception as e:
                             logger.error(f"Failed to save debug screenshot: {e}")
                     
-                    # Close browser
-                    browser.close()
-                    
                     # Process and clean the content
                     if content:
                         # Clean the content
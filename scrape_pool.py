@@ -0,0 +1,119 @@
+#scrape_pool.py do not change filename do not remove line
+"""
+scrape_pool.py - A fixed set of scraping threads shared by concurrent runs.
+
+Playwright browsers belong to the thread that launched them, so every thread
+that scrapes keeps its own Chromium warm. That is fine for one pipeline, but
+several accounts running side by side (see accounts.py) would each launch
+their own. A ScrapePool caps the number of browsers instead: callers on any
+thread hand URLs to its workers and wait for the result.
+
+The pool also keeps the pages it scraped in a bounded cache, and concurrent
+requests for the same URL share one scrape, so an article saved by several
+accounts is only scraped once. The cache is meant to be cleared between
+cycles; it is not a long-lived store.
+"""
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger("scrape_pool")
+
+DEFAULT_WORKERS = 2
+DEFAULT_CACHE_SIZE = 256
+
+# Tells a worker to close its browser and exit
+_STOP = object()
+
+
+class ScrapePool:
+    """Scrapes URLs on a fixed number of worker threads, each with its own browser.
+
+    Args:
+        scrape: Function (url, timeout) -> content or None, run on a worker thread
+        close: Function closing the calling worker thread's browser
+        workers: Number of worker threads (and so of browsers)
+        cache_size: Scraped pages kept for reuse; 0 turns the cache off
+    """
+
+    def __init__(self, scrape, close, workers=DEFAULT_WORKERS, cache_size=DEFAULT_CACHE_SIZE):
+        self._scrape = scrape
+        self._close = close
+        self.cache_size = cache_size
+        self.hits = 0
+        self.scrapes = 0
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._queue = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"scrape-pool-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Scrape pool started with {len(self._threads)} workers")
+
+    @property
+    def workers(self):
+        return len(self._threads)
+
+    def scrape(self, url, timeout=30000):
+        """Scrape url on a pool worker and wait for the content (None if scraping failed)."""
+        with self._lock:
+            if url in self._cache:
+                self._cache.move_to_end(url)
+                self.hits += 1
+                return self._cache[url]
+            future = self._pending.get(url)
+            if future is None:
+                future = self._pending[url] = Future()
+                self._queue.put((url, timeout, future))
+            else:
+                self.hits += 1
+        return future.result()
+
+    def _work(self):
+        try:
+            while True:
+                task = self._queue.get()
+                if task is _STOP:
+                    return
+                url, timeout, future = task
+                content = None
+                try:
+                    content = self._scrape(url, timeout)
+                    future.set_result(content)
+                except Exception as e:
+                    logger.error(f"Error scraping {url}: {e}")
+                    future.set_result(None)
+                finally:
+                    with self._lock:
+                        self._pending.pop(url, None)
+                        self.scrapes += 1
+                        if content and self.cache_size:
+                            self._cache[url] = content
+                            while len(self._cache) > self.cache_size:
+                                self._cache.popitem(last=False)
+        finally:
+            # Browsers can only be closed by the thread that launched them
+            try:
+                self._close()
+            except Exception as e:
+                logger.error(f"Error closing scrape worker browser: {e}")
+
+    def clear_cache(self):
+        """Forget the cached pages."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        """Stop the workers after the queued scrapes and close their browsers."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self.clear_cache()
+        logger.info(f"Scrape pool closed: {self.scrapes} pages scraped, {self.hits} served from the cache")
@@ -0,0 +1,242 @@
+#streaming.py do not change filename do not remove line
+"""
+streaming.py - Stage-overlapped fetch, scrape and post pipeline.
+
+Pocket pages are fetched, articles are scraped and notes are posted by
+separate threads connected by bounded queues, so every stage works on a
+different article at the same time. A full queue blocks the stage feeding
+it: a slow stage paces the ones before it instead of letting work (and
+scraped bodies) pile up in memory. The poster takes whatever articles are
+ready as one batch, so the first note goes out as soon as the first article
+is scraped and later batches grow while posting is the bottleneck. Each
+Pocket page is handed to the scrapers cheapest item first (see
+scrape_scheduler.py), so slow pages do not hold up the quick ones.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+import metrics
+import scrape_scheduler
+from get_pocket import build_article, close_scraper, iter_pocket_pages
+
+logger = logging.getLogger("streaming")
+
+# Defaults for the "stream" config section
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_SCRAPE_WORKERS = 2
+DEFAULT_PAGE_SIZE = 30
+
+# Marks the end of a stage's output
+_DONE = object()
+
+# How often a blocked stage checks whether the pipeline was stopped
+_POLL_SECONDS = 0.5
+
+
+def _put(q, item, stop):
+    """Put an item, blocking while the queue is full; False if the pipeline stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop, block=True):
+    """Get an item, blocking until one is ready; None if the pipeline stopped (or nothing is ready)."""
+    while not stop.is_set():
+        try:
+            return q.get(block=block, timeout=_POLL_SECONDS if block else None)
+        except queue.Empty:
+            if not block:
+                return None
+    return None
+
+
+class _Stats:
+    """Per-stage counters shared by the pipeline threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.fetched = 0
+        self.scraped = 0
+        self.failed = 0
+        self.first_note = None
+
+    def add(self, name, count=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+def run_streaming(config, hours_lookback, content_store=None, poster=None, ledger=None):
+    """Fetch, scrape and post recent Pocket articles with overlapping stages.
+
+    Args:
+        config: Pipeline configuration (reads the "pocket" and "stream" sections)
+        hours_lookback: Number of hours to look back for articles
+        content_store: Optional ContentStore to spool scraped bodies into
+        poster: Optional PosterSession (see evernote_poster.open_poster_session);
+            without one articles are only fetched and scraped
+        ledger: Optional RunLedger with a started or resumed run; every stage
+            is checkpointed in it, and a resumed run skips the work it records
+
+    Returns:
+        Tuple of (articles, success) where articles lists every scraped Article
+        in completion order and success is False if fetching or posting failed
+    """
+    stream_config = config.get('stream', {})
+    queue_size = max(1, stream_config.get('queue_size', DEFAULT_QUEUE_SIZE))
+    scrape_workers = max(1, stream_config.get('scrape_workers', DEFAULT_SCRAPE_WORKERS))
+    page_size = stream_config.get('page_size', DEFAULT_PAGE_SIZE)
+    digest_config = config.get('evernote', {}).get('digest', {})
+    # Digest notes want full batches rather than whatever happens to be ready
+    min_batch = digest_config.get('batch_size', 1) if poster is not None and digest_config.get('enabled') else 1
+
+    if ledger is not None:
+        since = ledger.since
+    else:
+        since = int((datetime.now() - timedelta(hours=hours_lookback)).timestamp())
+    items = queue.Queue(maxsize=queue_size)
+    ready = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    fetch_complete = threading.Event()
+    stats = _Stats()
+    logger.info(
+        f"Streaming articles from the last {hours_lookback} hours "
+        f"({scrape_workers} scrape workers, queues of {queue_size})"
+    )
+
+    def fetch():
+        try:
+            known = set()
+            if ledger is not None:
+                # Resumed work first: scraped articles go straight to the poster
+                for article in ledger.scraped_articles(content_store, include_posted=False):
+                    if not _put(ready, article, stop):
+                        return
+                known = ledger.known_item_ids()
+                for item_id, item in scrape_scheduler.order(ledger.unscraped_items()):
+                    if not _put(items, (item_id, item), stop):
+                        return
+                    stats.add("fetched")
+                if ledger.fetch_done:
+                    fetch_complete.set()
+                    return
+            for page in iter_pocket_pages(
+                config['pocket']['consumer_key'], config['pocket']['access_token'], since, page_size
+            ):
+                if page is None:
+                    return
+                page = [(item_id, item) for item_id, item in page.items() if item_id not in known]
+                if ledger is not None:
+                    ledger.record_fetched(page)
+                # Each page goes to the scrapers cheapest first (see scrape_scheduler.py)
+                page = scrape_scheduler.order(page)
+                for entry in page:
+                    if not _put(items, entry, stop):
+                        return
+                    stats.add("fetched")
+            if ledger is not None:
+                ledger.mark_fetch_done()
+            fetch_complete.set()
+        except Exception as e:
+            logger.error(f"Error fetching Pocket articles: {e}")
+        finally:
+            for _ in range(scrape_workers):
+                _put(items, _DONE, stop)
+
+    def scrape():
+        try:
+            while True:
+                entry = _get(items, stop)
+                if entry is None or entry is _DONE:
+                    return
+                item_id, item = entry
+                try:
+                    article = build_article(item_id, item, content_store)
+                except Exception as e:
+                    logger.error(f"Error processing Pocket item {item_id}: {e}")
+                    stats.add("failed")
+                    continue
+                stats.add("scraped")
+                if ledger is not None:
+                    ledger.record_scraped(article)
+                if not _put(ready, article, stop):
+                    return
+        finally:
+            # Playwright browsers belong to the thread that launched them
+            close_scraper()
+
+    fetcher = threading.Thread(target=fetch, name="stream-fetch", daemon=True)
+    scrapers = [threading.Thread(target=scrape, name=f"stream-scrape-{i}", daemon=True)
+                for i in range(scrape_workers)]
+    for thread in [fetcher] + scrapers:
+        thread.start()
+
+    def close_ready():
+        for thread in scrapers:
+            thread.join()
+        _put(ready, _DONE, stop)
+
+    threading.Thread(target=close_ready, name="stream-close", daemon=True).start()
+
+    # Post stage: runs in the calling thread and drains whatever is ready as one batch
+    articles = []
+    success = True
+    done = False
+    try:
+        while not done:
+            batch = []
+            block = True
+            while not done:
+                article = _get(ready, stop, block=block)
+                if article is _DONE:
+                    done = True
+                elif article is not None:
+                    batch.append(article)
+                elif block:
+                    # Only a stopped pipeline returns nothing from a blocking get
+                    done = True
+                if len(batch) >= min_batch:
+                    block = False
+                if article is None and not block:
+                    break
+            if not batch:
+                continue
+            articles.extend(batch)
+            if poster is None:
+                continue
+            if not poster.submit(batch):
+                logger.error("Posting to Evernote failed, stopping the pipeline")
+                success = False
+                break
+            if ledger is not None:
+                ledger.record_post_stages(poster, batch)
+            if stats.first_note is None and poster.posted:
+                stats.first_note = stats.elapsed()
+                metrics.set_gauge("first_note_seconds", round(stats.first_note, 3))
+                logger.info(f"First note posted {stats.first_note:.1f}s after the pipeline started")
+    finally:
+        stop.set()
+        for thread in [fetcher] + scrapers:
+            thread.join()
+        scrape_scheduler.save()
+
+    logger.info(
+        f"Streamed {stats.fetched} Pocket items in {stats.elapsed():.1f}s: "
+        f"{stats.scraped} scraped, {stats.failed} failed"
+        + (f", {poster.posted} notes posted" if poster is not None else "")
+    )
+    if success and not fetch_complete.is_set():
+        logger.error("Fetching from Pocket did not complete")
+        success = False
+    return articles, success
@@ -0,0 +1,224 @@
+#sync_index.py do not change filename do not remove line
+"""
+sync_index.py - Persistent local index of articles already posted to Evernote.
+
+Articles are keyed by the hash of their normalized URL (or their Pocket
+item_id when they have no URL) and looked up by item_id too.
+The index is consulted before any Evernote call, so already-synced articles
+cost no network traffic at all.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger("sync_index")
+
+DEFAULT_INDEX_PATH = "evernote_index.sqlite"
+
+# Query parameters that only track where a link was clicked
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMS = frozenset(("fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"))
+
+
+def normalize_url(url):
+    """Normalize a URL so trivially different links map to the same key.
+
+    Lowercases scheme and host, drops the fragment (unless it is a hash route),
+    default ports, tracking parameters and a trailing slash, and sorts the query.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not (k.lower().startswith(TRACKING_PREFIXES) or k.lower() in TRACKING_PARAMS)
+    ))
+    # Keep hash routes (#/page) since SPAs use them as real paths
+    fragment = parts.fragment if parts.fragment.startswith("/") else ""
+    return urlunsplit((scheme, netloc, path, query, fragment))
+
+
+def url_hash(url):
+    """Return the hex MD5 of the normalized URL."""
+    return hashlib.md5(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def article_key(article):
+    """Return the index key of an article: its URL hash, or a key derived from item_id without a URL.
+
+    URL-less articles would otherwise all share the hash of the empty URL.
+    """
+    url = article.get("url") or ""
+    item_id = article.get("item_id")
+    if not url.strip() and item_id:
+        return f"item:{item_id}"
+    return url_hash(url)
+
+
+def content_hash(*parts):
+    """Return the hex MD5 over the given strings (rendered ENML, tags, ...)."""
+    h = hashlib.md5()
+    for part in parts:
+        h.update((part or "").encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class SyncIndex:
+    """SQLite index of posted notes.
+
+    Args:
+        path: Path to the SQLite database file
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS notes (
+                    url_hash TEXT PRIMARY KEY,
+                    item_id TEXT,
+                    url TEXT,
+                    note_guid TEXT,
+                    content_hash TEXT,
+                    posted_at INTEGER,
+                    digest INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            # Indexes created before digest notes existed lack the column
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(notes)")}
+            if "digest" not in columns:
+                self._conn.execute("ALTER TABLE notes ADD COLUMN digest INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS notes_item_id ON notes(item_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS notes_note_guid ON notes(note_guid)")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS guids (
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    guid TEXT NOT NULL,
+                    PRIMARY KEY (kind, name)
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )"""
+            )
+
+    def lookup(self, article):
+        """Return the index row for an article (by item_id, then URL), or None."""
+        with self._lock:
+            item_id = article.get("item_id")
+            if item_id:
+                row = self._conn.execute("SELECT * FROM notes WHERE item_id = ?", (str(item_id),)).fetchone()
+                if row:
+                    return dict(row)
+            url = article.get("url")
+            if url:
+                row = self._conn.execute("SELECT * FROM notes WHERE url_hash = ?", (url_hash(url),)).fetchone()
+                if row:
+                    return dict(row)
+            return None
+
+    def contains(self, article):
+        """Return True if the article has already been posted."""
+        return self.lookup(article) is not None
+
+    def record(self, article, note_guid, content_hash=None, posted_at=None, digest=False):
+        """Record that an article was posted as the given note.
+
+        With digest set, note_guid is the digest note the article was posted in.
+        """
+        url = article.get("url") or ""
+        item_id = article.get("item_id")
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO notes (url_hash, item_id, url, note_guid, content_hash, posted_at, digest)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url_hash) DO UPDATE SET
+                       item_id = COALESCE(excluded.item_id, notes.item_id),
+                       note_guid = excluded.note_guid,
+                       content_hash = COALESCE(excluded.content_hash, notes.content_hash),
+                       posted_at = excluded.posted_at,
+                       digest = excluded.digest""",
+                (
+                    article_key(article),
+                    str(item_id) if item_id else None,
+                    url,
+                    note_guid,
+                    content_hash,
+                    int(posted_at if posted_at is not None else time.time()),
+                    1 if digest else 0,
+                ),
+            )
+
+    # GUID cache for notebooks and tags. Names are case-insensitive in Evernote.
+    def get_guid(self, kind, name):
+        """Return the cached GUID of a notebook or tag, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT guid FROM guids WHERE kind = ? AND name = ?", (kind, name.lower())
+            ).fetchone()
+            return row["guid"] if row else None
+
+    def set_guids(self, kind, mapping):
+        """Cache GUIDs for several names of one kind."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO guids (kind, name, guid) VALUES (?, ?, ?)",
+                [(kind, name.lower(), guid) for name, guid in mapping.items()],
+            )
+
+    def set_guid(self, kind, name, guid):
+        self.set_guids(kind, {name: guid})
+
+    def drop_guids(self, kind, names=None):
+        """Forget cached GUIDs of one kind (all of them when names is None)."""
+        with self._lock, self._conn:
+            if names is None:
+                self._conn.execute("DELETE FROM guids WHERE kind = ?", (kind,))
+            else:
+                self._conn.executemany(
+                    "DELETE FROM guids WHERE kind = ? AND name = ?",
+                    [(kind, name.lower()) for name in names],
+                )
+
+    # Small key/value store for sync bookkeeping (account updateCount, ...)
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row["value"] if row else default
+
+    def set_meta(self, mapping):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(key, None if value is None else str(value)) for key, value in mapping.items()],
+            )
+
+    def clear(self):
+        """Remove every indexed note (and the sync state they were reconciled at)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM notes")
+            self._conn.execute("DELETE FROM meta WHERE key IN ('update_count', 'sync_time')")
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,6 @@
+#conftest.py do not change filename do not remove line
+"""Make the pipeline's top-level modules importable when pytest runs from anywhere."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,135 @@
+#test_evernote_session.py do not change filename do not remove line
+"""Transport failures must never make a write reach Evernote twice."""
+import pytest
+
+pytest.importorskip("evernote")
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+from thrift.transport.TTransport import TTransportException
+
+import evernote_poster
+import evernote_session
+import http_client
+import outbox
+from evernote.edam.type import ttypes as Types
+from fake_notestore import FakeNoteStore, serve
+from sync_index import SyncIndex
+
+AUTH_TOKEN = "S=s1:U=1:A=test"
+# Thrift's binary protocol writes the method name with its length, so this does not match createNotebook
+CREATE_NOTE_CALL = b"\x00\x00\x00\x0acreateNote"
+
+
+def _sent_then_reset():
+    return requests.exceptions.ConnectionError(
+        ProtocolError("Connection aborted.", ConnectionResetError(104, "Connection reset by peer"))
+    )
+
+
+def _refused():
+    return requests.exceptions.ConnectionError(
+        MaxRetryError(None, "/shard/s1/notestore", NewConnectionError(None, "Connection refused"))
+    )
+
+
+@pytest.fixture
+def fake(tmp_path):
+    store = FakeNoteStore()
+    server = serve(store)
+    evernote_config = {
+        "auth_token": AUTH_TOKEN,
+        "notebook_name": "Pocket Articles",
+        "service_url": f"http://127.0.0.1:{server.server_address[1]}",
+        "url_cache": str(tmp_path / "evernote_urls.json"),
+        "rate_limit": {"rate": 100, "burst": 50},
+    }
+    evernote_session.configure(evernote_config)
+    yield store, evernote_config
+    server.shutdown()
+    server.server_close()
+    http_client.close()
+    evernote_session.configure({})
+
+
+@pytest.fixture
+def fail_first_create(monkeypatch):
+    """Make the first createNote call fail with error(); sent=True lets it reach the server first."""
+    def install(error, sent):
+        real_post = http_client.post
+        failed = []
+
+        def post(url, data=None, **kwargs):
+            if not failed and CREATE_NOTE_CALL in (data or b""):
+                failed.append(url)
+                if sent:
+                    real_post(url, data=data, **kwargs)
+                raise error()
+            return real_post(url, data=data, **kwargs)
+
+        monkeypatch.setattr(http_client, "post", post)
+        return failed
+    return install
+
+
+def _note(notebook_guid):
+    note = Types.Note()
+    note.title = "Example"
+    note.content = '<?xml version="1.0" encoding="UTF-8"?><!DOCTYPE en-note SYSTEM ' \
+                   '"http://xml.evernote.com/pub/enml2.dtd"><en-note>Body</en-note>'
+    note.notebookGuid = notebook_guid
+    note.attributes = Types.NoteAttributes(sourceURL="https://example.com/article")
+    return note
+
+
+def _notebook(store):
+    notebook = Types.Notebook()
+    notebook.name = "Pocket Articles"
+    return store.createNotebook(notebook).guid
+
+
+def test_write_is_not_replayed_after_the_request_was_sent(fake, fail_first_create):
+    store, _ = fake
+    notebook_guid = _notebook(store)
+    session = evernote_session.NoteStoreSession(AUTH_TOKEN).connect()
+    failed = fail_first_create(_sent_then_reset, sent=True)
+
+    with pytest.raises(TTransportException):
+        session.createNote(_note(notebook_guid))
+    assert failed
+    assert len(store._notes) == 1
+
+
+def test_write_is_replayed_when_the_request_never_left(fake, fail_first_create):
+    store, _ = fake
+    notebook_guid = _notebook(store)
+    session = evernote_session.NoteStoreSession(AUTH_TOKEN).connect()
+    failed = fail_first_create(_refused, sent=False)
+
+    created = session.createNote(_note(notebook_guid))
+    assert failed
+    assert created.guid in store._notes
+    assert len(store._notes) == 1
+
+
+def test_outbox_does_not_post_an_uncertain_create_twice(fake, fail_first_create, tmp_path, monkeypatch):
+    store, evernote_config = fake
+    # Failed entries become due again right away
+    monkeypatch.setattr(outbox, "BASE_DELAY", 0)
+    index_path = str(tmp_path / "index.sqlite")
+    article = {"item_id": "1", "url": "https://example.com/article", "title": "Example",
+               "content": {"type": "text", "content": "Body"}}
+    failed = fail_first_create(_sent_then_reset, sent=True)
+
+    for _ in range(2):
+        index = SyncIndex(index_path)
+        session = evernote_poster.PosterSession(evernote_config, index, outbox.Outbox(index_path))
+        assert session.submit([article])
+        session.finish()
+        session.close()
+
+    assert failed
+    assert len(store._notes) == 1
+    index = SyncIndex(index_path)
+    assert index.lookup(article)["note_guid"] in store._notes
+    assert outbox.Outbox(index_path).count() == 0
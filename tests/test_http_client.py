@@ -0,0 +1,100 @@
+#test_http_client.py do not change filename do not remove line
+"""The HTTP/2 path of http_client must behave like the requests path it replaces."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/moved":
+            self._reply(302, b"redirect page", {"Location": "/article"})
+        else:
+            self._reply(200, b"article body")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply(200, self.headers.get("Content-Type", "").encode() + b"|" + body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def http2(monkeypatch):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    http_client.close()
+    monkeypatch.setitem(http_client._settings, "http2", True)
+    yield
+    http_client.close()
+
+
+def test_fetch_with_retry_follows_redirects_over_http2(server, http2, monkeypatch):
+    import get_pocket
+
+    monkeypatch.setattr(get_pocket.time, "sleep", lambda seconds: None)
+    response = get_pocket.fetch_with_retry(f"{server}/moved")
+    assert response is not None
+    assert response.status_code == 200
+    assert response.text == "article body"
+    assert response.url.endswith("/article")
+    assert http_client.get_stats()["127.0.0.1"]["http2_requests"] >= 1
+
+
+def test_allow_redirects_false_returns_the_redirect(server, http2):
+    response = http_client.get(f"{server}/moved", allow_redirects=False)
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/article"
+
+
+def test_form_and_raw_data(server, http2):
+    form = http_client.post(f"{server}/form", data={"a": "1", "b": "two"})
+    assert form.text == "application/x-www-form-urlencoded|a=1&b=two"
+    raw = http_client.post(f"{server}/raw", data=b"raw body", headers={"Content-Type": "text/plain"})
+    assert raw.text == "text/plain|raw body"
+
+
+def test_custom_verify_uses_the_requests_path(server, http2):
+    before = http_client.get_stats().get("127.0.0.1", {}).get("requests", 0)
+    response = http_client.get(f"{server}/article", verify=False)
+    assert response.text == "article body"
+    assert http_client.get_stats()["127.0.0.1"]["requests"] == before + 1
+
+
+def test_requests_use_the_configured_connect_timeout(monkeypatch):
+    import get_pocket
+
+    monkeypatch.setitem(http_client._settings, "timeout", (2, 40))
+    seen = []
+
+    def fake_get(url, **kwargs):
+        seen.append(kwargs["timeout"])
+        raise http_client.requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(get_pocket.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(http_client, "get", fake_get)
+    assert get_pocket.fetch_with_retry("http://127.0.0.1:9/", max_retries=1) is None
+    assert seen == [(2, 15)]
+    assert http_client.timeout() == (2, 40)
@@ -0,0 +1,35 @@
+#test_run_ledger.py do not change filename do not remove line
+"""Finished runs keep their stages but not the stored items and article bodies."""
+from article import Article
+from run_ledger import RunLedger
+
+
+def _run(ledger, item_ids, success):
+    ledger.start_run(0)
+    ledger.record_fetched([(item_id, {"item_id": item_id, "resolved_url": f"https://example.com/{item_id}"})
+                           for item_id in item_ids])
+    ledger.mark_fetch_done()
+    for item_id in item_ids:
+        article = Article(item_id=item_id, url=f"https://example.com/{item_id}")
+        article.set_content("article", "body " * 100)
+        ledger.record_scraped(article)
+    ledger.finish_run(success)
+
+
+def _payload_rows(ledger):
+    return ledger._conn.execute(
+        "SELECT COUNT(*) FROM run_articles WHERE item IS NOT NULL OR article IS NOT NULL"
+    ).fetchone()[0]
+
+
+def test_finished_run_drops_payloads(tmp_path):
+    ledger = RunLedger(str(tmp_path / "ledger.sqlite"))
+    _run(ledger, ["1", "2"], success=False)
+    assert _payload_rows(ledger) == 2
+    assert ledger.resume_run() is not None
+
+    _run(ledger, ["3"], success=True)
+    assert _payload_rows(ledger) == 0
+    assert ledger.stage_counts() == {"scraped": 1}
+    assert ledger.resume_run() is None
+    ledger.close()